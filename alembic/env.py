@@ -0,0 +1,60 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base_class import Base
+from app.models import book, review, user, summary_job, review_summary # Register all tables
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Full-text search objects are dialect-specific DDL managed by the migrations, not ORM columns
+SEARCH_OBJECTS = {"search_vector", "ix_book_search_vector"}
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if name in SEARCH_OBJECTS or (type_ == "table" and name.startswith("book_fts")):
+        return False
+    return True
+
+def database_url() -> str:
+    # -x url=... or alembic.ini win over the app settings (tests, one-off runs)
+    url = context.get_x_argument(as_dictionary=True).get("url") or config.get_main_option("sqlalchemy.url")
+    if url:
+        return url
+    from app.core.config import settings
+    return settings.DATABASE_URL
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout (`alembic upgrade head --sql`) instead of executing it."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online() -> None:
+    # A throwaway engine: migrations run once, outside the app's pools
+    engine = create_async_engine(database_url(), poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
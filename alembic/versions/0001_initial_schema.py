@@ -0,0 +1,64 @@
+"""Initial schema: books, users and reviews
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+The schema the application created at startup (`create_all`) before it
+moved to migrations. Databases created that way are already at this
+revision: mark them with `alembic stamp 0001`, then `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "book",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("author", sa.String(), nullable=False),
+        sa.Column("genre", sa.String()),
+        sa.Column("year_published", sa.Integer()),
+        sa.Column("summary", sa.Text()),
+    )
+    op.create_index("ix_book_id", "book", ["id"])
+    op.create_index("ix_book_title", "book", ["title"])
+    op.create_index("ix_book_author", "book", ["author"])
+    op.create_index("ix_book_genre", "book", ["genre"])
+
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String()),
+        sa.Column("is_active", sa.Integer()),
+    )
+    op.create_index("ix_user_id", "user", ["id"])
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+    op.create_index("ix_user_role", "user", ["role"])
+
+    op.create_table(
+        "review",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("book.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("review_text", sa.Text()),
+        sa.Column("rating", sa.Integer()),
+    )
+    op.create_index("ix_review_id", "review", ["id"])
+    op.create_index("ix_review_book_id", "review", ["book_id"])
+    op.create_index("ix_review_user_id", "review", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("review")
+    op.drop_table("user")
+    op.drop_table("book")
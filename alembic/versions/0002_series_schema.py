@@ -0,0 +1,155 @@
+"""Summary status, rating aggregates, versions, review summaries, summary jobs, full-text search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Brings a baseline (0001) database up to the schema the services expect,
+backfilling existing rows:
+  * summaries written synchronously by older versions count as ready,
+    or as failed where generation had failed (the error text is dropped);
+  * rating aggregates are computed from `review`;
+  * every book gets a review-summary row; its pending count makes the
+    refresher summarize the reviews it already has.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+STARS = range(1, 6)
+FAILED_SUMMARY = "Summary generation failed or is pending."
+
+
+def book_columns():
+    return [
+        sa.Column("summary_status", sa.String(16), server_default="pending", nullable=False),
+        sa.Column("rating_sum", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("review_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("rated_count", sa.Integer(), server_default="0", nullable=False),
+        *[sa.Column(f"rating_count_{star}", sa.Integer(), server_default="0", nullable=False) for star in STARS],
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ]
+
+
+# Frozen copies of the search DDL in app/models/book.py
+PG_SEARCH_DDL = [
+    "ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    " setweight(to_tsvector('english', coalesce(title, '')), 'A') ||"
+    " setweight(to_tsvector('english', coalesce(author, '')), 'A') ||"
+    " setweight(to_tsvector('english', coalesce(genre, '')), 'B') ||"
+    " setweight(to_tsvector('english', coalesce(summary, '')), 'C')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS ix_book_search_vector ON book USING GIN (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+    " title, author, genre, summary, content='book', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN"
+    " INSERT INTO book_fts(rowid, title, author, genre, summary)"
+    " VALUES (new.id, new.title, new.author, new.genre, new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN"
+    " INSERT INTO book_fts(book_fts, rowid, title, author, genre, summary)"
+    " VALUES ('delete', old.id, old.title, old.author, old.genre, old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author, genre, summary ON book BEGIN"
+    " INSERT INTO book_fts(book_fts, rowid, title, author, genre, summary)"
+    " VALUES ('delete', old.id, old.title, old.author, old.genre, old.summary);"
+    " INSERT INTO book_fts(rowid, title, author, genre, summary)"
+    " VALUES (new.id, new.title, new.author, new.genre, new.summary); END",
+    # Index the rows that predate the table
+    "INSERT INTO book_fts(book_fts) VALUES ('rebuild')",
+]
+
+
+def _is_sqlite() -> bool:
+    return op.get_bind().dialect.name == "sqlite"
+
+
+def _book_batch():
+    # SQLite cannot ADD/DROP these columns in place (updated_at's default is not a
+    # constant), so the table is copied there; elsewhere these are plain ALTERs
+    return op.batch_alter_table("book", recreate="always" if _is_sqlite() else "auto")
+
+
+def upgrade() -> None:
+    with _book_batch() as batch:
+        for column in book_columns():
+            batch.add_column(column)
+    op.create_index("ix_book_genre_id", "book", ["genre", "id"])
+    op.create_index("ix_review_book_id_id", "review", ["book_id", "id"])
+
+    op.create_table(
+        "reviewsummary",
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("book.id"), primary_key=True),
+        sa.Column("summary", sa.Text()),
+        sa.Column("last_review_id", sa.Integer(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(timezone=True)),
+        sa.Column("pending_reviews", sa.Integer(), nullable=False),
+        sa.Column("stale_since", sa.DateTime(timezone=True)),
+    )
+
+    op.create_table(
+        "summaryjob",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("book.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_summaryjob_id", "summaryjob", ["id"])
+    op.create_index("ix_summaryjob_book_id", "summaryjob", ["book_id"])
+    op.create_index("ix_summaryjob_status", "summaryjob", ["status"])
+
+    # --- Backfill ---
+    failed = "summary IS NULL OR summary LIKE 'Error:%' OR summary IN (:failed, 'Summary pending generation.')"
+    op.execute(sa.text(
+        f"UPDATE book SET summary_status = CASE WHEN {failed} THEN 'failed' ELSE 'ready' END, "
+        f"summary = CASE WHEN {failed} THEN :failed ELSE summary END"
+    ).bindparams(failed=FAILED_SUMMARY))
+
+    reviews_of_book = "FROM review WHERE review.book_id = book.id"
+    star_counts = ", ".join(
+        f"rating_count_{star} = (SELECT COUNT(*) {reviews_of_book} AND review.rating = {star})" for star in STARS
+    )
+    op.execute(
+        f"UPDATE book SET rating_sum = (SELECT COALESCE(SUM(review.rating), 0) {reviews_of_book}), "
+        f"review_count = (SELECT COUNT(*) {reviews_of_book}), "
+        f"rated_count = (SELECT COUNT(review.rating) {reviews_of_book}), {star_counts} "
+        f"WHERE EXISTS (SELECT 1 {reviews_of_book})"
+    )
+    op.execute(
+        "INSERT INTO reviewsummary (book_id, last_review_id, pending_reviews, stale_since) "
+        "SELECT id, 0, review_count, CASE WHEN review_count > 0 THEN CURRENT_TIMESTAMP END FROM book"
+    )
+
+    dialect = op.get_bind().dialect.name
+    for statement in PG_SEARCH_DDL if dialect == "postgresql" else SQLITE_SEARCH_DDL if dialect == "sqlite" else []:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("book_fts_ai", "book_fts_ad", "book_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS book_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_book_search_vector")
+        op.execute("ALTER TABLE book DROP COLUMN IF EXISTS search_vector")
+
+    op.drop_table("summaryjob")
+    op.drop_table("reviewsummary")
+    op.drop_index("ix_review_book_id_id", "review")
+    op.drop_index("ix_book_genre_id", "book")
+    with _book_batch() as batch:
+        for column in reversed(book_columns()):
+            batch.drop_column(column.name)
@@ -0,0 +1,45 @@
+"""Cascade book deletes to reviews, review summaries and summary jobs
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Deleting a book becomes one DELETE statement; the database removes its
+dependent rows instead of the application deleting each table in turn.
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Tables with a foreign key to book.id, all on a `book_id` column
+DEPENDENT_TABLES = ["review", "reviewsummary", "summaryjob"]
+
+# SQLite foreign keys are unnamed; batch mode needs names to drop them
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _replace_book_fks(ondelete) -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for table in DEPENDENT_TABLES:
+            name = f"fk_{table}_book_id_book"
+            with op.batch_alter_table(table, naming_convention=SQLITE_NAMING) as batch:
+                batch.drop_constraint(name, type_="foreignkey")
+                batch.create_foreign_key(name, "book", ["book_id"], ["id"], ondelete=ondelete)
+        return
+    for table in DEPENDENT_TABLES:
+        # PostgreSQL's default name for the constraints created by 0001 and 0002
+        name = f"{table}_book_id_fkey"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(name, table, "book", ["book_id"], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _replace_book_fks("CASCADE")
+
+
+def downgrade() -> None:
+    _replace_book_fks(None)
@@ -0,0 +1,26 @@
+"""Record when a summary job was claimed
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+A running job whose claim is older than the lease belongs to a worker that
+died; only those are handed out again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("summaryjob", sa.Column("claimed_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("summaryjob") as batch:
+        batch.drop_column("claimed_at")
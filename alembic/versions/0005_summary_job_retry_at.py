@@ -0,0 +1,26 @@
+"""Record when a failed summary job may be retried
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+The worker polls the table for pending jobs; a job backing off after a
+failure is skipped until this time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("summaryjob", sa.Column("retry_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("summaryjob") as batch:
+        batch.drop_column("retry_at")
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+
+# Share of the disk limit freed by each trim, so trims (and their COUNT) stay rare
+DISK_PRUNE_FRACTION = 0.1
+
+def make_cache_key(model: str, prompt: str) -> str:
+    """Content-addressed key: SHA-256 over the model name and the exact prompt."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\x00") # Separator so ("ab", "c") and ("a", "bc") never collide
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM completions.
+
+    The first tier is a bounded in-memory LRU. The optional second tier is a
+    SQLite file that survives restarts; entries found there are promoted back
+    into memory. Both tiers honour the same TTL (0 disables expiry).
+    """
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 0,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path or None
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (stored_at, value); ordered from least to most recently used
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        # One connection shared by the worker threads; the lock serializes its use
+        # (and keeps the row count consistent with the trims)
+        self._disk_lock = threading.Lock()
+        # Rows in the disk tier, kept up to date without a COUNT per insert
+        self._disk_entries = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if self.db_path:
+            self._open_disk()
+
+    # --- Persistent tier (blocking sqlite3 calls, run in a worker thread) ---
+
+    def _open_disk(self) -> None:
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_stored_at ON llm_cache (stored_at)")
+        (self._disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._disk_lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _disk_set(self, key: str, stored_at: float, value: str) -> None:
+        with self._disk_lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO llm_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at),
+            ).rowcount
+            if not inserted:
+                self._conn.execute(
+                    "UPDATE llm_cache SET value = ?, stored_at = ? WHERE key = ?", (value, stored_at, key)
+                )
+                return
+            self._disk_entries += 1
+            if self._disk_entries > self.max_disk_entries:
+                self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Trim the oldest rows, leaving headroom below the size limit. Call with the lock held."""
+        # Other processes may share the file, so the local count is only a trigger
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_disk_entries:
+            keep = self.max_disk_entries - int(self.max_disk_entries * DISK_PRUNE_FRACTION)
+            count -= self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY stored_at ASC LIMIT ?)",
+                (count - keep,),
+            ).rowcount
+        self._disk_entries = count
+
+    def _disk_delete(self, key: str) -> None:
+        with self._disk_lock:
+            self._disk_entries -= self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,)).rowcount
+
+    def _disk_clear(self) -> None:
+        with self._disk_lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._disk_entries = 0
+
+    # --- Public API ---
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and (time.time() - stored_at) > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, value: str) -> None:
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._is_expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._memory[key]
+
+        if self._conn is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                if not self._is_expired(entry[0]):
+                    self._remember(key, entry[0], entry[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry[1]
+                await asyncio.to_thread(self._disk_delete, key)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a value in every enabled tier."""
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_set, key, stored_at, value)
+
+    async def clear(self) -> None:
+        """Drop all entries from both tiers and reset the counters."""
+        self._memory.clear()
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_clear)
+        self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size, e.g. for a diagnostics endpoint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_entries": self._disk_entries,
+            "persistent": self._conn is not None,
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._disk_lock:
+                self._conn.close()
+                self._conn = None
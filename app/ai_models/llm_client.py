@@ -1,11 +1,49 @@
+import asyncio
+import json
+import time
+from contextlib import aclosing
+
 import httpx
 from app.core.config import settings
-from typing import Optional, Dict, Any
+from app.ai_models.llm_cache import LLMCache, make_cache_key
+from app.ai_models.scheduler import (
+    LLMScheduler, LLMRequestContext, LLMError, LLMUnavailable, LLMTimeout, current_request
+)
+from app.core.singleflight import SingleFlight, StreamFlight
+from app.core.metrics import LLM_REQUEST_SECONDS, LLM_TTFT_SECONDS, LLM_PROMPT_CHARS, LLM_CACHE_HITS, LLM_ERRORS
+from typing import Optional, Dict, Any, AsyncIterator, List
 
 # Define the model to use from configuration
 MODEL = settings.LLM_MODEL_NAME
 BASE_URL = settings.LLM_BASE_URL
 
+class StreamMetrics:
+    """Running counters for streamed generations (time-to-first-token etc.)."""
+    def __init__(self):
+        self.streams = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.ttft_ms_total = 0.0
+        self.ttft_ms_max = 0.0
+        self.ttft_samples = 0
+
+    def record_ttft(self, ttft_ms: float) -> None:
+        self.ttft_samples += 1
+        self.ttft_ms_total += ttft_ms
+        self.ttft_ms_max = max(self.ttft_ms_max, ttft_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        avg = self.ttft_ms_total / self.ttft_samples if self.ttft_samples else None
+        return {
+            "streams": self.streams,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "ttft_ms_avg": round(avg, 2) if avg is not None else None,
+            "ttft_ms_max": round(self.ttft_ms_max, 2),
+        }
+
 class LLMClient:
     """
     Asynchronous client for interacting with the local Llama3 model via the Ollama API.
@@ -13,10 +51,71 @@ class LLMClient:
     def __init__(self):
         # Ollama's API endpoint for generating completions
         self.generate_url = f"{BASE_URL}/api/generate"
-        self.http_client = httpx.AsyncClient(timeout=60.0) # Set a generous timeout
+        self.embeddings_url = f"{BASE_URL}/api/embeddings"
+        # Opened on first use, inside the running loop; closed by the app lifespan
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Bounded concurrency, priorities, retries and the circuit breaker
+        self.scheduler = LLMScheduler()
+        self.cache: Optional[LLMCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = LLMCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                db_path=settings.LLM_CACHE_DB_PATH,
+                max_disk_entries=settings.LLM_CACHE_MAX_DISK_ENTRIES,
+            )
+        self.stream_metrics = StreamMetrics()
+        # Identical prompts already in flight share one Ollama call
+        self.inflight = SingleFlight("llm")
+        # Identical prompts streamed at the same time share one generation
+        self.streams = StreamFlight("llm_stream")
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            # Per-call timeouts come from the scheduler's deadlines; this is only the ceiling
+            self._http_client = httpx.AsyncClient(timeout=settings.LLM_TIMEOUT_BACKGROUND_SECONDS)
+        return self._http_client
 
-    async def _generate_text(self, prompt: str) -> Optional[str]:
-        """Internal function to call the Ollama generate API."""
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool and the on-disk cache tier."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _generate_text(self, prompt: str, operation: str = "generate") -> str:
+        """
+        Return a completion for the prompt, serving identical prompts from the
+        cache; concurrent identical prompts are coalesced into one call.
+        Raises LLMError (LLMUnavailable, LLMTimeout) instead of returning error text.
+        """
+        LLM_PROMPT_CHARS.labels(operation).observe(len(prompt))
+        key = make_cache_key(MODEL, prompt)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                LLM_CACHE_HITS.labels(operation).inc()
+                return cached
+        return await self.inflight.do(key, lambda: self._generate_uncached(prompt, key, operation))
+
+    async def _generate_uncached(self, prompt: str, key: str, operation: str) -> str:
+        started = time.perf_counter()
+        try:
+            text = await self.scheduler.run(lambda timeout: self._call_model(prompt, timeout))
+        except LLMError:
+            LLM_REQUEST_SECONDS.labels(operation, "error").observe(time.perf_counter() - started)
+            LLM_ERRORS.labels(operation).inc()
+            raise
+        LLM_REQUEST_SECONDS.labels(operation, "ok").observe(time.perf_counter() - started)
+        # Only successful completions reach the cache
+        if self.cache is not None:
+            await self.cache.set(key, text)
+        return text
+
+    async def _call_model(self, prompt: str, timeout: float) -> str:
+        """Internal function to call the Ollama generate API once."""
         payload = {
             "model": MODEL,
             "prompt": prompt,
@@ -25,37 +124,252 @@ class LLMClient:
         
         try:
             # POST request to the Ollama server
-            response = await self.http_client.post(self.generate_url, json=payload)
+            response = await self.http_client.post(self.generate_url, json=payload, timeout=timeout)
             response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-            
-            # Ollama response structure: {"model": "...", "response": "..."}
-            data = response.json()
-            return data.get("response", "").strip()
-
+        except httpx.TimeoutException as e:
+            raise LLMTimeout(f"LLM server did not respond in time. ({e})") from e
         except httpx.RequestError as e:
             # Handle connection errors (e.g., Ollama server is down)
             print(f"LLM Connection Error: {e}")
-            return f"Error: Failed to connect to LLM server. ({e})"
+            raise LLMUnavailable(f"Failed to connect to LLM server. ({e})") from e
+        except httpx.HTTPStatusError as e:
+            print(f"LLM Generation Error: {e}")
+            # 5xx and 429 are worth retrying; other statuses mean this request is bad
+            if e.response.status_code >= 500 or e.response.status_code == 429:
+                raise LLMUnavailable(f"LLM server error ({e.response.status_code}).") from e
+            raise LLMError(f"LLM generation failed ({e.response.status_code}).") from e
+
+        # Ollama response structure: {"model": "...", "response": "..."}
+        text = response.json().get("response", "").strip()
+        if not text:
+            raise LLMError("Empty response from LLM.")
+        return text
+
+    async def stream_text(
+        self,
+        prompt: str,
+        timings: Optional[Dict[str, float]] = None,
+        operation: str = "stream",
+        context: Optional[LLMRequestContext] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield completion tokens as Ollama produces them (NDJSON stream).
+
+        Concurrent streams of the same prompt share one generation, run with
+        the first caller's context; a caller that joins late first receives
+        the tokens produced so far. Closing the generator (e.g. the HTTP
+        client disconnected) leaves the generation to the other callers; once
+        none remain the upstream response is closed, which makes Ollama stop
+        generating. `timings`, if given, receives this caller's 'ttft_ms' and
+        'total_ms'. Raises LLMError on failure.
+        Pass `context` explicitly: a generator outlives any `llm_request` block.
+        """
+        started = time.perf_counter()
+        timings = timings if timings is not None else {}
+        upstream: Dict[str, float] = {}
+        context = context or current_request()
+        try:
+            shared = self.streams.subscribe(
+                make_cache_key(MODEL, prompt), lambda: self._stream_uncoalesced(prompt, upstream, operation, context)
+            )
+            async with aclosing(shared) as tokens:
+                async for token in tokens:
+                    if "ttft_ms" not in timings:
+                        timings["ttft_ms"] = (time.perf_counter() - started) * 1000
+                    yield token
+        finally:
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
+            if upstream.get("cached"):
+                timings["cached"] = True
+
+    async def _stream_uncoalesced(
+        self, prompt: str, timings: Dict[str, float], operation: str, context: LLMRequestContext
+    ) -> AsyncIterator[str]:
+        """
+        One streamed generation (or cache hit). It holds one scheduler slot
+        until it ends and is not retried; `timings` feeds the stream metrics.
+        """
+        started = time.perf_counter()
+        self.stream_metrics.streams += 1
+        LLM_PROMPT_CHARS.labels(operation).observe(len(prompt))
+
+        key = make_cache_key(MODEL, prompt) if self.cache is not None else None
+        if key is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                timings["ttft_ms"] = timings["total_ms"] = (time.perf_counter() - started) * 1000
+                timings["cached"] = True
+                self.stream_metrics.record_ttft(timings["ttft_ms"])
+                self.stream_metrics.completed += 1
+                LLM_CACHE_HITS.labels(operation).inc()
+                yield cached
+                return
+
+        payload = {
+            "model": MODEL,
+            "prompt": prompt,
+            "stream": True # Ollama sends one JSON object per line as tokens are generated
+        }
+        deadline = context.deadline or time.monotonic() + self.scheduler.default_timeout(context.priority)
+        try:
+            self.scheduler.breaker.check()
+            await self.scheduler.acquire(context.priority, context.user, deadline)
+        except LLMError:
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
+            raise
+
+        parts = []
+        completed = False
+        try:
+            # The deadline bounds the wait for each chunk (a stalled server), not the whole stream
+            timeout = max(deadline - time.monotonic(), 1.0)
+            async with self.http_client.stream("POST", self.generate_url, json=payload, timeout=timeout) as response:
+                if response.status_code >= 500:
+                    raise LLMUnavailable(f"LLM server error ({response.status_code}).")
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise LLMError(data["error"])
+                    token = data.get("response", "")
+                    if token:
+                        if not parts:
+                            timings["ttft_ms"] = (time.perf_counter() - started) * 1000
+                            self.stream_metrics.record_ttft(timings["ttft_ms"])
+                            LLM_TTFT_SECONDS.labels(operation).observe(timings["ttft_ms"] / 1000)
+                        parts.append(token)
+                        yield token
+                    if data.get("done"):
+                        completed = True
+                        break
+        except (asyncio.CancelledError, GeneratorExit):
+            self.stream_metrics.cancelled += 1
+            raise
+        except LLMError as e:
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
+            if isinstance(e, LLMUnavailable):
+                self.scheduler.breaker.record_failure()
+            raise
+        except httpx.TimeoutException as e:
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
+            self.scheduler.breaker.record_failure()
+            raise LLMTimeout(f"LLM server stopped responding. ({e})") from e
+        except httpx.RequestError as e:
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
+            self.scheduler.breaker.record_failure()
+            print(f"LLM Connection Error: {e}")
+            raise LLMUnavailable(f"Failed to connect to LLM server. ({e})") from e
         except Exception as e:
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
             print(f"LLM Generation Error: {e}")
-            return f"Error: LLM generation failed. ({e})"
+            raise LLMError(f"LLM generation failed. ({e})") from e
+        finally:
+            self.scheduler.release()
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
 
-    async def generate_book_summary(self, content: str, title: str) -> Optional[str]:
-        """Generate a summary for a new book entry based on its content."""
-        prompt = (
+        if not completed:
+            # The upstream connection ended without Ollama's final 'done' message
+            self.stream_metrics.failed += 1
+            LLM_ERRORS.labels(operation).inc()
+            raise LLMError("LLM stream ended unexpectedly.")
+        self.stream_metrics.completed += 1
+        self.scheduler.breaker.record_success()
+        LLM_REQUEST_SECONDS.labels(operation, "ok").observe(timings["total_ms"] / 1000)
+        text = "".join(parts).strip()
+        if text and key is not None:
+            await self.cache.set(key, text)
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Return an embedding vector for the text, or None if Ollama is unavailable."""
+        LLM_PROMPT_CHARS.labels("embed").observe(len(text))
+        started = time.perf_counter()
+        try:
+            embedding = await self.scheduler.run(lambda timeout: self._call_embeddings(text, timeout))
+            LLM_REQUEST_SECONDS.labels("embed", "ok").observe(time.perf_counter() - started)
+            return embedding
+        except LLMError as e:
+            print(f"LLM Embedding Error: {e}")
+        LLM_REQUEST_SECONDS.labels("embed", "error").observe(time.perf_counter() - started)
+        LLM_ERRORS.labels("embed").inc()
+        return None
+
+    async def _call_embeddings(self, text: str, timeout: float) -> List[float]:
+        payload = {"model": settings.LLM_EMBEDDING_MODEL, "prompt": text}
+        try:
+            response = await self.http_client.post(self.embeddings_url, json=payload, timeout=timeout)
+            response.raise_for_status()
+        except httpx.TimeoutException as e:
+            raise LLMTimeout(f"LLM server did not respond in time. ({e})") from e
+        except httpx.RequestError as e:
+            raise LLMUnavailable(f"Failed to connect to LLM server. ({e})") from e
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                raise LLMUnavailable(f"LLM server error ({e.response.status_code}).") from e
+            raise LLMError(f"Embedding request failed ({e.response.status_code}).") from e
+        # Ollama response structure: {"embedding": [...]}
+        embedding = response.json().get("embedding")
+        if not embedding:
+            raise LLMError("Empty embedding from LLM.")
+        return embedding
+
+    def _book_summary_prompt(self, content: str, title: str) -> str:
+        return (
             f"You are a professional book summarizer. Summarize the following book content "
             f"for the book titled '{title}' in approximately 150 words. Content: {content}"
         )
-        return await self._generate_text(prompt)
 
-    async def generate_review_summary(self, reviews_text: str) -> Optional[str]:
-        """Generate an aggregated summary of all reviews for a book."""
-        prompt = (
+    def _review_summary_prompt(self, reviews_text: str) -> str:
+        return (
             f"You are a critical review analyst. Based on the following user reviews, "
             f"provide a concise, neutral summary of the overall sentiment and common themes. "
             f"Reviews: {reviews_text}"
         )
-        return await self._generate_text(prompt)
+
+    async def generate_chunk_summary(self, chunk: str, title: str, part: int, total: int) -> str:
+        """Summarize one section of a long book (map stage of chunked summarization)."""
+        prompt = (
+            f"You are a professional book summarizer. The following is part {part} of {total} "
+            f"of the book titled '{title}'. Summarize the key events, ideas and characters of "
+            f"this part in approximately 150 words. Content: {chunk}"
+        )
+        return await self._generate_text(prompt, "chunk_summary")
+
+    async def generate_combined_summary(self, partial_summaries: str, title: str, final: bool) -> str:
+        """Merge consecutive section summaries (reduce stage of chunked summarization)."""
+        length = "approximately 150 words" if final else "approximately 250 words"
+        prompt = (
+            f"You are a professional book summarizer. The following are summaries of consecutive "
+            f"sections of the book titled '{title}', in order. Combine them into a single coherent "
+            f"summary of {length}. Section summaries: {partial_summaries}"
+        )
+        return await self._generate_text(prompt, "combined_summary")
+
+    async def generate_book_summary(self, content: str, title: str) -> str:
+        """Generate a summary for a new book entry based on its content."""
+        return await self._generate_text(self._book_summary_prompt(content, title), "book_summary")
+
+    async def generate_review_summary(self, reviews_text: str) -> str:
+        """Generate an aggregated summary of all reviews for a book."""
+        return await self._generate_text(self._review_summary_prompt(reviews_text), "review_summary")
+
+    def stream_book_summary(
+        self, content: str, title: str, timings: Optional[Dict[str, float]] = None, context: Optional[LLMRequestContext] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of generate_book_summary."""
+        return self.stream_text(self._book_summary_prompt(content, title), timings, "book_summary_stream", context)
+
+    def stream_review_summary(
+        self, reviews_text: str, timings: Optional[Dict[str, float]] = None, context: Optional[LLMRequestContext] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of generate_review_summary."""
+        return self.stream_text(self._review_summary_prompt(reviews_text), timings, "review_summary_stream", context)
 
 # Instantiate the client once
 llm_client = LLMClient()
\ No newline at end of file
@@ -0,0 +1,267 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = 0 # A reader is waiting on the response (e.g. streamed review summaries)
+PRIORITY_ON_DEMAND = 1 # Ad-hoc /generate-summary calls
+PRIORITY_BACKGROUND = 2 # Summary worker, review-summary refresher, embeddings
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_ON_DEMAND: "on_demand", PRIORITY_BACKGROUND: "background"}
+
+DEFAULT_TIMEOUTS = {
+    PRIORITY_INTERACTIVE: settings.LLM_TIMEOUT_INTERACTIVE_SECONDS,
+    PRIORITY_ON_DEMAND: settings.LLM_TIMEOUT_ON_DEMAND_SECONDS,
+    PRIORITY_BACKGROUND: settings.LLM_TIMEOUT_BACKGROUND_SECONDS,
+}
+
+
+class LLMError(Exception):
+    """Ollama could not produce a completion."""
+
+class LLMUnavailable(LLMError):
+    """Ollama is unreachable or failing (retryable), or the circuit breaker is open."""
+
+class LLMOverloaded(LLMUnavailable):
+    """Too many generations are already queued."""
+
+class LLMTimeout(LLMError):
+    """The call's deadline passed (queued or generating)."""
+
+
+class LLMRequestContext:
+    def __init__(self, priority: int, user: Hashable, deadline: Optional[float]):
+        self.priority = priority
+        self.user = user
+        self.deadline = deadline
+
+_request_context: contextvars.ContextVar[Optional[LLMRequestContext]] = contextvars.ContextVar("llm_request", default=None)
+
+def request_context(priority: int, user: Hashable = None, timeout: Optional[float] = None) -> LLMRequestContext:
+    """`timeout` sets one deadline shared by every call made under the context."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    return LLMRequestContext(priority, user, deadline)
+
+@contextmanager
+def llm_request(priority: int, user: Hashable = None, timeout: Optional[float] = None) -> Iterator[LLMRequestContext]:
+    """
+    Tag LLM calls made inside the block (including tasks created there) with
+    a priority class and a user for fair queuing. Without a `timeout` each
+    call gets its class's default deadline.
+    """
+    context = request_context(priority, user, timeout)
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+def current_request() -> LLMRequestContext:
+    """The caller's context; untagged calls (workers, refreshers) are background work."""
+    return _request_context.get() or LLMRequestContext(PRIORITY_BACKGROUND, None, None)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    fail fast. After `reset_seconds` one probe is let through (half-open):
+    success closes the breaker, failure re-opens it.
+    """
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def check(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        # One probe at a time; a probe that never reported back (e.g. cancelled) expires
+        if state == "half_open" and (self._probe_started is None or now - self._probe_started >= self.reset_seconds):
+            self._probe_started = now
+            return
+        self.rejected += 1
+        raise LLMUnavailable("LLM server is unavailable (circuit open); try again later.")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"LLM circuit breaker opened after {self.failures} consecutive failures.")
+            # (Re)open: a failed half-open probe starts a new cool-down
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+
+
+class LLMScheduler:
+    """
+    Admission control in front of Ollama.
+
+    At most `max_concurrency` calls run at once. Waiting calls are served by
+    priority class, and round-robin across users within a class, so one
+    user's burst cannot starve the others. Every call has a deadline that
+    covers queueing, the HTTP call and retries. Retryable failures are
+    retried with full-jitter exponential backoff (outside the slot), and a
+    circuit breaker makes calls fail fast while Ollama is down.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        max_queue: int = settings.LLM_MAX_QUEUE,
+        max_attempts: int = settings.LLM_RETRY_ATTEMPTS,
+        retry_base: float = settings.LLM_RETRY_BASE_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.breaker = breaker or CircuitBreaker(settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS)
+        self._active = 0
+        self._queued = 0
+        # One queue per priority class: user -> waiters, in round-robin order
+        self._queues: List["OrderedDict[Hashable, deque[asyncio.Future]]"] = [OrderedDict() for _ in PRIORITY_NAMES]
+        self.admitted = [0] * len(PRIORITY_NAMES)
+        self.timeouts = 0
+        self.retries = 0
+        self.overloaded = 0
+
+    # --- Slots ---
+
+    async def acquire(self, priority: int, user: Hashable, deadline: float) -> None:
+        if self._active < self.max_concurrency and self._queued == 0:
+            self._active += 1
+            self.admitted[priority] += 1
+            return
+        if self._queued >= self.max_queue:
+            self.overloaded += 1
+            raise LLMOverloaded("Too many LLM requests queued; try again later.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(user, deque()).append(waiter)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout=max(deadline - time.monotonic(), 0))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release() # Granted just as we gave up; pass the slot on
+            else:
+                self._discard(priority, user, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise LLMTimeout("Timed out waiting for an LLM slot.") from None
+            raise
+        self.admitted[priority] += 1
+
+    def release(self) -> None:
+        self._active -= 1
+        while self._active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._active += 1
+            waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for queue in self._queues:
+            while queue:
+                user, waiters = next(iter(queue.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(user) # Next user in this class goes first
+                else:
+                    del queue[user]
+                self._queued -= 1
+                if not waiter.done():
+                    return waiter
+        return None
+
+    def _discard(self, priority: int, user: Hashable, waiter: asyncio.Future) -> None:
+        waiters = self._queues[priority].get(user)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._queues[priority][user]
+
+    def default_timeout(self, priority: int) -> float:
+        return DEFAULT_TIMEOUTS[priority]
+
+    # --- Calls ---
+
+    async def run(self, call: Callable[[float], Awaitable[T]], context: Optional[LLMRequestContext] = None) -> T:
+        """
+        Run `call(timeout)` under admission control, retrying retryable failures.
+        `timeout` is the time left before the deadline; raises LLMError subclasses.
+        """
+        context = context or current_request()
+        deadline = context.deadline or time.monotonic() + self.default_timeout(context.priority)
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.check()
+            await self.acquire(context.priority, context.user, deadline)
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMTimeout("LLM call deadline exceeded.")
+                result = await asyncio.wait_for(call(remaining), timeout=remaining)
+            except (asyncio.TimeoutError, LLMTimeout):
+                # Too slow counts against the breaker; there is no time left to retry
+                self.timeouts += 1
+                self.breaker.record_failure()
+                raise LLMTimeout("LLM call deadline exceeded.") from None
+            except LLMUnavailable:
+                self.breaker.record_failure()
+                if attempt >= self.max_attempts:
+                    raise
+            except LLMError:
+                # The server answered; it is up even though this request failed
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self.release()
+
+            # Full jitter: a random wait in [0, base * 2^attempt), never past the deadline
+            delay = random.uniform(0, self.retry_base * 2 ** attempt)
+            if time.monotonic() + delay >= deadline:
+                raise LLMTimeout("LLM call deadline exceeded while retrying.")
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "admitted": {PRIORITY_NAMES[p]: n for p, n in enumerate(self.admitted)},
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "overloaded": self.overloaded,
+            "breaker": {"state": self.breaker.state, "consecutive_failures": self.breaker.failures, "rejected": self.breaker.rejected},
+        }
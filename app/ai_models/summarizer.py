@@ -0,0 +1,139 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.ai_models.llm_client import llm_client
+from app.core.config import settings
+from app.core.metrics import SUMMARY_STAGE_SECONDS
+
+
+def chunk_text(content: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Split content into chunks of at most `chunk_size` characters, each sharing
+    `overlap` characters with the previous one. Cuts prefer a paragraph break,
+    then a sentence end, then whitespace, so words are not split mid-way.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    overlap = max(0, min(overlap, chunk_size // 2))
+    chunks = []
+    start = 0
+    length = len(content)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            window_start = start + chunk_size // 2 # Never cut a chunk shorter than half its size
+            for separator in ("\n\n", ". ", " "):
+                cut = content.rfind(separator, window_start, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = content[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+        start = end - overlap
+    return chunks
+
+
+class ChunkedSummarizer:
+    """
+    Map-reduce summarizer for content that does not fit one prompt.
+
+    Map: every chunk is summarized concurrently (bounded by `concurrency`).
+    Reduce: partial summaries are merged in groups until one remains; groups
+    are sized so each reduce prompt stays under `chunk_size` characters.
+    """
+    def __init__(
+        self,
+        chunk_size: int = settings.SUMMARY_CHUNK_SIZE,
+        overlap: int = settings.SUMMARY_CHUNK_OVERLAP,
+        concurrency: int = settings.SUMMARY_MAP_CONCURRENCY,
+    ):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.concurrency = concurrency
+
+    async def summarize(self, content: str, title: str) -> Tuple[str, Dict[str, Any]]:
+        """Return (summary, timings). Raises LLMError if any LLM call fails."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(coro_factory):
+            async with semaphore:
+                return await coro_factory()
+
+        timings: Dict[str, Any] = {"mode": "chunked", "chunk_size": self.chunk_size}
+        started = time.perf_counter()
+
+        # --- Map ---
+        chunks = chunk_text(content, self.chunk_size, self.overlap)
+        timings["chunks"] = len(chunks)
+        stage_start = time.perf_counter()
+        partials = await self._run_all([
+            lambda c=chunk, i=index: llm_client.generate_chunk_summary(c, title, i + 1, len(chunks))
+            for index, chunk in enumerate(chunks)
+        ], bounded)
+        timings["map_ms"] = round((time.perf_counter() - stage_start) * 1000, 2)
+        SUMMARY_STAGE_SECONDS.labels("map").observe(timings["map_ms"] / 1000)
+
+        # --- Reduce ---
+        levels = []
+        while len(partials) > 1:
+            stage_start = time.perf_counter()
+            groups = self._group(partials)
+            final = len(groups) == 1
+            partials = await self._run_all([
+                lambda g=group: llm_client.generate_combined_summary("\n\n".join(g), title, final)
+                for group in groups
+            ], bounded)
+            levels.append({"groups": len(groups), "ms": round((time.perf_counter() - stage_start) * 1000, 2)})
+            SUMMARY_STAGE_SECONDS.labels("reduce").observe(levels[-1]["ms"] / 1000)
+
+        timings["reduce_levels"] = levels
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        SUMMARY_STAGE_SECONDS.labels("total").observe(timings["total_ms"] / 1000)
+        return partials[0], timings
+
+    def _group(self, partials: List[str]) -> List[List[str]]:
+        """Pack consecutive partial summaries into groups that fit one prompt (at least two per group)."""
+        groups, current, size = [], [], 0
+        for partial in partials:
+            if len(current) >= 2 and size + len(partial) > self.chunk_size:
+                groups.append(current)
+                current, size = [], 0
+            current.append(partial)
+            size += len(partial)
+        if current:
+            # A trailing single summary is merged into the previous group
+            if len(current) == 1 and groups:
+                groups[-1].extend(current)
+            else:
+                groups.append(current)
+        return groups
+
+    @staticmethod
+    async def _run_all(factories, bounded) -> List[str]:
+        """Run every call; the first failure cancels the rest (no wasted generations) and is raised."""
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(bounded(factory)) for factory in factories]
+        except* Exception as failures:
+            raise failures.exceptions[0]
+        return [task.result() for task in tasks]
+
+
+async def summarize_book(content: str, title: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Summarize book content, switching to map-reduce above SUMMARY_CHUNK_THRESHOLD.
+    Returns (summary, timings); raises LLMError on failure.
+    """
+    if len(content) <= settings.SUMMARY_CHUNK_THRESHOLD:
+        started = time.perf_counter()
+        summary = await llm_client.generate_book_summary(content, title)
+        return summary, {"mode": "single", "total_ms": round((time.perf_counter() - started) * 1000, 2)}
+    return await chunked_summarizer.summarize(content, title)
+
+
+# Instantiate the summarizer once
+chunked_summarizer = ChunkedSummarizer()
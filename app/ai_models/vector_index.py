@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SEARCH_BATCH_ROWS = 65_536 # Rows scored per matmul in exact search (bounds temporary memory)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over book embeddings.
+
+    Vectors are L2-normalized float32 rows in a memory-mapped `.npy` file, so
+    the catalog does not have to fit in RAM and survives restarts. Row ids
+    live in a small side array; deleted rows are tombstoned with id -1.
+
+    Search is exact (batched matrix products) by default. Once `train_ivf`
+    has run, `search(..., approximate=True)` uses an inverted-file index:
+    vectors are bucketed by their nearest k-means centroid and only the
+    `nprobe` closest buckets are scanned.
+    """
+    def __init__(self, dim: int, path: Optional[str] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self.path = path
+        self._lock = threading.RLock()
+        self.count = 0
+        self.ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self.vectors = self._allocate(initial_capacity)
+        self._row_of = {}
+
+        # IVF state (approximate mode)
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Optional[np.ndarray] = None # Centroid of each row, -1 if unassigned
+        self.lists: List[np.ndarray] = []
+
+        if path and os.path.exists(self._meta_path):
+            self._load()
+
+    # --- Storage ---
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if not self.path:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        os.makedirs(self.path, exist_ok=True)
+        return np.lib.format.open_memmap(
+            os.path.join(self.path, f"vectors-{capacity}.npy"), mode="w+", dtype=np.float32, shape=(capacity, self.dim)
+        )
+
+    def _grow(self) -> None:
+        capacity = len(self.ids) * 2
+        old_vectors = self.vectors
+        vectors = self._allocate(capacity)
+        vectors[: self.count] = old_vectors[: self.count]
+        ids = np.full(capacity, -1, dtype=np.int64)
+        ids[: self.count] = self.ids[: self.count]
+        self.vectors, self.ids = vectors, ids
+        if self.assignments is not None:
+            assignments = np.full(capacity, -1, dtype=np.int32)
+            assignments[: self.count] = self.assignments[: self.count]
+            self.assignments = assignments
+        if self.path and isinstance(old_vectors, np.memmap):
+            old_file = old_vectors.filename
+            del old_vectors
+            self.flush()
+            os.remove(old_file)
+
+    def _load(self) -> None:
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if meta["dim"] != self.dim:
+            raise ValueError(f"Stored vectors have dim {meta['dim']}, expected {self.dim}")
+        self.count = meta["count"]
+        self.vectors = np.load(os.path.join(self.path, meta["vectors_file"]), mmap_mode="r+")
+        self.ids = np.load(os.path.join(self.path, "ids.npy"))
+        self._row_of = {int(book_id): row for row, book_id in enumerate(self.ids[: self.count]) if book_id >= 0}
+
+    def flush(self) -> None:
+        """Persist ids and metadata (vectors are written through the memory map)."""
+        if not self.path:
+            return
+        with self._lock:
+            if isinstance(self.vectors, np.memmap):
+                self.vectors.flush()
+            np.save(os.path.join(self.path, "ids.npy"), self.ids)
+            meta = {"dim": self.dim, "count": self.count, "vectors_file": os.path.basename(self.vectors.filename)}
+            with open(self._meta_path + ".tmp", "w") as f:
+                json.dump(meta, f)
+            os.replace(self._meta_path + ".tmp", self._meta_path)
+
+    # --- Mutation ---
+
+    def upsert(self, book_id: int, vector: List[float]) -> None:
+        vector = _normalize(np.asarray(vector, dtype=np.float32))
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got {vector.shape}")
+        with self._lock:
+            row = self._row_of.get(book_id)
+            if row is None:
+                if self.count == len(self.ids):
+                    self._grow()
+                row = self.count
+                self.count += 1
+                self.ids[row] = book_id
+                self._row_of[book_id] = row
+            self.vectors[row] = vector
+            if self.centroids is not None:
+                self._assign(row)
+
+    def remove(self, book_id: int) -> None:
+        with self._lock:
+            row = self._row_of.pop(book_id, None)
+            if row is not None:
+                self.ids[row] = -1 # Tombstone; the row is skipped by every search
+
+    def get(self, book_id: int) -> Optional[np.ndarray]:
+        row = self._row_of.get(book_id)
+        return None if row is None else np.array(self.vectors[row])
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # --- Exact search ---
+
+    def _search_rows(self, query: np.ndarray, rows: Optional[np.ndarray], k: int, exclude: Optional[int]) -> List[Tuple[int, float]]:
+        best_ids, best_scores = [], []
+        total = self.count if rows is None else len(rows)
+        for start in range(0, total, SEARCH_BATCH_ROWS):
+            if rows is None:
+                block_rows = np.arange(start, min(start + SEARCH_BATCH_ROWS, total))
+                block = self.vectors[start : start + len(block_rows)]
+            else:
+                block_rows = rows[start : start + SEARCH_BATCH_ROWS]
+                block = self.vectors[block_rows]
+            scores = block @ query
+            ids = self.ids[block_rows]
+            valid = ids >= 0
+            if exclude is not None:
+                valid &= ids != exclude
+            scores, ids = scores[valid], ids[valid]
+            top = _top_k(scores, k)
+            best_ids.append(ids[top])
+            best_scores.append(scores[top])
+        if not best_ids:
+            return []
+        ids, scores = np.concatenate(best_ids), np.concatenate(best_scores)
+        top = _top_k(scores, k)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def search(self, vector, k: int = 10, approximate: bool = False, nprobe: int = 8, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k (book_id, cosine similarity) pairs, best first."""
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            if self.count == 0:
+                return []
+            if not approximate or self.centroids is None:
+                return self._search_rows(query, None, k, exclude)
+            # Probe the nearest buckets only
+            probes = _top_k(self.centroids @ query, min(nprobe, len(self.centroids)))
+            rows = np.concatenate([self.lists[c] for c in probes]) if len(probes) else np.array([], dtype=np.int64)
+            return self._search_rows(query, rows, k, exclude)
+
+    # --- Approximate (IVF) index ---
+
+    def train_ivf(self, nlist: int, iterations: int = 10, sample_size: int = 50_000, seed: int = 0) -> None:
+        """Spherical k-means on a sample of the vectors, then bucket every row."""
+        with self._lock:
+            live = np.flatnonzero(self.ids[: self.count] >= 0)
+            if len(live) < nlist:
+                return
+            rng = np.random.default_rng(seed)
+            sample = self.vectors[rng.choice(live, size=min(sample_size, len(live)), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = _normalize(centroids)
+            self.centroids = centroids
+
+            self.assignments = np.full(len(self.ids), -1, dtype=np.int32)
+            for start in range(0, self.count, SEARCH_BATCH_ROWS):
+                block = self.vectors[start : start + SEARCH_BATCH_ROWS]
+                self.assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            self.lists = [np.flatnonzero(self.assignments[: self.count] == c) for c in range(nlist)]
+
+    def _assign(self, row: int) -> None:
+        """Put a new or changed row into its nearest bucket without retraining."""
+        previous = self.assignments[row]
+        if previous >= 0:
+            self.lists[previous] = self.lists[previous][self.lists[previous] != row]
+        cluster = int(np.argmax(self.centroids @ self.vectors[row]))
+        self.assignments[row] = cluster
+        self.lists[cluster] = np.append(self.lists[cluster], row)
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.core import security
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
 from app.schemas.token import TokenPayload
 from app.models.user import User
 from app.services import user_service
@@ -16,11 +17,8 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login" 
 )
 
-# Dependency function to get the current authenticated user
-async def get_current_user(
-    db: AsyncSession = Depends(get_db),
-    token: str = Depends(reusable_oauth2)
-) -> User:
+# Decode and validate the bearer token once per request (FastAPI caches the result)
+async def get_token_payload(token: str = Depends(reusable_oauth2)) -> TokenPayload:
     try:
         # Decode the token payload
         payload = jwt.decode(
@@ -42,18 +40,33 @@ async def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return token_data
 
-    user = await db.get(User, token_data.sub)
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+# Dependency function to get the current authenticated user
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token_data: TokenPayload = Depends(get_token_payload)
+) -> Principal:
+    # Served from the principal cache when possible, saving a DB round trip
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        user = await db.get(User, token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     
-    return user
+    return principal
 
 # Helper dependency to require a specific role (Role-Based Access Control)
 def require_role(role: str):
     """Dependency that checks if the current user has the required role."""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    # The stored role decides, not the token's claim, so a demoted user's
+    # older token stops working
+    def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role != role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -62,6 +75,11 @@ def require_role(role: str):
         return current_user
     return role_checker
 
-# Public dependencies for easy use in endpoints
-current_user = Annotated[User, Depends(get_current_user)]
-current_admin = Annotated[User, Depends(require_role("admin"))]
\ No newline at end of file
+# Admin-only dependency, built once so FastAPI can de-duplicate it per request
+require_admin = require_role("admin")
+
+# Public dependencies for easy use in endpoints.
+# Use them as annotations (`user: current_user`); with the `= Depends(...)`
+# style, depend on get_current_user / require_admin directly.
+current_user = Annotated[Principal, Depends(get_current_user)]
+current_admin = Annotated[Principal, Depends(require_admin)]
\ No newline at end of file
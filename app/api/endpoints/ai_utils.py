@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any
 
 from app.ai_models.llm_client import llm_client
-from app.api.dependencies import current_user # Requires authentication
+from app.ai_models.scheduler import (
+    LLMError, LLMUnavailable, LLMTimeout, PRIORITY_ON_DEMAND, llm_request, request_context
+)
+from app.ai_models.summarizer import summarize_book
+from app.api.dependencies import get_current_user # Requires authentication
+from app.api.streaming import sse_response, stream_llm_tokens
 
 router = APIRouter()
 
@@ -10,10 +16,37 @@ router = APIRouter()
 async def generate_summary_for_content(
     title: str = Body(..., embed=True, description="Title of the content."),
     content: str = Body(..., embed=True, description="The full text content to summarize."),
-    user = Depends(current_user) # Requires any authenticated user
-) -> Dict[str, str]:
+    user = Depends(get_current_user) # Requires any authenticated user
+) -> Dict[str, Any]:
     """
     Generates a summary for a given book content using the Llama3 model.
+    Content above the chunking threshold is summarized map-reduce style;
+    `timings` reports the per-stage latency. Runs below interactive reads in
+    the LLM scheduler; fails with 503/504 instead of returning error text.
     """
-    summary = await llm_client.generate_book_summary(content, title)
-    return {"summary": summary}
\ No newline at end of file
+    try:
+        with llm_request(PRIORITY_ON_DEMAND, user.id):
+            summary, timings = await summarize_book(content, title)
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"summary": summary, "timings": timings}
+
+@router.post("/generate-summary/stream", response_class=StreamingResponse, summary="Stream a summary for arbitrary content as Server-Sent Events (Auth Required)")
+async def stream_summary_for_content(
+    request: Request,
+    title: str = Body(..., embed=True, description="Title of the content."),
+    content: str = Body(..., embed=True, description="The full text content to summarize."),
+    user = Depends(get_current_user) # Requires any authenticated user
+):
+    """
+    Streams the Llama3 summary token by token ('token' events), followed by a
+    'done' event carrying time-to-first-token and total generation time.
+    Disconnecting cancels the generation upstream.
+    """
+    timings = {}
+    tokens = llm_client.stream_book_summary(content, title, timings, request_context(PRIORITY_ON_DEMAND, user.id))
+    return sse_response(stream_llm_tokens(request, tokens, timings))
\ No newline at end of file
@@ -4,7 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.schemas.token import Token
-from app.schemas.user import UserLogin, UserCreate, User as UserSchema
+from app.schemas.user import UserLogin, UserCreate, UserAccessUpdate, User as UserSchema
+from app.api.dependencies import require_admin
 from app.services import user_service
 from app.core import security
 from app.core.config import settings
@@ -21,11 +22,22 @@ async def login_access_token(
     """
     user = await user_service.get_user_by_email(db, email=form_data.username)
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await security.password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except security.PasswordHashingOverloaded as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password",
         )
+
+    # Transparently upgrade hashes created with an older work factor
+    if new_hash:
+        await user_service.update_password_hash(db, user, new_hash)
     
     # Create JWT Token with user ID (subject) and role (for RBAC)
     access_token = security.create_access_token(
@@ -52,5 +64,25 @@ async def register_user(
     
     # We enforce 'user' role for self-registration to prevent immediate admin creation
     user_in.role = "user"
-    new_user = await user_service.create_user(db, user_in)
-    return new_user
\ No newline at end of file
+    try:
+        new_user = await user_service.create_user(db, user_in)
+    except security.PasswordHashingOverloaded as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    return new_user
+
+@router.patch("/users/{user_id}", response_model=UserSchema, summary="Change a user's role or active flag (Admin Only)")
+async def update_user_access(
+    user_id: int,
+    access_in: UserAccessUpdate,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Updates a user's role and/or activation status. Cached credentials for the
+    user are invalidated so the change applies to their next request.
+    Requires 'admin' role.
+    """
+    user = await user_service.update_user_access(db, user_id, access_in)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
\ No newline at end of file
@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from app.db.session import get_db
-from app.schemas.book import Book, BookCreate, BookUpdate
-from app.schemas.review import Review, ReviewCreate
-from app.services import book_service, review_service
-from app.api.dependencies import current_user, current_admin
+from app.db.session import get_db, get_read_db, get_read_sessionmaker, read_cache_scope
+from app.core.config import settings
+from app.core.pagination import InvalidCursor, cursor_after_id, next_cursor, decode_cursor, encode_cursor
+from app.core.response_cache import (
+    response_cache, CachedResponse, respond, content_etag, http_date, book_etag, if_match_version, book_tag, reviews_tag,
+    TAG_BOOK_LISTS,
+)
+from app.schemas.pagination import Page
+from app.schemas.book import (
+    Book, BookListItem, BookCreate, BookUpdate, BookImportReport, BookBulkUpdate, BookBulkDelete, BookBulkResult
+)
+from app.schemas.review import Review, ReviewCreate, ReviewBulkReport
+from app.services import book_service, review_service, rating_service, review_summary_service, import_service, search_service, export_service
+from app.services.embedding_service import embedding_service, SEARCH_MODES
+from app.ai_models.llm_client import llm_client
+from app.ai_models.scheduler import PRIORITY_INTERACTIVE, request_context, llm_request
+from app.api.streaming import sse_event, sse_response, stream_llm_tokens, export_response
+from app.api.dependencies import get_current_user, require_admin
 
 router = APIRouter()
 
@@ -16,59 +31,282 @@ async def create_new_book(
     content: str,
     db: AsyncSession = Depends(get_db),
     # Only allow administrators to add new books (RBAC applied)
-    admin_user = Depends(current_admin) 
+    admin_user = Depends(require_admin) 
 ):
     """
-    Adds a new book and asynchronously generates its summary using Llama3.
+    Adds a new book and queues generation of its summary using Llama3.
+    The book is returned immediately with summary_status='pending'.
     Requires 'admin' role.
     """
     return await book_service.create_book(db, book_in, content)
 
-@router.get("/", response_model=List[Book], summary="Retrieve all books")
+@router.get("/", response_model=Page[BookListItem], summary="Retrieve all books")
 async def read_books(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's `next_cursor`."),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    genre: Optional[str] = Query(None, description="Only return books of this genre."),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. `id,title,author,genre`; `id` is always included. Default: all."
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
+):
+    """
+    Retrieves a page of books in the catalog, ordered by id.
+    Follow `next_cursor` to walk the whole catalog.
+    Listing pages should pass `fields` so unused columns (notably the
+    summary) are neither read nor sent.
+    Supports `If-None-Match` (304 Not Modified).
+    """
+    try:
+        after_id = cursor_after_id(cursor, genre=genre)
+        selected = book_service.parse_book_fields(fields)
+    except ValueError as e: # Includes InvalidCursor
+        raise HTTPException(status_code=400, detail=str(e))
+
+    scope = read_cache_scope(request, db)
+    key = f"{scope}|books:{cursor}:{limit}:{genre}:{','.join(selected)}"
+    entry = response_cache.get(key) if scope else None
+    if entry is None:
+        # Fetch one extra row to know whether another page exists
+        rows = await book_service.get_book_rows(db, selected, after_id=after_id, limit=limit + 1, genre=genre)
+        cursor_out = next_cursor(rows, limit, genre=genre)
+        body = orjson.dumps({"items": book_service.book_rows_to_dicts(rows, selected), "next_cursor": cursor_out})
+        entry = CachedResponse(body=body, etag=content_etag(body))
+        if scope:
+            response_cache.set(key, entry, tags=[TAG_BOOK_LISTS])
+    return respond(request, entry)
+
+@router.post("/import", response_model=BookImportReport, summary="Bulk import books from NDJSON or CSV (Admin Only)")
+async def import_books(
+    request: Request,
+    format: str = Query("ndjson", description="'ndjson' (one JSON object per line) or 'csv' (header row required)."),
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Streams the raw request body and inserts books in large batches.
+    Each row is validated like `POST /books`; an optional `content` field
+    queues background summary generation. Invalid rows are skipped and
+    reported with their line number.
+    Requires 'admin' role.
+    """
+    if format not in import_service.IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format '{format}'.")
+    return await import_service.import_books(db, request.stream(), format)
+
+@router.post("/stats/rebuild", summary="Recompute rating aggregates from reviews (Admin Only)")
+async def rebuild_book_rating_stats(
+    book_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
-    user = Depends(current_user) # Requires any authenticated user
+    admin_user = Depends(require_admin) # Requires 'admin' role
+) -> Dict[str, int]:
+    """
+    Backfills or repairs the materialized rating sum, count and histogram
+    for one book (`book_id`) or for the whole catalog.
+    Requires 'admin' role.
+    """
+    updated = await rating_service.rebuild_rating_stats(db, book_id)
+    return {"books_updated": updated}
+
+def _export(kind: str, format: str, gzip: bool, after_id: Optional[int], sessions) -> StreamingResponse:
+    if format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'.")
+    chunks = export_service.export_rows(sessions, kind, format, after_id=after_id, compress=gzip)
+    return export_response(chunks, f"{kind}.{format}", export_service.EXPORT_MEDIA_TYPES[format], compressed=gzip)
+
+# Declared before /{book_id} so "export" is not parsed as a book id
+@router.get("/export", summary="Stream the whole catalog as NDJSON or CSV (Admin Only)")
+async def export_books(
+    format: str = Query("ndjson", description="'ndjson' (one JSON object per line) or 'csv' (with a header row)."),
+    gzip: bool = Query(False, description="Send a gzip file (books.ndjson.gz)."),
+    after_id: Optional[int] = Query(None, description="Resume token: the `id` of the last complete row already received."),
+    sessions = Depends(get_read_sessionmaker),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Streams every book in id order from a server-side cursor; memory use
+    does not grow with the catalog. An interrupted export continues with
+    `after_id` (resumed CSV has no header row).
+    Requires 'admin' role.
+    """
+    return _export("books", format, gzip, after_id, sessions)
+
+@router.get("/export/reviews", summary="Stream all reviews with their book as NDJSON or CSV (Admin Only)")
+async def export_reviews(
+    format: str = Query("ndjson", description="'ndjson' (one JSON object per line) or 'csv' (with a header row)."),
+    gzip: bool = Query(False, description="Send a gzip file (reviews.ndjson.gz)."),
+    after_id: Optional[int] = Query(None, description="Resume token: the review `id` of the last complete row already received."),
+    sessions = Depends(get_read_sessionmaker),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Streams every review in id order, joined to its book's title and
+    author, from a server-side cursor. Resume with `after_id` like the
+    catalog export.
+    Requires 'admin' role.
+    """
+    return _export("reviews", format, gzip, after_id, sessions)
+
+# Declared before /{book_id} so "summaries" is not parsed as a book id
+@router.get("/summaries", summary="Summaries and rating stats for many books at once")
+async def read_book_summaries(
+    ids: List[int] = Query(..., description="Book ids (repeat the parameter: ?ids=1&ids=2)."),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
+) -> Dict[str, Any]:
+    """
+    Batch variant of `GET /books/{id}/summary` for listing pages: one database
+    round trip for all ids and no LLM calls (stored review summaries only).
+    Items follow the order of `ids`; unknown ids are listed under `missing`.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > settings.MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_PAGE_SIZE} ids per request.")
+    stats = await book_service.get_summaries_and_ratings(db, unique_ids)
+    return {
+        "items": [stats[book_id] for book_id in unique_ids if book_id in stats],
+        "missing": [book_id for book_id in unique_ids if book_id not in stats],
+    }
+
+# Declared before /{book_id} so "semantic-search" is not parsed as a book id
+@router.get("/semantic-search", response_model=List[Book], summary="Search books by meaning using embeddings")
+async def semantic_search_books(
+    q: str = Query(..., min_length=1, max_length=500, description="Free-text description of what to find."),
+    k: int = Query(10, ge=1, le=100),
+    mode: str = Query("auto", description="'exact', 'approx' (IVF index) or 'auto'."),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
 ):
     """
-    Retrieves a list of all books in the catalog.
+    Embeds the query with Ollama and returns the k books whose summaries are
+    closest in meaning.
     """
-    return await book_service.get_all_books(db, limit=50)
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode '{mode}'.")
+    with llm_request(PRIORITY_INTERACTIVE, user.id):
+        hits = await embedding_service.semantic_search(q, k, mode)
+    if hits is None:
+        raise HTTPException(status_code=503, detail="Embedding service unavailable")
+    return await book_service.get_books_by_ids(db, [book_id for book_id, _ in hits])
+
+# Declared before /{book_id} so "search" is not parsed as a book id
+@router.get("/search", response_model=Page[Book], summary="Full-text search over the catalog")
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (title, author, genre, summary)."),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's `next_cursor`."),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
+):
+    """
+    Returns books matching all search terms, best matches first.
+    Backed by a GIN-indexed tsvector on PostgreSQL (FTS5 on SQLite).
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be blank.")
+    try:
+        data = decode_cursor(cursor)
+        after = None
+        if data is not None:
+            if data.get("q") != q or not isinstance(data.get("id"), int) or not isinstance(data.get("score"), (int, float)):
+                raise InvalidCursor("Cursor does not match the current search.")
+            after = (float(data["score"]), data["id"])
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    hits = await search_service.search_books(db, q, limit=limit + 1, after=after)
+    next_page = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_book, last_score = hits[-1]
+        next_page = encode_cursor({"id": last_book.id, "score": last_score, "q": q})
+    return {"items": [book for book, _ in hits], "next_cursor": next_page}
 
 @router.get("/{book_id}", response_model=Book, summary="Retrieve a specific book")
 async def read_book(
     book_id: int, 
-    db: AsyncSession = Depends(get_db),
-    user = Depends(current_user) # Requires any authenticated user
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
 ):
     """
     Retrieves a book by its ID.
+    The ETag is the book's version, so `If-None-Match` answers 304 from the
+    response cache without loading the book.
     """
-    book = await book_service.get_book(db, book_id)
-    if not book:
+    scope = read_cache_scope(request, db)
+    key = f"{scope}|{book_tag(book_id)}"
+    entry = response_cache.get(key) if scope else None
+    if entry is None:
+        book = await book_service.get_book(db, book_id)
+        if not book:
+            raise HTTPException(status_code=404, detail="Book not found")
+        entry = CachedResponse(
+            body=Book.model_validate(book).model_dump_json().encode(),
+            etag=book_etag(book.id, book.version),
+            last_modified=http_date(book.updated_at),
+        )
+        if scope:
+            response_cache.set(key, entry, tags=[book_tag(book_id)])
+    return respond(request, entry)
+
+@router.get("/{book_id}/similar", response_model=List[Book], summary="Retrieve books similar to a given book")
+async def read_similar_books(
+    book_id: int,
+    k: int = Query(10, ge=1, le=100),
+    mode: str = Query("auto", description="'exact', 'approx' (IVF index) or 'auto'."),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
+):
+    """
+    Returns the k books whose summary embeddings are nearest to this book's.
+    Books get an embedding once their summary has been generated.
+    """
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode '{mode}'.")
+    if not await book_service.get_book(db, book_id):
         raise HTTPException(status_code=404, detail="Book not found")
-    return book
+    hits = await embedding_service.similar_books(book_id, k, mode)
+    if hits is None:
+        raise HTTPException(status_code=409, detail="Book has no embedding yet; its summary is still pending.")
+    return await book_service.get_books_by_ids(db, [hit_id for hit_id, _ in hits])
 
 @router.put("/{book_id}", response_model=Book, summary="Update a book (Admin Only)")
 async def update_book_info(
     book_id: int, 
     book_in: BookUpdate,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    admin_user = Depends(current_admin) # Requires 'admin' role
+    admin_user = Depends(require_admin) # Requires 'admin' role
 ):
     """
     Updates the information for an existing book.
-    Requires 'admin' role.
+    Send the book's ETag as `If-Match` to update only if nobody changed it
+    since it was read (412 otherwise). Requires 'admin' role.
     """
-    book = await book_service.update_book(db, book_id, book_in)
+    try:
+        expected_version = if_match_version(request, book_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=412, detail=str(exc))
+    try:
+        book = await book_service.update_book(db, book_id, book_in, expected_version)
+    except book_service.VersionConflict as exc:
+        raise HTTPException(
+            status_code=412, detail=str(exc), headers={"ETag": book_etag(book_id, exc.current_version)}
+        )
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+    response.headers["ETag"] = book_etag(book.id, book.version)
     return book
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a book (Admin Only)")
 async def delete_existing_book(
     book_id: int,
     db: AsyncSession = Depends(get_db),
-    admin_user = Depends(current_admin) # Requires 'admin' role
+    admin_user = Depends(require_admin) # Requires 'admin' role
 ):
     """
     Deletes a book and its associated reviews.
@@ -79,46 +317,168 @@ async def delete_existing_book(
         raise HTTPException(status_code=404, detail="Book not found")
     return 
 
+@router.post("/bulk-update", response_model=BookBulkResult, summary="Update many books at once (Admin Only)")
+async def bulk_update_books(
+    body: BookBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Applies the same `changes` to every book in `ids` with one UPDATE, in a
+    single transaction. Ids that match no book are reported in `missing`.
+    Requires 'admin' role.
+    """
+    if len(body.ids) > settings.BOOK_BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BOOK_BULK_MAX_IDS} ids per request.")
+    if not body.changes.model_fields_set:
+        raise HTTPException(status_code=400, detail="No changes given.")
+    updated = await book_service.bulk_update_books(db, body.ids, body.changes)
+    return BookBulkResult(affected=updated, missing=sorted(set(body.ids) - set(updated)))
+
+@router.post("/bulk-delete", response_model=BookBulkResult, summary="Delete many books at once (Admin Only)")
+async def bulk_delete_books(
+    body: BookBulkDelete,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Deletes every book in `ids`, with their reviews, in one DELETE and a
+    single transaction. Ids that match no book are reported in `missing`.
+    Requires 'admin' role.
+    """
+    if len(body.ids) > settings.BOOK_BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BOOK_BULK_MAX_IDS} ids per request.")
+    deleted = await book_service.bulk_delete_books(db, body.ids)
+    return BookBulkResult(affected=deleted, missing=sorted(set(body.ids) - set(deleted)))
+
 
 @router.post("/{book_id}/reviews", response_model=Review, status_code=status.HTTP_201_CREATED, summary="Add a review for a book")
 async def add_review_to_book(
     book_id: int,
     review_in: ReviewCreate,
     db: AsyncSession = Depends(get_db),
-    current_user = Depends(current_user) # Requires any authenticated user
+    current_user = Depends(get_current_user) # Requires any authenticated user
 ):
     """
     Adds a new review to a specific book.
+    Under load, concurrent reviews are committed together in micro-batches.
     """
+    if settings.REVIEW_WRITE_COALESCING:
+        try:
+            return await review_service.review_write_buffer.submit(book_id, current_user.id, review_in)
+        except review_service.BookNotFound:
+            raise HTTPException(status_code=404, detail="Book not found")
+
     # Verify book exists
     if not await book_service.get_book(db, book_id):
         raise HTTPException(status_code=404, detail="Book not found")
     
     return await review_service.create_review(db, book_id, current_user.id, review_in)
 
-@router.get("/{book_id}/reviews", response_model=List[Review], summary="Retrieve all reviews for a book")
+@router.post("/reviews/bulk", response_model=ReviewBulkReport, summary="Add many reviews in one call (Admin Only)")
+async def add_reviews_bulk(
+    items: List[Dict[str, Any]] = Body(..., description="Reviews with `book_id`, `rating`, `review_text` and optional `user_id`."),
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin) # Requires 'admin' role
+):
+    """
+    Ingests a batch of reviews (e.g. from a partner feed) in one transaction:
+    one query checks every book, multi-row INSERTs add the reviews, and each
+    touched book's rating aggregates are updated once. Invalid items and
+    unknown books are reported by index and skipped.
+    Requires 'admin' role.
+    """
+    if len(items) > settings.REVIEW_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.REVIEW_BULK_MAX_ITEMS} reviews per request.")
+    return await review_service.create_reviews_bulk(db, admin_user.id, items)
+
+@router.get("/{book_id}/reviews", response_model=Page[Review], summary="Retrieve all reviews for a book")
 async def read_reviews_for_book(
     book_id: int,
-    db: AsyncSession = Depends(get_db),
-    user = Depends(current_user) # Requires any authenticated user
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's `next_cursor`."),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
 ):
     """
-    Retrieves all reviews associated with a specific book ID.
+    Retrieves a page of reviews associated with a specific book ID, ordered by id.
+    Follow `next_cursor` to read every review.
+    Supports `If-None-Match` (304 Not Modified).
     """
-    return await review_service.get_reviews_by_book_id(db, book_id)
+    try:
+        after_id = cursor_after_id(cursor, book_id=book_id)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    scope = read_cache_scope(request, db)
+    key = f"{scope}|reviews:{book_id}:{cursor}:{limit}"
+    entry = response_cache.get(key) if scope else None
+    if entry is None:
+        reviews = await review_service.get_reviews_by_book_id(db, book_id, after_id=after_id, limit=limit + 1)
+        page = Page[Review].model_validate(
+            {"items": reviews, "next_cursor": next_cursor(reviews, limit, book_id=book_id)}, from_attributes=True
+        )
+        body = page.model_dump_json().encode()
+        entry = CachedResponse(body=body, etag=content_etag(body))
+        if scope:
+            response_cache.set(key, entry, tags=[reviews_tag(book_id)])
+    return respond(request, entry)
 
 
 @router.get("/{book_id}/summary", summary="Get a summary and aggregated rating for a book")
 async def get_book_summary_and_stats(
     book_id: int,
-    db: AsyncSession = Depends(get_db),
-    user = Depends(current_user) # Requires any authenticated user
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
 ) -> Dict[str, Any]:
     """
     Returns the Llama3-generated book summary, the aggregated user rating, 
-    and a Llama3-generated summary of all user reviews.
+    and the stored Llama3-generated summary of user reviews. The summary is
+    regenerated in the background; `review_summary_status` reports whether it
+    is 'fresh', 'stale', 'pending' or 'none'.
     """
     stats = await book_service.get_summary_and_rating(db, book_id)
     if stats is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return stats
\ No newline at end of file
+    return stats
+
+@router.get("/{book_id}/summary/stream", response_class=StreamingResponse, summary="Stream the summary and rating for a book as Server-Sent Events")
+async def stream_book_summary_and_stats(
+    book_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user) # Requires any authenticated user
+):
+    """
+    Sends the book summary and aggregated rating as a 'stats' event right away.
+    If the stored review summary is stale or missing, a fresh one is streamed
+    token by token ('token' events) and stored once complete; a 'done' event
+    with time-to-first-token metrics ends the stream.
+    """
+    stats = await book_service.get_summary_and_rating(db, book_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Everything the stream needs from the database is loaded before responding
+    watermark, review_texts = None, ""
+    if stats["review_summary_status"] in (review_summary_service.FRESHNESS_STALE, review_summary_service.FRESHNESS_PENDING):
+        watermark, review_texts = await review_summary_service.load_recent_reviews(db, book_id)
+
+    async def events():
+        yield sse_event("stats", stats)
+        if not review_texts:
+            yield sse_event("done", {"ttft_ms": 0.0, "total_ms": 0.0, "cached": True})
+            return
+
+        timings, collected = {}, []
+        # A reader is waiting on this one: it goes ahead of background generations
+        tokens = llm_client.stream_review_summary(review_texts, timings, request_context(PRIORITY_INTERACTIVE, user.id))
+        async for frame in stream_llm_tokens(request, tokens, timings, collected):
+            yield frame
+            if frame.startswith("event: done"):
+                await review_summary_service.review_summary_refresher.store(
+                    book_id, watermark, "".join(collected).strip()
+                )
+
+    return sse_response(events())
\ No newline at end of file
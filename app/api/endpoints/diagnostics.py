@@ -0,0 +1,52 @@
+from typing import Any, Callable, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.ai_models.llm_client import llm_client
+from app.api.dependencies import require_admin
+from app.core import security
+from app.core.response_cache import response_cache
+from app.db.session import db_router
+from app.services import book_service
+from app.services.review_service import review_write_buffer
+
+# Every route here requires the 'admin' role
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _llm_cache_stats() -> Dict[str, Any]:
+    if llm_client.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_client.cache.stats()}
+
+# Internal counters of each component, by name; Prometheus covers latencies and pool gauges at /metrics
+COMPONENTS: Dict[str, Callable[[], Any]] = {
+    "llm-cache": _llm_cache_stats,
+    "llm-scheduler": llm_client.scheduler.stats,
+    "llm-stream": llm_client.stream_metrics.snapshot,
+    "singleflight": lambda: {
+        flight.name: flight.stats() for flight in (llm_client.inflight, llm_client.streams, book_service.summary_inflight)
+    },
+    "response-cache": response_cache.stats,
+    "db-pools": db_router.pool_stats,
+    "review-writes": review_write_buffer.stats,
+    "password-hashing": security.password_hasher.stats,
+}
+
+@router.get("", summary="Internal counters of every component (Admin Only)")
+async def get_diagnostics() -> Dict[str, Any]:
+    """
+    Returns cache, scheduler, streaming, coalescing, connection pool, review
+    write and password hashing counters, keyed by component.
+    """
+    return {name: stats() for name, stats in COMPONENTS.items()}
+
+@router.get("/{component}", summary="Internal counters of one component (Admin Only)")
+async def get_component_diagnostics(component: str) -> Any:
+    """
+    Returns the counters of one component; see the full listing for the names.
+    """
+    stats = COMPONENTS.get(component)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"Unknown component '{component}'.")
+    return stats()
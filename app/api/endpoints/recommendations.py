@@ -1,30 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.db.session import get_db
-from app.schemas.book import Book
+from app.db.session import get_read_db
+from app.schemas.book import BookListItem
 from app.services import book_service
-from app.api.dependencies import current_user
+from app.services.recommendation_engine import recommender
+from app.api.dependencies import get_current_user
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[Book], summary="Get book recommendations based on user preferences")
+@router.get("/", response_model=List[BookListItem], summary="Get book recommendations based on user preferences")
 async def get_book_recommendations(
-    current_user = Depends(current_user), # Requires any authenticated user
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. `id,title,author,genre`; `id` is always included. Default: all."
+    ),
+    current_user = Depends(get_current_user), # Requires any authenticated user
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Provides book recommendations based on user preferences (for prototype, 
-    this simply returns the top 3 highly rated books).
+    Provides personalized recommendations from item-item collaborative
+    filtering over user reviews: books similar to the ones the user rated
+    highly. Users without reviews get the most popular books instead.
     """    
-    all_books = await book_service.get_all_books(db, limit=20) 
-    
-    preferred_genre = "Fantasy" 
-    recommendations = [book for book in all_books if book.genre == preferred_genre][:3]
-
-    if not recommendations:
-        return all_books[:3] 
-        
-    return recommendations
\ No newline at end of file
+    try:
+        selected = book_service.parse_book_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    book_ids = await recommender.recommend(db, current_user.id, limit)
+    rows = await book_service.get_book_rows_by_ids(db, selected, book_ids)
+    return Response(orjson.dumps(book_service.book_rows_to_dicts(rows, selected)), media_type="application/json")
\ No newline at end of file
@@ -0,0 +1,58 @@
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.ai_models.llm_client import LLMError
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an iterator of SSE frames in a response that proxies will not buffer."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def export_response(chunks: AsyncIterator[bytes], filename: str, media_type: str, compressed: bool) -> StreamingResponse:
+    """Stream a file download chunk by chunk; gzip output is served as a .gz file, not Content-Encoding."""
+    if compressed:
+        filename, media_type = f"{filename}.gz", "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
+
+async def stream_llm_tokens(
+    request: Request,
+    tokens: AsyncIterator[str],
+    timings: Dict[str, float],
+    collected: Optional[list] = None,
+) -> AsyncIterator[str]:
+    """
+    Relay LLM tokens as 'token' events, then a 'done' event with timing metrics.
+    Stops (and closes the upstream generation) as soon as the client disconnects.
+    Failures are reported as an 'error' event instead of breaking the stream.
+    """
+    try:
+        async with aclosing(tokens):
+            async for token in tokens:
+                if await request.is_disconnected():
+                    return
+                if collected is not None:
+                    collected.append(token)
+                yield sse_event("token", {"text": token})
+    except LLMError as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    yield sse_event("done", {
+        "ttft_ms": round(timings.get("ttft_ms", 0.0), 2),
+        "total_ms": round(timings.get("total_ms", 0.0), 2),
+        "cached": bool(timings.get("cached", False)),
+    })
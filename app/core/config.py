@@ -21,14 +21,109 @@ class Settings(BaseSettings):
         f"{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
     )
 
+    # Comma-separated read replicas (same driver); empty sends every read to the primary
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0 # Reads stay on the primary this long after a client's write
+
+    # Connection pools (per engine; ignored for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256 # asyncpg prepared statements per connection; 0 behind PgBouncer
+    DB_ECHO: bool = False # Log every SQL statement
+
     SECRET_KEY: str = "YOUR_SECRET_KEY_MUST_BE_COMPLEX" # CHANGE THIS IN PRODUCTION
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 # 1 day
 
+    # Password hashing (bcrypt runs in a bounded thread pool, off the event loop)
+    BCRYPT_ROUNDS: int = 12 # Work factor; existing hashes are upgraded on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64 # Requests beyond workers + queue get a 503
+
+    # Authenticated-principal cache (removes the per-request user lookup)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0 # Max delay before a deactivation is seen by other workers; 0 disables
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+
     # Using Ollama as the local Llama3 server URL
     LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "http://ollama:11434")
     LLM_MODEL_NAME: str = os.getenv("LLM_MODEL_NAME", "llama3")
 
+    # LLM admission control (see app/ai_models/scheduler.py)
+    LLM_MAX_CONCURRENCY: int = 4 # Generations sent to Ollama at the same time
+    LLM_MAX_QUEUE: int = 256 # Waiting calls beyond this are rejected
+    LLM_TIMEOUT_INTERACTIVE_SECONDS: float = 30.0 # Per-call deadline (queueing + generation + retries)
+    LLM_TIMEOUT_ON_DEMAND_SECONDS: float = 120.0
+    LLM_TIMEOUT_BACKGROUND_SECONDS: float = 300.0
+    LLM_RETRY_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_SECONDS: float = 0.5 # Full-jitter exponential backoff
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5 # Consecutive failures that open the circuit
+    LLM_BREAKER_RESET_SECONDS: float = 30.0 # Open time before a probe call is allowed
+
+    # LLM result cache (in-memory LRU + optional persistent SQLite tier)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 60 * 60 * 24 # 0 disables expiry
+    LLM_CACHE_DB_PATH: str = os.getenv("LLM_CACHE_DB_PATH", "") # Empty disables the on-disk tier
+    LLM_CACHE_MAX_DISK_ENTRIES: int = 100_000
+
+    # Background summary generation
+    SUMMARY_WORKER_CONCURRENCY: int = 2 # Max summaries generated at the same time
+    SUMMARY_JOB_MAX_ATTEMPTS: int = 3
+    SUMMARY_JOB_RETRY_BACKOFF_SECONDS: float = 5.0 # Doubled after every failed attempt
+    SUMMARY_JOB_POLL_SECONDS: float = 5.0 # Picks up jobs stored by other processes (e.g. the import script)
+    SUMMARY_JOB_LEASE_SECONDS: float = 30 * 60.0 # A running job claimed longer ago than this is re-queued; keep above the longest generation
+
+    # Map-reduce summarization of long book content (sizes in characters)
+    SUMMARY_CHUNK_THRESHOLD: int = 12_000 # Content longer than this is summarized in chunks
+    SUMMARY_CHUNK_SIZE: int = 8_000
+    SUMMARY_CHUNK_OVERLAP: int = 400
+    SUMMARY_MAP_CONCURRENCY: int = 4 # Chunk summaries generated at the same time
+
+    # Bulk catalog import
+    IMPORT_BATCH_SIZE: int = 1000 # Rows per INSERT/COPY batch (and per commit)
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
+
+    # Streaming catalog/review export
+    EXPORT_FETCH_SIZE: int = 2000 # Rows per server-side cursor fetch (and per response chunk)
+    EXPORT_GZIP_LEVEL: int = 6
+
+    # Bulk book updates/deletes
+    BOOK_BULK_MAX_IDS: int = 10_000 # Per POST /books/bulk-update or /books/bulk-delete call
+
+    # Review writes
+    REVIEW_BULK_MAX_ITEMS: int = 10_000 # Per POST /books/reviews/bulk call
+    REVIEW_WRITE_COALESCING: bool = True # Group concurrent single-review POSTs into one commit
+    REVIEW_WRITE_MAX_BATCH: int = 500
+
+    # Stored review-sentiment summaries: regenerate after N new reviews or T seconds of staleness
+    REVIEW_SUMMARY_MIN_NEW_REVIEWS: int = 5
+    REVIEW_SUMMARY_MAX_STALENESS_SECONDS: float = 300.0
+    REVIEW_SUMMARY_DEBOUNCE_SECONDS: float = 2.0 # Lets a burst of reviews share one regeneration
+
+    # Item-item collaborative filtering recommender
+    RECOMMENDER_NEIGHBORS: int = 50 # Top-K similar books kept per book
+    RECOMMENDER_REFRESH_SECONDS: float = 30.0 # Incremental fold-in of new reviews
+    RECOMMENDER_FULL_REBUILD_SECONDS: float = 60 * 60.0
+    RECOMMENDER_POPULAR_SIZE: int = 200 # Cold-start fallback list
+
+    # Embeddings and semantic search
+    LLM_EMBEDDING_MODEL: str = os.getenv("LLM_EMBEDDING_MODEL", "nomic-embed-text")
+    EMBEDDING_DIM: int = 768 # Must match the embedding model
+    EMBEDDING_INDEX_PATH: str = os.getenv("EMBEDDING_INDEX_PATH", "data/embeddings") # Empty keeps vectors in memory only
+    EMBEDDING_ANN_MIN_VECTORS: int = 50_000 # Build the approximate (IVF) index above this many books
+    EMBEDDING_ANN_NPROBE: int = 8
+
+    # Read-through response cache for book GET endpoints
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0 # Bounds staleness across workers; 0 disables
+
+    # Keyset pagination
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+
     model_config = SettingsConfigDict(env_file=".env")
 
 settings = Settings()
\ No newline at end of file
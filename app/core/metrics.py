@@ -0,0 +1,116 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY
+from starlette.responses import Response
+from starlette.routing import replace_params
+
+# Buckets tuned per layer: HTTP and DB are mostly sub-second, LLM calls take seconds
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+PROMPT_BUCKETS = (256, 1024, 4096, 8192, 16_384, 32_768, 65_536, 131_072)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ["method", "route", "status"], buckets=HTTP_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time.",
+    ["engine", "operation"], buckets=DB_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "SQL statements that raised.", ["engine", "operation"])
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Ollama call latency (cache hits excluded).",
+    ["operation", "outcome"], buckets=LLM_BUCKETS,
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time to the first streamed token.",
+    ["operation"], buckets=LLM_BUCKETS,
+)
+LLM_PROMPT_CHARS = Histogram(
+    "llm_prompt_chars", "Prompt size in characters.", ["operation"], buckets=PROMPT_BUCKETS,
+)
+SUMMARY_STAGE_SECONDS = Histogram(
+    "summary_stage_duration_seconds", "Chunked summary stages: map, each reduce level, and the whole run.",
+    ["stage"], buckets=LLM_BUCKETS,
+)
+LLM_CACHE_HITS = Counter("llm_cache_hits_total", "Completions served from the LLM cache.", ["operation"])
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls.", ["operation"])
+SINGLEFLIGHT_CALLS = Counter("singleflight_calls_total", "Calls that did the work themselves.", ["name"])
+SINGLEFLIGHT_COALESCED = Counter("singleflight_coalesced_total", "Calls that joined an identical in-flight call.", ["name"])
+
+
+class PoolCollector:
+    """Exposes connection-pool gauges at scrape time (nothing runs per checkout)."""
+    def __init__(self, stats_source):
+        self.stats_source = stats_source
+
+    def collect(self):
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out.", labels=["engine"])
+        saturation = GaugeMetricFamily("db_pool_saturation", "Checked-out connections / pool capacity.", labels=["engine"])
+        for stats in self.stats_source():
+            checked_out.add_metric([stats["role"]], stats["checked_out"])
+            if "saturation" in stats:
+                saturation.add_metric([stats["role"]], stats["saturation"])
+        yield checked_out
+        yield saturation
+
+def register_pool_collector(stats_source) -> None:
+    REGISTRY.register(PoolCollector(stats_source))
+
+
+def route_label(scope) -> str:
+    """
+    Full template of the matched route, e.g. /api/v1/books/{book_id}.
+    Routes of an included router may only know their router-local template
+    (/{book_id}); the mount prefix is then recovered from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    try:
+        local, _ = replace_params(template, route.param_convertors, dict(scope.get("path_params", {})))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return template
+    return path[: len(path) - len(local)] + template if path.endswith(local) else template
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. Requests are labelled
+    with the matched route template (not the raw path) to keep label
+    cardinality bounded; unmatched paths share one label.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_label(scope), str(status[0])).observe(
+                time.perf_counter() - started
+            )
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
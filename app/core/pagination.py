@@ -0,0 +1,51 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+# Opaque keyset cursors: URL-safe base64 of a small JSON object holding the
+# last key of the previous page. Clients must treat them as opaque strings.
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded."""
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor("Malformed pagination cursor.") from e
+    if not isinstance(data, dict):
+        raise InvalidCursor("Malformed pagination cursor.")
+    return data
+
+def cursor_after_id(cursor: Optional[str], **scope: Any) -> Optional[int]:
+    """
+    Decode a cursor into the last-seen id. `scope` holds the filters the cursor
+    was issued for (e.g. genre); reusing it with different filters is rejected.
+    """
+    data = decode_cursor(cursor)
+    if data is None:
+        return None
+    after_id = data.get("id")
+    if not isinstance(after_id, int):
+        raise InvalidCursor("Malformed pagination cursor.")
+    for key, value in scope.items():
+        if data.get(key) != value:
+            raise InvalidCursor("Cursor does not match the current filters.")
+    return after_id
+
+def next_cursor(rows: list, limit: int, **scope: Any) -> Optional[str]:
+    """
+    `rows` is the result of a query fetched with limit + 1. Trims the extra
+    row in place and returns the cursor for the next page, or None at the end.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor({"id": rows[-1].id, **scope})
@@ -0,0 +1,164 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: Optional[str] = None
+    expires_at: float = 0.0
+
+
+def content_etag(body: bytes) -> str:
+    """Weak ETag derived from the serialized body (identical across workers)."""
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None: # SQLite drops the timezone
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on either side
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
+
+def book_etag(book_id: int, version: int) -> str:
+    """Weak ETag of one book, derived from its version column."""
+    return f'W/"{book_id}-{version}"'
+
+def if_match_version(request: Request, book_id: int) -> Optional[int]:
+    """
+    Book version named by an If-Match header (a `book_etag`), or None if
+    the header is absent or "*". Raises ValueError for any other value.
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    candidate = header.strip()
+    candidate = candidate[2:] if candidate.startswith("W/") else candidate
+    prefix = f'"{book_id}-'
+    if not (candidate.startswith(prefix) and candidate.endswith('"')):
+        raise ValueError("If-Match does not name a version of this book")
+    return int(candidate[len(prefix):-1])
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized GET responses.
+
+    Entries carry tags (e.g. "book:42", "books") so writes can invalidate
+    exactly the responses they affect. Other workers are not notified, so
+    every entry also expires after `ttl_seconds`, bounding cross-process
+    staleness.
+    """
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Iterable[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, entry: CachedResponse, tags: Iterable[str]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._drop(key)
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._entries[key] = entry
+        self._key_tags[key] = tuple(tags)
+        for tag in self._key_tags[key]:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every cached response carrying any of the tags."""
+        for tag in tags:
+            for key in list(self._tags.pop(tag, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._key_tags.clear()
+
+    def _drop(self, key: str) -> None:
+        if self._entries.pop(key, None) is None:
+            return
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def not_modified(entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag}
+    if entry.last_modified:
+        headers["Last-Modified"] = entry.last_modified
+    return Response(status_code=304, headers=headers)
+
+def json_response(entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if entry.last_modified:
+        headers["Last-Modified"] = entry.last_modified
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def respond(request: Request, entry: CachedResponse) -> Response:
+    """304 if the client already has this representation, else the cached JSON."""
+    return not_modified(entry) if etag_matches(request, entry.etag) else json_response(entry)
+
+
+# Cache tags used by the book endpoints
+TAG_BOOK_LISTS = "books"
+
+def book_tag(book_id: int) -> str:
+    return f"book:{book_id}"
+
+def reviews_tag(book_id: int) -> str:
+    return f"reviews:{book_id}"
+
+
+# Instantiate the cache once
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Callable, Dict, Union, Optional, Tuple
 
 from passlib.context import CryptContext
 from jose import jwt, JWTError
@@ -8,7 +10,8 @@ from app.core.config import settings
 
 # --- Password Hashing ---
 # Configuration for hashing passwords (using bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different work factor count as outdated and are upgraded on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Check if the provided password matches the hashed password."""
@@ -18,6 +21,66 @@ def get_password_hash(password: str) -> str:
     """Hash a plaintext password."""
     return pwd_context.hash(password)
 
+
+class PasswordHashingOverloaded(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, size-limited thread pool so a login burst
+    cannot block the event loop. bcrypt releases the GIL while hashing, so
+    threads give real parallelism here.
+    """
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0 # Submitted and not yet finished (running + queued)
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, func: Callable, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHashingOverloaded("Password hashing queue is full.")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password. The second value is a replacement hash when the
+        stored one uses an outdated scheme or work factor, else None.
+        """
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Instantiate the hasher once
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
 def create_access_token(
     subject: Union[str, Any],
     role: str,
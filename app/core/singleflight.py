@@ -0,0 +1,154 @@
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+from app.core.metrics import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_COALESCED
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """Set on the shared future when the caller doing the work was cancelled."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the
+    leader) runs the work, later callers await its result.
+
+    The work always runs in the leader's own task, with the leader's
+    resources (e.g. its database session). Followers wait behind
+    `asyncio.shield`, so cancelling a follower never affects anyone else.
+    If the leader itself is cancelled, one of the waiting followers takes
+    over and runs the work again; errors are shared like results.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.handoffs = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                self.handoffs += 1 # Retry; the first follower to get here becomes the leader
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.calls += 1
+        SINGLEFLIGHT_CALLS.labels(self.name).inc()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._settle(key, future, _LeaderCancelled())
+            raise
+        except Exception as e:
+            self._settle(key, future, e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    def _settle(self, key: Hashable, future: asyncio.Future, error: BaseException = None, result: Any = None) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+            future.exception() # Mark retrieved: with no followers nobody else will read it
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "handoffs": self.handoffs, "in_flight": len(self._inflight)}
+
+
+class _Broadcast:
+    """Items of one shared stream so far, plus a signal for subscribers waiting on more."""
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        await self._changed.wait()
+
+
+class StreamFlight:
+    """
+    Coalesces concurrent async iterators with the same key: the first
+    subscriber starts the upstream iterator in a task of its own, and every
+    subscriber receives all of its items, those produced before it joined
+    first. Errors are shared like items.
+
+    Subscribers may leave at any time; the upstream iterator is closed once
+    the last one has gone, and the next subscriber starts a new one.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _Broadcast] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def subscribe(self, key: Hashable, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = self._inflight[key] = _Broadcast()
+            broadcast.task = asyncio.create_task(self._produce(key, broadcast, factory))
+            self.calls += 1
+            SINGLEFLIGHT_CALLS.labels(self.name).inc()
+        else:
+            self.coalesced += 1
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(broadcast.items):
+                    yield broadcast.items[position]
+                    position += 1
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                # Nobody is listening any more: stop the upstream work
+                self._forget(key, broadcast)
+                broadcast.task.cancel()
+
+    async def _produce(self, key: Hashable, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async with aclosing(factory()) as items:
+                async for item in items:
+                    broadcast.items.append(item)
+                    broadcast.publish()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            broadcast.done = True
+            self._forget(key, broadcast)
+            broadcast.publish()
+
+    def _forget(self, key: Hashable, broadcast: _Broadcast) -> None:
+        if self._inflight.get(key) is broadcast:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
@@ -1,34 +1,228 @@
-from typing import AsyncGenerator
+import itertools
+import math
+import time
+from typing import AsyncGenerator, Any, Callable, Dict, List, Optional
 
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
-    AsyncSession, 
+    AsyncEngine,
+    AsyncSession,
     create_async_engine,
     async_sessionmaker
 )
 
 from app.core.config import settings
+from app.core.metrics import DB_QUERY_SECONDS, DB_QUERY_ERRORS, register_pool_collector
 
-# Create the asynchronous database engine
-# We use the DATABASE_URL defined in config which uses the 'asyncpg' driver
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=True, # Set to False in production
-)
+# Cookie set after a successful write; reads go to the primary until it expires
+STICKY_COOKIE = "db_primary_until"
+# Clients without a cookie jar can force a primary read with this header
+CONSISTENCY_HEADER = "x-read-consistency"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class PoolMetrics:
+    """Checkout counters for one engine's pool, maintained from pool events."""
+    def __init__(self, engine: AsyncEngine, role: str):
+        self.role = role
+        self.pool = engine.sync_engine.pool
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *args: Any) -> None:
+        self.checkouts += 1
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, *args: Any) -> None:
+        self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "role": self.role,
+            "pool": type(self.pool).__name__,
+            "checkouts": self.checkouts,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+        }
+        # Only queue pools have a fixed capacity to saturate
+        if hasattr(self.pool, "size") and hasattr(self.pool, "overflow"):
+            capacity = self.pool.size() + max(getattr(self.pool, "_max_overflow", 0), 0)
+            stats.update(
+                size=self.pool.size(),
+                overflow=self.pool.overflow(),
+                checked_in=self.pool.checkedin(),
+                capacity=capacity,
+                saturation=round(self.checked_out / capacity, 3) if capacity else 0.0,
+            )
+        return stats
+
+
+def instrument_engine(engine: AsyncEngine, role: str) -> None:
+    """Time every statement (count and duration per operation) via cursor-execute hooks."""
+    def operation(statement: str) -> str:
+        verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+        return verb if verb in ("select", "insert", "update", "delete", "with", "copy") else "other"
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.labels(role, operation(statement)).observe(time.perf_counter() - started)
+
+    def on_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        DB_QUERY_ERRORS.labels(role, operation(context.statement or "")).inc()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before)
+    event.listen(engine.sync_engine, "after_cursor_execute", after)
+    event.listen(engine.sync_engine, "handle_error", on_error)
+
+
+def enable_sqlite_foreign_keys(engine: AsyncEngine) -> None:
+    """SQLite ignores foreign keys (and so ON DELETE CASCADE) unless each connection turns them on."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(engine.sync_engine, "connect", on_connect)
+
+
+def make_engine(url: str, **overrides: Any) -> AsyncEngine:
+    """Engine with the configured pool and driver settings (SQLite keeps its default pool)."""
+    kwargs: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if not url.startswith("sqlite"):
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if url.startswith("postgresql+asyncpg"):
+        # SQLAlchemy's prepared-statement cache plus asyncpg's own statement cache;
+        # set both to 0 behind PgBouncer in transaction mode
+        kwargs["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    kwargs.update(overrides)
+    engine = create_async_engine(url, **kwargs)
+    if url.startswith("sqlite"):
+        enable_sqlite_foreign_keys(engine)
+    return engine
+
+def _sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    # autoflush=False and expire_on_commit=False are recommended for async sessions
+    return async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+class DatabaseRouter:
+    """
+    Writer engine plus zero or more read replicas. Reads are spread over the
+    replicas round-robin; without replicas every read uses the writer.
+    """
+    def __init__(self, writer_url: str, reader_urls: Optional[List[str]] = None, sticky_seconds: float = 5.0, **engine_options: Any):
+        self.sticky_seconds = sticky_seconds
+        self.writer = make_engine(writer_url, **engine_options)
+        self.readers = [make_engine(url, **engine_options) for url in reader_urls or []]
+        self.writer_sessions = _sessionmaker(self.writer)
+        self.reader_sessions = [_sessionmaker(reader) for reader in self.readers]
+        self._next_reader = itertools.cycle(range(len(self.readers) or 1))
+        self.metrics = [PoolMetrics(self.writer, "writer")] + [
+            PoolMetrics(reader, f"reader-{i}") for i, reader in enumerate(self.readers)
+        ]
+        for metrics, engine in zip(self.metrics, [self.writer, *self.readers]):
+            instrument_engine(engine, metrics.role)
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self.readers)
+
+    def reader_session(self) -> AsyncSession:
+        if not self.reader_sessions:
+            return self.writer_sessions()
+        return self.reader_sessions[next(self._next_reader)]()
+
+    def wants_primary(self, request: Request) -> bool:
+        """Read-your-writes: the client wrote recently or asked for a primary read."""
+        if request.headers.get(CONSISTENCY_HEADER, "").lower() == "primary":
+            return True
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
 
-# Define a factory for creating new AsyncSession objects
-# autoflush=False and expire_on_commit=False are recommended for async sessions
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine, 
-    class_=AsyncSession, 
-    autoflush=False, 
-    expire_on_commit=False
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        return [metrics.snapshot() for metrics in self.metrics]
+
+    async def dispose(self) -> None:
+        for engine in [self.writer, *self.readers]:
+            await engine.dispose()
+
+
+db_router = DatabaseRouter(
+    settings.DATABASE_URL,
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
 )
 
+register_pool_collector(db_router.pool_stats)
+
+# The primary; background workers and migrations always use it
+engine = db_router.writer
+AsyncSessionLocal = db_router.writer_sessions
+
 # Dependency to provide a database session for FastAPI endpoints
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function that yields an asynchronous database session.
-    The session is automatically closed upon completion.
+    The session is bound to the primary and is automatically closed upon completion.
     """
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints: a replica, unless the client needs to
+    see its own recent writes (see `read_your_writes_middleware`).
+    """
+    session = AsyncSessionLocal() if db_router.wants_primary(request) else db_router.reader_session()
+    async with session:
+        yield session
+
+def get_read_sessionmaker(request: Request) -> Callable[[], AsyncSession]:
+    """
+    Session factory picked like `get_read_db`, for streaming responses that
+    open their own session once the response body starts.
+    """
+    return AsyncSessionLocal if db_router.wants_primary(request) else db_router.reader_session
+
+def read_cache_scope(request: Request, session: AsyncSession) -> Optional[str]:
+    """
+    Response-cache namespace for a read served by `session`, or None if the
+    read must bypass the cache. Read-your-writes clients skip it entirely, so
+    an entry filled by a lagging replica is never served to them; every other
+    read is keyed by the database that served it.
+    """
+    if db_router.wants_primary(request):
+        return None
+    return str(session.bind.url)
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """After a successful write, pin the client's reads to the primary for a while."""
+    response = await call_next(request)
+    if db_router.has_replicas and request.method not in SAFE_METHODS and response.status_code < 400:
+        until = time.time() + db_router.sticky_seconds
+        response.set_cookie(
+            STICKY_COOKIE, f"{until:.3f}", max_age=math.ceil(db_router.sticky_seconds), httponly=True, samesite="lax"
+        )
+    return response
\ No newline at end of file
@@ -1,32 +1,69 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastapi import FastAPI
+from app.core.metrics import MetricsMiddleware, metrics_response
 from app.core.config import settings
-from app.api.endpoints import auth, books, recommendations, ai_utils
-from app.db.base_class import Base
-from app.db.session import engine
-import asyncio
+from app.core.security import password_hasher
+from app.api.endpoints import auth, books, recommendations, ai_utils, diagnostics
+from app.ai_models.llm_client import llm_client
+from app.db.session import db_router, read_your_writes_middleware
+from app.services.summary_worker import summary_worker
+from app.services.review_summary_service import review_summary_refresher
+from app.services.recommendation_engine import recommender
+from app.services.embedding_service import embedding_service
+from app.services.review_service import review_write_buffer
+
+from app.models import book, review, user, summary_job, review_summary
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Owns the process-wide resources: database engines, the LLM HTTP client
+    and caches, the bcrypt pool and the background workers. Each one
+    registers its cleanup as it is brought up, so shutdown runs in reverse
+    order and a failed startup still closes whatever was already opened.
+
+    The schema is managed by Alembic (`alembic upgrade head`, run by
+    start.sh before the server starts), not created here.
+    """
+    async with AsyncExitStack() as resources:
+        # Engines and clients connect lazily; these only close what was used
+        resources.push_async_callback(db_router.dispose)
+        resources.callback(password_hasher.shutdown)
+        resources.push_async_callback(llm_client.aclose)
+        resources.push_async_callback(review_summary_refresher.stop)
+        resources.push_async_callback(embedding_service.flush)
+        resources.push_async_callback(review_write_buffer.stop)
 
-from app.models import book, review, user 
+        # Resume summary jobs left over from a previous run and start the worker pool
+        await summary_worker.start()
+        resources.push_async_callback(summary_worker.stop)
+        # Builds the similarity model in the background, then folds in new reviews
+        await recommender.start()
+        resources.push_async_callback(recommender.stop)
+
+        yield
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
-@app.on_event("startup")
-async def startup_event():
-    # This is useful for initial setup in a development environment.
-    # In production, use Alembic for migrations.
-    async with engine.begin() as conn:
-        # Check if tables exist before creating them
-        # Note: This operation can be slow on startup and should be handled by Alembic in a real setup.
-        # await conn.run_sync(Base.metadata.drop_all) # Uncomment for clean slate testing
-        await conn.run_sync(Base.metadata.create_all)
-    
-    print("Database tables ensured.")
-    
+# Pins a client's reads to the primary right after it writes
+app.middleware("http")(read_your_writes_middleware)
+# Added last so it is outermost and times the whole request
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return metrics_response()
+
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 app.include_router(books.router, prefix=f"{settings.API_V1_STR}/books", tags=["Books & Reviews"])
 app.include_router(recommendations.router, prefix=f"{settings.API_V1_STR}/recommendations", tags=["Recommendations"])
-app.include_router(ai_utils.router, prefix=f"{settings.API_V1_STR}", tags=["AI Utilities"])
\ No newline at end of file
+app.include_router(ai_utils.router, prefix=f"{settings.API_V1_STR}", tags=["AI Utilities"])
+app.include_router(diagnostics.router, prefix=f"{settings.API_V1_STR}/admin/diagnostics", tags=["Diagnostics"])
\ No newline at end of file
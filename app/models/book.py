@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, DDL, event, func
+from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
+# Lifecycle of the Llama3-generated summary (filled in by the background worker)
+SUMMARY_PENDING = "pending"
+SUMMARY_READY = "ready"
+SUMMARY_FAILED = "failed"
+SUMMARY_SKIPPED = "skipped" # Imported without content, nothing to summarize
+
 class Book(Base):
     """
     SQLAlchemy ORM model for the 'books' table. [cite: 20]
     """
+    # Keyset pagination within a genre walks (genre, id)
+    __table_args__ = (Index("ix_book_genre_id", "genre", "id"),)
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     author = Column(String, index=True, nullable=False)
@@ -12,6 +22,74 @@ class Book(Base):
     year_published = Column(Integer)
     # The summary will be generated by the Llama3 model
     summary = Column(Text, default="Summary pending generation.")
+    summary_status = Column(String(16), default=SUMMARY_PENDING, server_default=SUMMARY_PENDING, nullable=False)
+
+    # Materialized rating aggregates, maintained on every review write
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    review_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Reviews that carry a rating: the denominator of average_rating
+    rated_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Histogram of 1-5 star ratings
+    rating_count_1 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count_2 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count_3 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count_4 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count_5 = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Bumped on every change (also by SQL-level aggregate updates); drives ETags
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Counterpart of Review.book (back_populates requires both sides).
+    # Reviews go with their book via ON DELETE CASCADE, not an ORM cascade
+    reviews = relationship("Review", back_populates="book", passive_deletes=True)
     
+    @property
+    def average_rating(self) -> float:
+        if not self.rated_count:
+            return 0.0
+        return round(self.rating_sum / self.rated_count, 2)
+
+    @property
+    def rating_histogram(self) -> dict:
+        return {str(star): getattr(self, f"rating_count_{star}") or 0 for star in range(1, 6)}
+
     def __repr__(self):
-        return f"<Book(title='{self.title}', author='{self.author}')>"
\ No newline at end of file
+        return f"<Book(title='{self.title}', author='{self.author}')>"
+
+
+# --- Full-text search index (dialect specific, kept out of the ORM columns) ---
+# PostgreSQL: a generated, weighted tsvector column with a GIN index.
+# SQLite (tests): an external-content FTS5 table kept in sync by triggers.
+
+_PG_SEARCH_DDL = [
+    "ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    " setweight(to_tsvector('english', coalesce(title, '')), 'A') ||"
+    " setweight(to_tsvector('english', coalesce(author, '')), 'A') ||"
+    " setweight(to_tsvector('english', coalesce(genre, '')), 'B') ||"
+    " setweight(to_tsvector('english', coalesce(summary, '')), 'C')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS ix_book_search_vector ON book USING GIN (search_vector)",
+]
+
+_SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+    " title, author, genre, summary, content='book', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN"
+    " INSERT INTO book_fts(rowid, title, author, genre, summary)"
+    " VALUES (new.id, new.title, new.author, new.genre, new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN"
+    " INSERT INTO book_fts(book_fts, rowid, title, author, genre, summary)"
+    " VALUES ('delete', old.id, old.title, old.author, old.genre, old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author, genre, summary ON book BEGIN"
+    " INSERT INTO book_fts(book_fts, rowid, title, author, genre, summary)"
+    " VALUES ('delete', old.id, old.title, old.author, old.genre, old.summary);"
+    " INSERT INTO book_fts(rowid, title, author, genre, summary)"
+    " VALUES (new.id, new.title, new.author, new.genre, new.summary); END",
+]
+
+for _statement in _PG_SEARCH_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in _SQLITE_SEARCH_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Book.__table__, "before_drop", DDL("DROP TABLE IF EXISTS book_fts").execute_if(dialect="sqlite"))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -6,10 +6,13 @@ class Review(Base):
     """
     SQLAlchemy ORM model for the 'reviews' table
     """
+    # Keyset pagination of a book's reviews walks (book_id, id)
+    __table_args__ = (Index("ix_review_book_id_id", "book_id", "id"),)
+
     id = Column(Integer, primary_key=True, index=True)
     
     # Foreign key referencing the 'books' table
-    book_id = Column(Integer, ForeignKey("book.id"), nullable=False, index=True) 
+    book_id = Column(Integer, ForeignKey("book.id", ondelete="CASCADE"), nullable=False, index=True) 
     
     # Assuming user_id will come from the authenticated user]
     user_id = Column(Integer, index=True, nullable=False) 
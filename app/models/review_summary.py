@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
+from app.db.base_class import Base
+
+class ReviewSummary(Base):
+    """
+    SQLAlchemy ORM model for the stored Llama3 review-sentiment summary of a book.
+    `last_review_id` is the watermark: the newest review the summary covers.
+    """
+    book_id = Column(Integer, ForeignKey("book.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text)
+    last_review_id = Column(Integer, default=0, nullable=False)
+    generated_at = Column(DateTime(timezone=True))
+    # Reviews written after the watermark; reset when the summary is regenerated
+    pending_reviews = Column(Integer, default=0, nullable=False)
+    stale_since = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<ReviewSummary(book_id={self.book_id}, last_review_id={self.last_review_id})>"
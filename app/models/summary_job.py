@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from app.db.base_class import Base
+
+# Job states for background summary generation
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class SummaryJob(Base):
+    """
+    SQLAlchemy ORM model for the persistent summary generation queue.
+    Rows outlive the process, so unfinished jobs are resumed after a restart.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(Integer, ForeignKey("book.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Source text handed to the LLM; kept here so the Book row stays small
+    content = Column(Text, nullable=False)
+    status = Column(String(16), default=JOB_PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    # Set when a worker claims the job; a stale claim means that worker died
+    claimed_at = Column(DateTime(timezone=True))
+    # Backoff after a failed attempt; the poller leaves the job alone until then
+    retry_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SummaryJob(book_id={self.book_id}, status='{self.status}', attempts={self.attempts})>"
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 
 # Base schema for shared attributes
 class BookBase(BaseModel):
@@ -14,13 +14,61 @@ class BookCreate(BookBase):
 
 # Schema for updating a book
 class BookUpdate(BookBase):
-    title: Optional[str] = None
-    author: Optional[str] = None
+    title: Optional[str] = Field(default=None, max_length=255)
+    author: Optional[str] = Field(default=None, max_length=255)
+
+    # Omitted means unchanged; an explicit null would reach NOT NULL columns
+    @field_validator("title", "author")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 # Schema for reading/response
 class Book(BookBase):
     id: int
     summary: Optional[str] = Field(default="Summary pending generation.")
+    summary_status: str = Field(default="pending", description="'pending', 'ready', 'failed' or 'skipped'.")
+    average_rating: float = 0.0
+    review_count: int = 0
+    version: int = 1
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Row of a list endpoint: only the fields requested with `fields=` are present
+class BookListItem(BaseModel):
+    id: int
+    title: Optional[str] = None
+    author: Optional[str] = None
+    genre: Optional[str] = None
+    year_published: Optional[int] = None
+    summary: Optional[str] = None
+    summary_status: Optional[str] = None
+    average_rating: Optional[float] = None
+    review_count: Optional[int] = None
+    version: Optional[int] = None
+
+# Bulk updates and deletes by id
+class BookBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class BookBulkUpdate(BookBulkDelete):
+    changes: BookUpdate
+
+class BookBulkResult(BaseModel):
+    affected: List[int] = Field(default_factory=list, description="Ids updated or deleted, ascending.")
+    missing: List[int] = Field(default_factory=list, description="Requested ids that matched no book.")
+
+# Result of a bulk catalog import
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+class BookImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    summary_jobs: int = 0
+    errors: List[BookImportError] = Field(default_factory=list, description="First errors only; see `failed` for the total.")
\ No newline at end of file
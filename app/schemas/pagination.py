@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Envelope for keyset-paginated list endpoints
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` to fetch the next page; null on the last page.")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class ReviewBase(BaseModel):
     review_text: Optional[str] = None
@@ -15,4 +15,19 @@ class Review(ReviewBase):
     user_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# One item of POST /books/reviews/bulk
+class ReviewBulkItem(ReviewBase):
+    book_id: int
+    user_id: Optional[int] = Field(default=None, description="Defaults to the caller.")
+
+class ReviewBulkError(BaseModel):
+    index: int
+    error: str
+
+class ReviewBulkReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    review_ids: List[int] = Field(default_factory=list, description="Ids of the inserted reviews, in request order.")
+    errors: List[ReviewBulkError] = Field(default_factory=list)
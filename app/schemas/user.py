@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 
 # Base schema for shared attributes
@@ -18,6 +18,19 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# Schema for admin changes to a user's access (role / activation)
+class UserAccessUpdate(BaseModel):
+    role: Optional[str] = Field(default=None, description="Role for RBAC: 'admin' or 'user'")
+    is_active: Optional[bool] = None
+
+    # Omitted means unchanged; an explicit null would reach NOT NULL columns
+    @field_validator("role", "is_active")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 # Schema for login
 class UserLogin(BaseModel):
     email: EmailStr
@@ -0,0 +1,41 @@
+"""
+Bulk import books from an NDJSON or CSV file.
+
+Usage:
+    python -m app.scripts.import_books catalog.ndjson [--format ndjson|csv] [--batch-size 1000]
+
+The format defaults to the file extension. Summary jobs for rows with a
+`content` field are stored in the `summaryjob` table; a running API's
+summary worker finds them on its next poll (SUMMARY_JOB_POLL_SECONDS).
+"""
+import argparse
+import asyncio
+import json
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.import_service import import_books, IMPORT_FORMATS
+
+CHUNK_SIZE = 1 << 16
+
+async def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+async def main(path: str, fmt: str, batch_size: int) -> None:
+    async with AsyncSessionLocal() as db:
+        report = await import_books(db, read_chunks(path), fmt, batch_size=batch_size)
+    print(json.dumps(report.model_dump(), indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import books from an NDJSON or CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    asyncio.run(main(args.path, fmt, args.batch_size))
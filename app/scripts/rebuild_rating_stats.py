@@ -0,0 +1,19 @@
+"""
+Backfill or repair the materialized rating aggregates on the book table.
+
+Usage:
+    python -m app.scripts.rebuild_rating_stats [book_id]
+"""
+import asyncio
+import sys
+
+from app.db.session import AsyncSessionLocal
+from app.services.rating_service import rebuild_rating_stats
+
+async def main(book_id=None):
+    async with AsyncSessionLocal() as db:
+        updated = await rebuild_rating_stats(db, book_id)
+    print(f"Rebuilt rating aggregates for {updated} book(s).")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -1,99 +1,256 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func, desc, update
+from sqlalchemy import select, delete, update
 
-from app.models.book import Book
-from app.models.review import Review
+from app.core.singleflight import SingleFlight
+from app.core.response_cache import response_cache, book_tag, reviews_tag, TAG_BOOK_LISTS
+from app.models.book import Book, SUMMARY_PENDING
+from app.models.review_summary import ReviewSummary
 from app.schemas.book import BookCreate, BookUpdate
-from app.ai_models.llm_client import llm_client
+from app.services.summary_worker import summary_worker, enqueue_summary_job
+from app.services import review_summary_service
+from app.services.embedding_service import embedding_service
 
 async def get_book(db: AsyncSession, book_id: int) -> Optional[Book]:
     """Retrieve a single book by ID."""
     return await db.get(Book, book_id)
 
-async def get_all_books(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Book]:
-    """Retrieve all books."""
-    result = await db.execute(select(Book).offset(skip).limit(limit))
+async def get_all_books(
+    db: AsyncSession, after_id: Optional[int] = None, limit: int = 100, genre: Optional[str] = None
+) -> List[Book]:
+    """Retrieve books in id order, starting after `after_id` (keyset pagination)."""
+    stmt = select(Book)
+    if genre is not None:
+        stmt = stmt.where(Book.genre == genre)
+    if after_id is not None:
+        stmt = stmt.where(Book.id > after_id)
+    result = await db.execute(stmt.order_by(Book.id).limit(limit))
     return list(result.scalars().all())
 
+# Fields list endpoints can return (`fields=`) and the columns each one needs.
+# Only the requested columns are selected, so `summary` is read only when asked for.
+BOOK_FIELD_COLUMNS = {
+    "id": (Book.id,),
+    "title": (Book.title,),
+    "author": (Book.author,),
+    "genre": (Book.genre,),
+    "year_published": (Book.year_published,),
+    "summary": (Book.summary,),
+    "summary_status": (Book.summary_status,),
+    "average_rating": (Book.rating_sum, Book.rated_count),
+    "review_count": (Book.review_count,),
+    "version": (Book.version,),
+}
+BOOK_FIELDS = tuple(BOOK_FIELD_COLUMNS) # The full Book schema; the default
+
+def parse_book_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Validate a comma-separated `fields=` value (id is always included). Raises ValueError."""
+    if not fields:
+        return BOOK_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in BOOK_FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(BOOK_FIELDS)}.")
+    return tuple(dict.fromkeys(["id", *requested]))
+
+def _book_columns(fields: Sequence[str]) -> list:
+    return list({column.key: column for field in fields for column in BOOK_FIELD_COLUMNS[field]}.values())
+
+def book_rows_to_dicts(rows: Sequence[Any], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Plain dicts from column-only rows, ready for JSON encoding (no ORM or Pydantic objects)."""
+    items = []
+    for row in rows:
+        values = row._mapping
+        item = {}
+        for field in fields:
+            if field == "average_rating": # Same rounding as Book.average_rating
+                count = values["rated_count"]
+                item[field] = round(values["rating_sum"] / count, 2) if count else 0.0
+            else:
+                item[field] = values[field]
+        items.append(item)
+    return items
+
+async def get_book_rows(
+    db: AsyncSession, fields: Sequence[str], after_id: Optional[int] = None, limit: int = 100, genre: Optional[str] = None
+) -> list:
+    """Like `get_all_books`, but selects only the columns behind `fields` (rows, not ORM objects)."""
+    stmt = select(*_book_columns(fields))
+    if genre is not None:
+        stmt = stmt.where(Book.genre == genre)
+    if after_id is not None:
+        stmt = stmt.where(Book.id > after_id)
+    result = await db.execute(stmt.order_by(Book.id).limit(limit))
+    return list(result.all())
+
+async def get_book_rows_by_ids(db: AsyncSession, fields: Sequence[str], book_ids: List[int]) -> list:
+    """Column-only rows for several books, preserving the order of `book_ids`."""
+    if not book_ids:
+        return []
+    result = await db.execute(select(*_book_columns(fields)).where(Book.id.in_(book_ids)))
+    by_id = {row.id: row for row in result.all()}
+    return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
+async def get_books_by_ids(db: AsyncSession, book_ids: List[int]) -> List[Book]:
+    """Retrieve several books in one query, preserving the order of `book_ids`."""
+    if not book_ids:
+        return []
+    result = await db.execute(select(Book).where(Book.id.in_(book_ids)))
+    by_id = {book.id: book for book in result.scalars().all()}
+    return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
 async def create_book(db: AsyncSession, book_in: BookCreate, content: str) -> Book:
-    """Create a new book and asynchronously generate its summary."""
-    
-    # Asynchronously generate summary using the Llama3 client
-    book_summary = await llm_client.generate_book_summary(content, book_in.title)
+    """Create a new book and queue its summary for background generation."""
 
-    # Create the ORM object
+    # Create the ORM object; the summary is filled in later by the summary worker
     db_book = Book(
         title=book_in.title,
         author=book_in.author,
         genre=book_in.genre,
         year_published=book_in.year_published,
-        summary=book_summary or "Summary generation failed or is pending."
+        summary="Summary pending generation.",
+        summary_status=SUMMARY_PENDING
     )
-    
-    # Commit to the database
     db.add(db_book)
+    await db.flush() # Assigns db_book.id for the job row
+
+    # The job is committed in the same transaction, so it survives a crash/restart
+    job = await enqueue_summary_job(db, db_book.id, content)
+    db.add(ReviewSummary(book_id=db_book.id, last_review_id=0, pending_reviews=0))
     await db.commit()
     await db.refresh(db_book)
+    response_cache.invalidate(TAG_BOOK_LISTS)
+
+    summary_worker.notify(job.id)
     return db_book
 
-async def update_book(db: AsyncSession, book_id: int, book_in: BookUpdate) -> Optional[Book]:
-    """Update a book's information."""
-    db_book = await get_book(db, book_id)
-    if db_book:
-        # Use update statement for efficiency or merge for ORM
-        update_data = book_in.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_book, key, value)
-        
-        await db.commit()
-        await db.refresh(db_book)
+class VersionConflict(Exception):
+    """The book changed since the version the client last saw."""
+    def __init__(self, current_version: int):
+        super().__init__(f"Book is at version {current_version}")
+        self.current_version = current_version
+
+async def update_book(
+    db: AsyncSession, book_id: int, book_in: BookUpdate, expected_version: Optional[int] = None
+) -> Optional[Book]:
+    """
+    Update a book's information in one UPDATE ... RETURNING round trip.
+    With `expected_version`, the update only applies if the book is still at
+    that version; otherwise VersionConflict is raised.
+    """
+    stmt = (
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**book_in.model_dump(exclude_unset=True), version=Book.version + 1)
+        .returning(Book)
+        .execution_options(populate_existing=True)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(Book.version == expected_version)
+    db_book = (await db.execute(stmt)).scalars().first()
+    if db_book is None:
+        await db.rollback()
+        # Only the failure path pays for telling "missing" from "changed"
+        if expected_version is not None:
+            current = await db.scalar(select(Book.version).where(Book.id == book_id))
+            if current is not None:
+                raise VersionConflict(current)
+        return None
+    await db.commit()
+    response_cache.invalidate(book_tag(book_id), TAG_BOOK_LISTS)
     return db_book
 
 async def delete_book(db: AsyncSession, book_id: int) -> bool:
-    """Delete a book by ID."""
-    await db.execute(delete(Review).where(Review.book_id == book_id))
-    
-    # Delete the book
+    """Delete a book by ID; its reviews, review summary and summary jobs go with it (ON DELETE CASCADE)."""
     result = await db.execute(delete(Book).where(Book.id == book_id))
-    
-    if result.rowcount > 0:
-        await db.commit()
-        return True
-    return False
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    await db.commit()
+    _forget_deleted_books([book_id])
+    return True
+
+async def bulk_update_books(db: AsyncSession, book_ids: Sequence[int], book_in: BookUpdate) -> List[int]:
+    """Apply the same changes to many books in one UPDATE (one transaction); returns the ids updated."""
+    result = await db.execute(
+        update(Book)
+        .where(Book.id.in_(set(book_ids)))
+        .values(**book_in.model_dump(exclude_unset=True), version=Book.version + 1)
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = sorted(result.scalars())
+    await db.commit()
+    if updated:
+        response_cache.invalidate(*[book_tag(book_id) for book_id in updated], TAG_BOOK_LISTS)
+    return updated
+
+async def bulk_delete_books(db: AsyncSession, book_ids: Sequence[int]) -> List[int]:
+    """Delete many books and their dependent rows in one DELETE (one transaction); returns the ids deleted."""
+    result = await db.execute(
+        delete(Book)
+        .where(Book.id.in_(set(book_ids)))
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = sorted(result.scalars())
+    await db.commit()
+    _forget_deleted_books(deleted)
+    return deleted
+
+def _forget_deleted_books(book_ids: Sequence[int]) -> None:
+    if not book_ids:
+        return
+    tags = [tag for book_id in book_ids for tag in (book_tag(book_id), reviews_tag(book_id))]
+    response_cache.invalidate(*tags, TAG_BOOK_LISTS)
+    for book_id in book_ids:
+        embedding_service.remove_book(book_id)
+
+# Concurrent summary reads of the same book on the same database share one lookup
+summary_inflight = SingleFlight("book_summary")
 
 async def get_summary_and_rating(db: AsyncSession, book_id: int) -> Dict[str, Any]:
     """
-    Retrieves book summary, calculates aggregated rating, and generates a review summary.
+    Retrieves book summary, the materialized rating aggregates, and the stored review summary.
+    Concurrent calls for the same book are coalesced; each caller gets its own copy.
     """
+    # Keyed by engine too: a read pinned to the primary must not get a replica's older answer
+    stats = await summary_inflight.do((db.bind, book_id), lambda: _load_summary_and_rating(db, book_id))
+    return dict(stats) if stats is not None else None
+
+async def _load_summary_and_rating(db: AsyncSession, book_id: int) -> Optional[Dict[str, Any]]:
     db_book = await get_book(db, book_id)
     if not db_book:
         return None
 
-    stmt = select(func.avg(Review.rating), func.count(Review.id)).where(Review.book_id == book_id)
-    result = await db.execute(stmt)
-    avg_rating, review_count = result.one()
-    
-    avg_rating = round(avg_rating, 2) if avg_rating else 0.0
-
-    # Retrieve Review Texts for AI Summary (limit to recent/relevant ones)
-    review_results = await db.execute(
-        select(Review.review_text)
-        .where(Review.book_id == book_id)
-        .order_by(desc(Review.id)) # Get newest reviews
-        .limit(20) # Limit the amount of text sent to the LLM
+    # Serve the stored review summary; regeneration happens in the background
+    summary_row = await review_summary_service.get_review_summary(db, book_id)
+    review_summary_service.review_summary_refresher.ensure_scheduled(summary_row)
+    return _summary_and_rating(db_book, summary_row)
+
+async def get_summaries_and_ratings(db: AsyncSession, book_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Summary and rating stats for many books in one query (book rows outer-joined
+    with their stored review summaries). Never calls the LLM or schedules a
+    regeneration. Missing ids are absent from the result.
+    """
+    if not book_ids:
+        return {}
+    result = await db.execute(
+        select(Book, ReviewSummary)
+        .outerjoin(ReviewSummary, ReviewSummary.book_id == Book.id)
+        .where(Book.id.in_(book_ids))
     )
-    review_texts = "\n---\n".join([r[0] for r in review_results.all() if r[0]])
-    
-    review_summary = "No reviews yet."
-    if review_texts:
-        review_summary = await llm_client.generate_review_summary(review_texts)
+    return {book.id: {"book_id": book.id, **_summary_and_rating(book, summary_row)} for book, summary_row in result.all()}
 
+def _summary_and_rating(db_book: Book, summary_row: Optional[ReviewSummary]) -> Dict[str, Any]:
     return {
         "title": db_book.title,
         "author": db_book.author,
         "book_summary": db_book.summary,
-        "aggregated_rating": avg_rating,
-        "review_count": review_count,
-        "review_sentiment_summary": review_summary
+        # Ratings come from the materialized aggregates on the book row (no review scan)
+        "aggregated_rating": db_book.average_rating,
+        "review_count": db_book.review_count,
+        "rating_histogram": db_book.rating_histogram,
+        **review_summary_service.describe(summary_row)
     }
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import math
+import os
+from typing import List, Optional, Tuple
+
+from app.ai_models.llm_client import llm_client
+from app.ai_models.vector_index import VectorIndex
+from app.core.config import settings
+
+SEARCH_MODES = ("auto", "exact", "approx")
+FLUSH_EVERY = 100 # Upserts between persisting the id map
+
+
+def book_text(book) -> str:
+    """Text that represents a book in embedding space."""
+    parts = [f"{book.title} by {book.author}."]
+    if book.genre:
+        parts.append(f"Genre: {book.genre}.")
+    if book.summary:
+        parts.append(book.summary)
+    return " ".join(parts)
+
+
+class EmbeddingService:
+    """
+    Embeds book summaries through Ollama and serves similarity queries from
+    an in-process VectorIndex. The approximate (IVF) index is trained once
+    the catalog passes EMBEDDING_ANN_MIN_VECTORS and retrained as it doubles.
+    """
+    def __init__(self):
+        self._index: Optional[VectorIndex] = None
+        self._unflushed = 0
+        self._trained_at_size = 0
+        self._training: Optional[asyncio.Task] = None
+
+    @property
+    def index(self) -> VectorIndex:
+        # Created lazily so importing the app never touches the index files
+        if self._index is None:
+            self._index = VectorIndex(settings.EMBEDDING_DIM, path=settings.EMBEDDING_INDEX_PATH or None)
+        return self._index
+
+    async def index_book(self, book) -> bool:
+        """Embed a book's current summary and upsert it. Returns False if embedding failed."""
+        vector = await llm_client.embed(book_text(book))
+        if vector is None:
+            return False
+        try:
+            await asyncio.to_thread(self.index.upsert, book.id, vector)
+        except ValueError as e:
+            print(f"Embedding for book {book.id} rejected: {e}")
+            return False
+        self._unflushed += 1
+        if self._unflushed >= FLUSH_EVERY:
+            await self.flush()
+        self._maybe_train()
+        return True
+
+    def remove_book(self, book_id: int) -> None:
+        # Nothing to remove if no vector was ever stored (avoids creating index files)
+        persisted = bool(settings.EMBEDDING_INDEX_PATH) and os.path.exists(
+            os.path.join(settings.EMBEDDING_INDEX_PATH, "meta.json")
+        )
+        if self._index is not None or persisted:
+            self.index.remove(book_id)
+
+    def _use_approximate(self, mode: str) -> bool:
+        if mode == "exact":
+            return False
+        if mode == "approx":
+            return True
+        return len(self.index) >= settings.EMBEDDING_ANN_MIN_VECTORS
+
+    async def similar_books(self, book_id: int, k: int, mode: str = "auto") -> Optional[List[Tuple[int, float]]]:
+        """Nearest books to a given book, or None if the book has no embedding yet."""
+        vector = self.index.get(book_id)
+        if vector is None:
+            return None
+        return await asyncio.to_thread(
+            self.index.search, vector, k, self._use_approximate(mode), settings.EMBEDDING_ANN_NPROBE, book_id
+        )
+
+    async def semantic_search(self, query: str, k: int, mode: str = "auto") -> Optional[List[Tuple[int, float]]]:
+        """Books closest in meaning to a free-text query, or None if the query could not be embedded."""
+        vector = await llm_client.embed(query)
+        if vector is None:
+            return None
+        return await asyncio.to_thread(
+            self.index.search, vector, k, self._use_approximate(mode), settings.EMBEDDING_ANN_NPROBE
+        )
+
+    def _maybe_train(self) -> None:
+        size = len(self.index)
+        if size < settings.EMBEDDING_ANN_MIN_VECTORS or size < 2 * self._trained_at_size:
+            return
+        if self._training is not None and not self._training.done():
+            return
+        self._trained_at_size = size
+        nlist = max(1, int(4 * math.sqrt(size))) # Common IVF rule of thumb
+        self._training = asyncio.create_task(asyncio.to_thread(self.index.train_ivf, nlist))
+
+    async def flush(self) -> None:
+        self._unflushed = 0
+        if self._index is not None:
+            await asyncio.to_thread(self._index.flush)
+
+
+# Instantiate the service once
+embedding_service = EmbeddingService()
@@ -0,0 +1,79 @@
+import csv
+import io
+import zlib
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.review import Review
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Exported columns, in output order; each review row carries its book's title and author
+BOOK_EXPORT_COLUMNS = [
+    Book.id, Book.title, Book.author, Book.genre, Book.year_published, Book.summary, Book.summary_status,
+    Book.review_count, Book.rated_count, Book.rating_sum, Book.version,
+]
+REVIEW_EXPORT_COLUMNS = [
+    Review.id, Review.book_id, Review.user_id, Review.rating, Review.review_text,
+    Book.title.label("book_title"), Book.author.label("book_author"),
+]
+
+
+def export_statement(kind: str, after_id: Optional[int] = None):
+    """Rows of one export in id order, starting after `after_id` (the resume token)."""
+    if kind == "books":
+        key, stmt = Book.id, select(*BOOK_EXPORT_COLUMNS)
+    else:
+        key, stmt = Review.id, select(*REVIEW_EXPORT_COLUMNS).join(Book, Review.book_id == Book.id)
+    if after_id is not None:
+        stmt = stmt.where(key > after_id)
+    return stmt.order_by(key)
+
+def encode_ndjson(names: Sequence[str], rows: Sequence[Sequence]) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+def encode_csv(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    # Fields with line breaks are quoted (RFC 4180)
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+async def export_rows(
+    sessions: Callable[[], AsyncSession], kind: str, fmt: str, after_id: Optional[int] = None, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Yield an export as byte chunks, one per fetch from a server-side cursor
+    (`EXPORT_FETCH_SIZE` rows), so memory stays flat however large it is.
+
+    Rows come in id order; to resume an interrupted export, pass the id of
+    the last complete row received as `after_id`. CSV output starts with a
+    header row unless it is resuming. With `compress`, the output is one
+    gzip stream, sync-flushed after every chunk so a cut-off download still
+    decompresses up to its last chunk.
+    """
+    columns = BOOK_EXPORT_COLUMNS if kind == "books" else REVIEW_EXPORT_COLUMNS
+    names: List[str] = [column.key for column in columns]
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv" and after_id is None:
+        yield emit(encode_csv([names]))
+
+    stmt = export_statement(kind, after_id).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+    async with sessions() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield emit(encode_ndjson(names, rows) if fmt == "ndjson" else encode_csv(rows))
+
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,168 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.response_cache import response_cache, TAG_BOOK_LISTS
+from app.models.book import Book, SUMMARY_PENDING, SUMMARY_SKIPPED
+from app.models.summary_job import SummaryJob, JOB_PENDING
+from app.schemas.book import BookCreate, BookImportReport, BookImportError
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Columns written for every imported book (COPY needs them spelled out)
+BOOK_COLUMNS = ["title", "author", "genre", "year_published", "summary", "summary_status"]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one chunk in memory."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (line_number, record) pairs. NDJSON records are parsed objects; CSV
+    records are dicts keyed by the header row. CSV fields must not contain
+    line breaks, since rows are parsed one line at a time.
+    A record that cannot be parsed is yielded as an Exception.
+    """
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty CSV cells mean "not provided"
+        yield line_number, {k: v for k, v in zip(header, values) if v != ""}
+
+def _to_row(record: Any) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Validate a record with BookCreate; returns (book column values, content)."""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("Each record must be an object.")
+    book_in = BookCreate.model_validate(record)
+    content = record.get("content") or None
+    return {
+        "title": book_in.title,
+        "author": book_in.author,
+        "genre": book_in.genre,
+        "year_published": book_in.year_published,
+        "summary": "Summary pending generation." if content else "No content provided for summarization.",
+        "summary_status": SUMMARY_PENDING if content else SUMMARY_SKIPPED,
+    }, content
+
+async def _copy_books(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """PostgreSQL COPY through the session's asyncpg connection (same transaction)."""
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Book.__tablename__,
+        records=[tuple(row[c] for c in BOOK_COLUMNS) for row in rows],
+        columns=BOOK_COLUMNS,
+    )
+
+async def _flush_batch(
+    db: AsyncSession, plain_rows: List[Dict[str, Any]], content_rows: List[Tuple[Dict[str, Any], str]]
+) -> List[int]:
+    """Insert one batch and its summary jobs in a single transaction; returns the new job ids."""
+    if plain_rows:
+        if db.get_bind().dialect.name == "postgresql":
+            await _copy_books(db, plain_rows)
+        else:
+            await db.execute(insert(Book), plain_rows) # executemany
+
+    job_ids: List[int] = []
+    if content_rows:
+        # Multi-row INSERT ... RETURNING; ids come back in parameter order
+        result = await db.execute(
+            insert(Book).returning(Book.id, sort_by_parameter_order=True),
+            [row for row, _ in content_rows],
+        )
+        book_ids = list(result.scalars().all())
+        jobs = await db.execute(
+            insert(SummaryJob).returning(SummaryJob.id, sort_by_parameter_order=True),
+            [
+                {"book_id": book_id, "content": content, "status": JOB_PENDING, "attempts": 0}
+                for book_id, (_, content) in zip(book_ids, content_rows)
+            ],
+        )
+        job_ids = list(jobs.scalars().all())
+
+    await db.commit()
+    return job_ids
+
+async def import_books(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    batch_size: int = settings.IMPORT_BATCH_SIZE,
+) -> BookImportReport:
+    """
+    Stream-import books from NDJSON or CSV bytes. Rows are validated with
+    BookCreate and inserted in batches, so memory stays bounded by the batch
+    size. Summaries are deferred to the background worker. Each batch is
+    committed on its own; invalid rows are reported and skipped.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(IMPORT_FORMATS)}.")
+
+    report = BookImportReport()
+    plain_rows: List[Dict[str, Any]] = []
+    content_rows: List[Tuple[Dict[str, Any], str]] = []
+
+    async def flush():
+        job_ids = await _flush_batch(db, plain_rows, content_rows)
+        report.inserted += len(plain_rows) + len(content_rows)
+        report.summary_jobs += len(job_ids)
+        report.batches += 1
+        plain_rows.clear()
+        content_rows.clear()
+        response_cache.invalidate(TAG_BOOK_LISTS)
+
+    async for line_number, record in iter_records(iter_lines(chunks), fmt):
+        try:
+            row, content = _to_row(record)
+        except (ValidationError, ValueError) as e:
+            report.failed += 1
+            if len(report.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+                report.errors.append(BookImportError(line=line_number, error=str(e)))
+            continue
+
+        if content:
+            content_rows.append((row, content))
+        else:
+            plain_rows.append(row)
+        if len(plain_rows) + len(content_rows) >= batch_size:
+            await flush()
+
+    if plain_rows or content_rows:
+        await flush()
+    return report
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, select, update, func
+
+from app.core.response_cache import response_cache
+from app.models.book import Book
+from app.models.review import Review
+
+# Histogram column for each star rating
+HISTOGRAM_COLUMNS = {star: getattr(Book, f"rating_count_{star}") for star in range(1, 6)}
+
+async def apply_review_rating(db: AsyncSession, book_id: int, rating: Optional[int]) -> None:
+    """
+    Fold a new review's rating into the book's aggregates in the caller's transaction.
+    The increments happen in SQL, so concurrent reviews never lose an update.
+    """
+    values = {"review_count": Book.review_count + 1, "version": Book.version + 1, "updated_at": func.now()}
+    if rating is not None:
+        values["rating_sum"] = Book.rating_sum + rating
+        values["rated_count"] = Book.rated_count + 1
+        column = HISTOGRAM_COLUMNS.get(rating)
+        if column is not None:
+            values[column.key] = column + 1
+    await db.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+async def apply_review_ratings(db: AsyncSession, ratings_by_book: Dict[int, List[Optional[int]]]) -> None:
+    """
+    Batch form of `apply_review_rating`: each book's new ratings are folded
+    in with one increment, and all books share one executemany UPDATE.
+    """
+    table = Book.__table__
+    params = []
+    for book_id, ratings in ratings_by_book.items():
+        rated = [rating for rating in ratings if rating is not None]
+        params.append({
+            "b_book_id": book_id,
+            "b_count": len(ratings),
+            "b_sum": sum(rated),
+            "b_rated": len(rated),
+            **{f"b_star_{star}": rated.count(star) for star in HISTOGRAM_COLUMNS},
+        })
+    if not params:
+        return
+    # A Core statement, so the session runs it as a plain executemany
+    await db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_book_id"))
+        .values(
+            review_count=table.c.review_count + bindparam("b_count"),
+            rating_sum=table.c.rating_sum + bindparam("b_sum"),
+            rated_count=table.c.rated_count + bindparam("b_rated"),
+            version=table.c.version + 1,
+            updated_at=func.now(),
+            **{column.key: table.c[column.key] + bindparam(f"b_star_{star}") for star, column in HISTOGRAM_COLUMNS.items()}
+        ),
+        params,
+    )
+
+def _from_reviews(aggregate, *criteria):
+    """Scalar subquery over the reviews of the book row being updated."""
+    return select(aggregate).where(Review.book_id == Book.id, *criteria).scalar_subquery()
+
+async def rebuild_rating_stats(db: AsyncSession, book_id: Optional[int] = None) -> int:
+    """
+    Recompute the aggregates from the review table (backfill or repair) in one
+    correlated UPDATE; books without reviews end up at zero.
+    Rebuilds every book when `book_id` is None. Returns the number of books updated.
+    """
+    stmt = update(Book).values(
+        rating_sum=_from_reviews(func.coalesce(func.sum(Review.rating), 0)),
+        review_count=_from_reviews(func.count(Review.id)),
+        rated_count=_from_reviews(func.count(Review.rating)),
+        version=Book.version + 1,
+        updated_at=func.now(),
+        **{column.key: _from_reviews(func.count(Review.id), Review.rating == star) for star, column in HISTOGRAM_COLUMNS.items()}
+    ).execution_options(synchronize_session=False)
+    if book_id is not None:
+        stmt = stmt.where(Book.id == book_id)
+    result = await db.execute(stmt)
+    await db.commit()
+    response_cache.clear()
+    return result.rowcount
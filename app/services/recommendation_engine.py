@@ -0,0 +1,272 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.book import Book
+from app.models.review import Review
+
+Neighbors = Tuple[np.ndarray, np.ndarray] # (neighbor book ids, similarities), best first
+
+
+class RatingMatrix:
+    """
+    Sparse user x book rating matrix (CSR, float32) built from review triplets.
+    Repeated reviews of the same book by the same user are averaged.
+    """
+    def __init__(self, user_ids: np.ndarray, book_ids: np.ndarray, ratings: np.ndarray):
+        # Deferred: scipy is slow to import and only the background rebuild needs it
+        from scipy import sparse
+
+        self.user_ids = user_ids
+        self.book_ids = book_ids
+        self.ratings = ratings
+
+        self.users, user_idx = np.unique(user_ids, return_inverse=True)
+        self.items, item_idx = np.unique(book_ids, return_inverse=True)
+        shape = (len(self.users), len(self.items))
+        totals = sparse.csr_matrix((ratings.astype(np.float32), (user_idx, item_idx)), shape=shape)
+        counts = sparse.csr_matrix((np.ones_like(ratings, dtype=np.float32), (user_idx, item_idx)), shape=shape)
+        # Both matrices share the same sparsity pattern after summing duplicates
+        totals.sum_duplicates()
+        counts.sum_duplicates()
+        totals.data /= counts.data
+        self.matrix = totals
+
+        # Column-normalized copy for cosine similarity
+        norms = np.sqrt(np.asarray(self.matrix.power(2).sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        self.normalized = (self.matrix @ sparse.diags(1.0 / norms)).tocsc()
+        self._item_index = {int(book_id): i for i, book_id in enumerate(self.items)}
+
+    @classmethod
+    def empty(cls) -> "RatingMatrix":
+        empty = np.array([], dtype=np.int64)
+        return cls(empty, empty, np.array([], dtype=np.float32))
+
+    def extend(self, triplets: Sequence[Tuple[int, int, int]]) -> "RatingMatrix":
+        """New matrix with extra (user_id, book_id, rating) triplets; O(nnz) rebuild."""
+        users, books, ratings = zip(*triplets)
+        return RatingMatrix(
+            np.concatenate([self.user_ids, np.asarray(users, dtype=np.int64)]),
+            np.concatenate([self.book_ids, np.asarray(books, dtype=np.int64)]),
+            np.concatenate([self.ratings, np.asarray(ratings, dtype=np.float32)]),
+        )
+
+    def item_index(self, book_id: int) -> Optional[int]:
+        return self._item_index.get(book_id)
+
+    def top_k_neighbors(self, item_indices: np.ndarray, k: int) -> Dict[int, Neighbors]:
+        """Cosine top-K neighbors for the given item columns via one sparse product; items without any are omitted."""
+        if len(item_indices) == 0 or self.normalized.shape[1] == 0:
+            return {}
+        block = (self.normalized[:, item_indices].T @ self.normalized).tocsr() # len(items) x n_items
+        neighbors: Dict[int, Neighbors] = {}
+        for row, item in enumerate(item_indices):
+            start, end = block.indptr[row], block.indptr[row + 1]
+            cols, sims = block.indices[start:end], block.data[start:end]
+            keep = (cols != item) & (sims > 0)
+            cols, sims = cols[keep], sims[keep]
+            if len(sims) == 0: # No co-ratings: leave the book out rather than store an empty list
+                continue
+            if len(sims) > k:
+                top = np.argpartition(-sims, k)[:k]
+                cols, sims = cols[top], sims[top]
+            order = np.argsort(-sims, kind="stable")
+            neighbors[int(self.items[item])] = (self.items[cols[order]].astype(np.int64), sims[order].astype(np.float32))
+        return neighbors
+
+
+class ItemItemRecommender:
+    """
+    Item-item collaborative filtering over the review table.
+
+    Top-K cosine neighbors are precomputed per book with vectorized SciPy
+    sparse products. New reviews are folded in incrementally: only the
+    touched books' neighbor lists are recomputed (and patched into their
+    neighbors' lists); a periodic full rebuild corrects any drift. Serving a
+    user only combines the precomputed lists of the books they rated.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        k: int = settings.RECOMMENDER_NEIGHBORS,
+        refresh_interval: float = settings.RECOMMENDER_REFRESH_SECONDS,
+        full_rebuild_interval: float = settings.RECOMMENDER_FULL_REBUILD_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.k = k
+        self.refresh_interval = refresh_interval
+        self.full_rebuild_interval = full_rebuild_interval
+
+        self.matrix = RatingMatrix.empty()
+        self.neighbors: Dict[int, Neighbors] = {}
+        self.popular: List[int] = []
+        self._pending: List[Tuple[int, int, int]] = []
+        self._last_full_rebuild: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    # --- Building ---
+
+    async def rebuild(self) -> None:
+        """Full rebuild from the review table."""
+        async with self._lock:
+            # Cleared before reading: a review seen twice is averaged away, a missed one is not
+            self._pending.clear()
+            async with self.session_factory() as db:
+                result = await db.execute(select(Review.user_id, Review.book_id, Review.rating).where(Review.rating.is_not(None)))
+                rows = result.all()
+                popular = await self._load_popular(db)
+
+            def build():
+                users = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+                books = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+                ratings = np.fromiter((r[2] for r in rows), dtype=np.float32, count=len(rows))
+                matrix = RatingMatrix(users, books, ratings)
+                return matrix, matrix.top_k_neighbors(np.arange(len(matrix.items)), self.k)
+
+            # NumPy/SciPy release the GIL for the heavy parts; keep the loop responsive
+            self.matrix, self.neighbors = await asyncio.to_thread(build)
+            self.popular = popular
+            self._last_full_rebuild = time.monotonic()
+            print(f"Recommender rebuilt: {len(self.matrix.items)} books, {len(rows)} ratings.")
+
+    async def refresh(self) -> None:
+        """Fold pending reviews into the model, recomputing only the touched books."""
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            async with self.session_factory() as db:
+                self.popular = await self._load_popular(db)
+
+            def update():
+                matrix = self.matrix.extend(pending)
+                touched = np.array(
+                    sorted({matrix.item_index(book_id) for _, book_id, _ in pending}), dtype=np.int64
+                )
+                return matrix, matrix.top_k_neighbors(touched, self.k)
+
+            matrix, updated = await asyncio.to_thread(update)
+            neighbors = dict(self.neighbors)
+            neighbors.update(updated)
+            # Similarity is symmetric: patch touched books into their neighbors' lists
+            for book_id, (neighbor_ids, sims) in updated.items():
+                for neighbor_id, sim in zip(neighbor_ids.tolist(), sims.tolist()):
+                    if neighbor_id not in updated:
+                        neighbors[neighbor_id] = self._merge(neighbors.get(neighbor_id), book_id, sim)
+            self.matrix, self.neighbors = matrix, neighbors
+
+    def _merge(self, current: Optional[Neighbors], book_id: int, sim: float) -> Neighbors:
+        if current is None:
+            ids, sims = np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        else:
+            ids, sims = current
+        keep = ids != book_id
+        ids = np.append(ids[keep], book_id)
+        sims = np.append(sims[keep], np.float32(sim))
+        order = np.argsort(-sims, kind="stable")[: self.k]
+        return ids[order], sims[order]
+
+    async def _load_popular(self, db: AsyncSession) -> List[int]:
+        """Cold-start list: Bayesian-average rating from the materialized aggregates."""
+        prior_count, prior_mean = 10.0, 3.0
+        score = (Book.rating_sum + prior_count * prior_mean) / (Book.rated_count + prior_count)
+        result = await db.execute(
+            select(Book.id).order_by(score.desc(), Book.review_count.desc(), Book.id).limit(settings.RECOMMENDER_POPULAR_SIZE)
+        )
+        return list(result.scalars().all())
+
+    def record_review(self, user_id: int, book_id: int, rating: Optional[int]) -> None:
+        """Queue a new review for the next incremental refresh."""
+        if rating is not None:
+            self._pending.append((user_id, book_id, rating))
+
+    # --- Serving ---
+
+    def score(self, user_ratings: Sequence[Tuple[int, int]], limit: int) -> List[int]:
+        """
+        Rank unseen books for a user from their (book_id, rating) pairs:
+        score = sum(sim * rating) / (sum(sim) + 1), which shrinks books that
+        are only weakly connected to the user's history.
+        """
+        rated: Set[int] = {book_id for book_id, _ in user_ratings}
+        candidate_ids, weighted, weights = [], [], []
+        for book_id, rating in user_ratings:
+            entry = self.neighbors.get(book_id)
+            if entry is None or rating is None:
+                continue
+            ids, sims = entry
+            candidate_ids.append(ids)
+            weighted.append(sims * np.float32(rating))
+            weights.append(sims)
+
+        ranked: List[int] = []
+        if candidate_ids:
+            ids = np.concatenate(candidate_ids)
+            unique_ids, inverse = np.unique(ids, return_inverse=True)
+            numerator = np.bincount(inverse, weights=np.concatenate(weighted))
+            denominator = np.bincount(inverse, weights=np.concatenate(weights))
+            scores = numerator / (denominator + 1.0)
+            for i in np.argsort(-scores, kind="stable"):
+                book_id = int(unique_ids[i])
+                if book_id not in rated:
+                    ranked.append(book_id)
+                    if len(ranked) == limit:
+                        return ranked
+
+        # Cold start (or not enough neighbors): fill up with popular books
+        seen = rated.union(ranked)
+        for book_id in self.popular:
+            if len(ranked) == limit:
+                break
+            if book_id not in seen:
+                ranked.append(book_id)
+        return ranked
+
+    async def recommend(self, db: AsyncSession, user_id: int, limit: int) -> List[int]:
+        """Recommended book ids for a user, best first."""
+        result = await db.execute(select(Review.book_id, Review.rating).where(Review.user_id == user_id))
+        user_ratings = result.all()
+        ranked = self.score(user_ratings, limit)
+        if not self.popular and len(ranked) < limit:
+            # Model not built yet (e.g. right after startup): popularity straight from the DB
+            self.popular = await self._load_popular(db)
+            ranked = self.score(user_ratings, limit)
+        return ranked
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                due = self._last_full_rebuild is None or time.monotonic() - self._last_full_rebuild >= self.full_rebuild_interval
+                if due:
+                    await self.rebuild()
+                else:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Recommender refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Instantiate the recommender once
+recommender = ItemItemRecommender()
@@ -1,13 +1,34 @@
-from typing import List, Optional
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
+from app.core.config import settings
+from app.core.response_cache import response_cache, book_tag, reviews_tag, TAG_BOOK_LISTS
+from app.db.session import AsyncSessionLocal
+from app.models.book import Book
 from app.models.review import Review
-from app.schemas.review import ReviewCreate
+from app.models.review_summary import ReviewSummary
+from app.schemas.review import ReviewCreate, ReviewBulkItem, ReviewBulkReport, ReviewBulkError
+from app.services.review_summary_service import mark_stale, mark_stale_many, review_summary_refresher
+from app.services.rating_service import apply_review_rating, apply_review_ratings
+from app.services.recommendation_engine import recommender
+
 
-async def get_reviews_by_book_id(db: AsyncSession, book_id: int, skip: int = 0, limit: int = 100) -> List[Review]:
-    """Retrieve all reviews for a specific book."""
-    stmt = select(Review).where(Review.book_id == book_id).offset(skip).limit(limit)
+class BookNotFound(LookupError):
+    """The review's book does not exist."""
+
+async def get_reviews_by_book_id(
+    db: AsyncSession, book_id: int, after_id: Optional[int] = None, limit: int = 100
+) -> List[Review]:
+    """Retrieve reviews for a specific book in id order, starting after `after_id` (keyset pagination)."""
+    stmt = select(Review).where(Review.book_id == book_id)
+    if after_id is not None:
+        stmt = stmt.where(Review.id > after_id)
+    stmt = stmt.order_by(Review.id).limit(limit)
     result = await db.execute(stmt)
     return list(result.scalars().all())
 
@@ -22,6 +43,174 @@ async def create_review(db: AsyncSession, book_id: int, user_id: int, review_in:
     )
     
     db.add(db_review)
+    # Maintain the book's rating aggregates atomically with the insert
+    await apply_review_rating(db, book_id, review_in.rating)
+    # Flag the stored review summary as stale in the same transaction
+    summary_row = await mark_stale(db, book_id)
     await db.commit()
     await db.refresh(db_review)
-    return db_review
\ No newline at end of file
+    # The book's rating fields changed too, so its cached representations go as well
+    response_cache.invalidate(reviews_tag(book_id), book_tag(book_id), TAG_BOOK_LISTS)
+
+    review_summary_refresher.note_stale(summary_row)
+    recommender.record_review(user_id, book_id, review_in.rating)
+    return db_review
+
+
+# --- Batched writes ---
+
+async def existing_book_ids(db: AsyncSession, book_ids: Set[int]) -> Set[int]:
+    """The subset of `book_ids` that exist, in one IN query."""
+    if not book_ids:
+        return set()
+    result = await db.execute(select(Book.id).where(Book.id.in_(book_ids)))
+    return set(result.scalars().all())
+
+async def insert_reviews(db: AsyncSession, rows: List[Dict[str, Any]]) -> Tuple[List[Review], List[ReviewSummary]]:
+    """
+    Insert review rows whose books exist, in the caller's transaction, with a
+    fixed number of statements however many rows there are: a multi-row
+    INSERT ... RETURNING, one executemany UPDATE for the rating aggregates of
+    every touched book and one for their review summaries.
+    Returns the reviews (ids set) and the touched summary rows.
+    """
+    result = await db.execute(insert(Review).returning(Review.id, sort_by_parameter_order=True), rows)
+    review_ids = list(result.scalars().all())
+
+    ratings_by_book: Dict[int, List[Optional[int]]] = defaultdict(list)
+    for row in rows:
+        ratings_by_book[row["book_id"]].append(row["rating"])
+    await apply_review_ratings(db, ratings_by_book)
+    summaries = await mark_stale_many(db, {book_id: len(ratings) for book_id, ratings in ratings_by_book.items()})
+    return [Review(id=review_id, **row) for review_id, row in zip(review_ids, rows)], summaries
+
+def _after_commit(reviews: List[Review], summaries: List[ReviewSummary]) -> None:
+    book_ids = {review.book_id for review in reviews}
+    response_cache.invalidate(*[reviews_tag(book_id) for book_id in book_ids], *[book_tag(book_id) for book_id in book_ids], TAG_BOOK_LISTS)
+    for summary_row in summaries:
+        review_summary_refresher.note_stale(summary_row)
+    for review in reviews:
+        recommender.record_review(review.user_id, review.book_id, review.rating)
+
+async def create_reviews_bulk(db: AsyncSession, default_user_id: int, items: List[Any]) -> ReviewBulkReport:
+    """
+    Validate and insert many reviews in one transaction. Items that fail
+    validation or name an unknown book are reported by index and skipped;
+    the rest are inserted together (see `insert_reviews`).
+    """
+    report = ReviewBulkReport()
+
+    def fail(index: int, error: str) -> None:
+        report.failed += 1
+        report.errors.append(ReviewBulkError(index=index, error=error))
+
+    candidates: List[Tuple[int, Dict[str, Any]]] = []
+    for index, item in enumerate(items):
+        try:
+            review_in = ReviewBulkItem.model_validate(item)
+        except ValidationError as e:
+            fail(index, str(e))
+            continue
+        candidates.append((index, {
+            "book_id": review_in.book_id,
+            "user_id": review_in.user_id if review_in.user_id is not None else default_user_id,
+            "review_text": review_in.review_text,
+            "rating": review_in.rating,
+        }))
+
+    existing = await existing_book_ids(db, {row["book_id"] for _, row in candidates})
+    rows = []
+    for index, row in candidates:
+        if row["book_id"] in existing:
+            rows.append(row)
+        else:
+            fail(index, "Book not found")
+    if not rows:
+        return report
+
+    reviews, summaries = await insert_reviews(db, rows)
+    await db.commit()
+    _after_commit(reviews, summaries)
+    report.inserted = len(reviews)
+    report.review_ids = [review.id for review in reviews]
+    return report
+
+
+class ReviewWriteBuffer:
+    """
+    Group commit for single-review POSTs.
+
+    The first write to arrive is flushed right away, so an idle server adds
+    no latency. Writes that arrive while a flush is running queue up and go
+    out together in the next one (up to `max_batch`), sharing one transaction
+    and one set of batched statements. Each caller still gets its own result:
+    its review, or BookNotFound. A database error fails the whole micro-batch.
+    """
+    def __init__(self, sessions: Callable[[], AsyncSession] = AsyncSessionLocal, max_batch: int = settings.REVIEW_WRITE_MAX_BATCH):
+        self.sessions = sessions
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def submit(self, book_id: int, user_id: int, review_in: ReviewCreate) -> Review:
+        row = {"book_id": book_id, "user_id": user_id, "review_text": review_in.review_text, "rating": review_in.rating}
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if self._task is None or self._task.done():
+            # Runs on its own so a cancelled caller cannot abort other callers' writes
+            self._task = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        self.writes += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            async with self.sessions() as db:
+                existing = await existing_book_ids(db, {row["book_id"] for row, _ in batch})
+                rows = [row for row, _ in batch if row["book_id"] in existing]
+                reviews, summaries = await insert_reviews(db, rows) if rows else ([], [])
+                await db.commit()
+        except Exception as e:
+            print(f"Review write batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        _after_commit(reviews, summaries)
+        inserted = iter(reviews)
+        for row, future in batch:
+            result = next(inserted) if row["book_id"] in existing else None
+            if future.done(): # Caller went away; the write stands
+                continue
+            if result is None:
+                future.set_exception(BookNotFound(f"Book {row['book_id']} not found"))
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending": len(self._pending),
+        }
+
+    async def stop(self) -> None:
+        """Let queued writes finish (their callers are still waiting)."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+# Instantiate the buffer once
+review_write_buffer = ReviewWriteBuffer()
\ No newline at end of file
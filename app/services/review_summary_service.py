@@ -0,0 +1,267 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, select, update, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai_models.llm_client import llm_client, LLMError
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.review import Review
+from app.models.review_summary import ReviewSummary
+
+# Freshness states reported by GET /books/{id}/summary
+FRESHNESS_NONE = "none"         # No reviews yet
+FRESHNESS_PENDING = "pending"   # Reviews exist but no summary has been generated
+FRESHNESS_STALE = "stale"       # Summary exists, newer reviews are waiting
+FRESHNESS_FRESH = "fresh"       # Summary covers every review
+
+
+async def mark_stale(db: AsyncSession, book_id: int) -> ReviewSummary:
+    """
+    Record a new review against the stored summary in the caller's transaction.
+    The counter is incremented in SQL so concurrent reviews do not lose updates.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(ReviewSummary)
+        .where(ReviewSummary.book_id == book_id)
+        .values(
+            pending_reviews=ReviewSummary.pending_reviews + 1,
+            stale_since=func.coalesce(ReviewSummary.stale_since, now),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Books created before summaries were stored have no row yet
+        db.add(ReviewSummary(book_id=book_id, last_review_id=0, pending_reviews=1, stale_since=now))
+    await db.flush()
+    row = await db.get(ReviewSummary, book_id)
+    await db.refresh(row)
+    return row
+
+async def mark_stale_many(db: AsyncSession, new_reviews: Dict[int, int]) -> List[ReviewSummary]:
+    """
+    Batch form of `mark_stale` for {book_id: number of new reviews}: one
+    executemany UPDATE and one SELECT, whatever the number of books.
+    """
+    if not new_reviews:
+        return []
+    now = datetime.now(timezone.utc)
+    table = ReviewSummary.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.book_id == bindparam("b_book_id"))
+        .values(
+            pending_reviews=table.c.pending_reviews + bindparam("b_new"),
+            stale_since=func.coalesce(table.c.stale_since, now),
+        ),
+        [{"b_book_id": book_id, "b_new": count} for book_id, count in new_reviews.items()],
+    )
+    result = await db.execute(
+        select(ReviewSummary)
+        .where(ReviewSummary.book_id.in_(list(new_reviews)))
+        .execution_options(populate_existing=True)
+    )
+    rows = {row.book_id: row for row in result.scalars().all()}
+    for book_id, count in new_reviews.items():
+        if book_id not in rows: # Books created before summaries were stored
+            rows[book_id] = ReviewSummary(book_id=book_id, last_review_id=0, pending_reviews=count, stale_since=now)
+            db.add(rows[book_id])
+    await db.flush()
+    return list(rows.values())
+
+async def get_review_summary(db: AsyncSession, book_id: int) -> Optional[ReviewSummary]:
+    """Retrieve the stored review summary row for a book."""
+    return await db.get(ReviewSummary, book_id)
+
+def describe(row: Optional[ReviewSummary]) -> Dict[str, Any]:
+    """Summary text plus freshness metadata for API responses."""
+    if row is None or (row.summary is None and row.pending_reviews == 0):
+        return {
+            "review_sentiment_summary": "No reviews yet.",
+            "review_summary_status": FRESHNESS_NONE,
+            "review_summary_generated_at": None,
+            "review_summary_pending_reviews": 0,
+        }
+    if row.summary is None:
+        status = FRESHNESS_PENDING
+    elif row.pending_reviews > 0:
+        status = FRESHNESS_STALE
+    else:
+        status = FRESHNESS_FRESH
+    return {
+        "review_sentiment_summary": row.summary or "Review summary pending generation.",
+        "review_summary_status": status,
+        "review_summary_generated_at": row.generated_at.isoformat() if row.generated_at else None,
+        "review_summary_pending_reviews": row.pending_reviews,
+    }
+
+
+async def load_recent_reviews(db: AsyncSession, book_id: int) -> Tuple[Optional[int], str]:
+    """
+    Newest review texts for the LLM prompt, plus the watermark (newest review id).
+    Returns (None, "") when the book has no reviews.
+    """
+    review_results = await db.execute(
+        select(Review.id, Review.review_text)
+        .where(Review.book_id == book_id)
+        .order_by(desc(Review.id)) # Get newest reviews
+        .limit(20) # Limit the amount of text sent to the LLM
+    )
+    rows = review_results.all()
+    if not rows:
+        return None, ""
+    return rows[0][0], "\n---\n".join([r[1] for r in rows if r[1]])
+
+async def store_review_summary(db: AsyncSession, book_id: int, watermark: int, summary: str) -> ReviewSummary:
+    """
+    Save a regenerated summary and recount the reviews written after its watermark.
+    A summary with an older watermark than the stored one (a slower refresh or
+    stream finishing last) is dropped; the stored row is returned unchanged.
+    """
+    # Reviews written while the LLM was running stay pending
+    newer = await db.scalar(
+        select(func.count(Review.id)).where(Review.book_id == book_id, Review.id > watermark)
+    )
+    values = {
+        "summary": summary,
+        "last_review_id": watermark,
+        "generated_at": datetime.now(timezone.utc),
+        "pending_reviews": newer or 0,
+    }
+    if not newer:
+        values["stale_since"] = None
+    # Conditional on the watermark, so concurrent writers cannot go backwards
+    result = await db.execute(
+        update(ReviewSummary)
+        .where(ReviewSummary.book_id == book_id, ReviewSummary.last_review_id <= watermark)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0 and await db.get(ReviewSummary, book_id) is None:
+        # Books created before summaries were stored have no row yet
+        db.add(ReviewSummary(book_id=book_id, **{"stale_since": values["generated_at"] if newer else None, **values}))
+    await db.commit()
+    return await db.get(ReviewSummary, book_id, populate_existing=True)
+
+
+class ReviewSummaryRefresher:
+    """
+    Debounced regeneration of stored review summaries.
+
+    A book is regenerated shortly after it accumulates `min_new_reviews` new
+    reviews (or gets its first one), and otherwise at most `max_staleness`
+    seconds after it went stale. Reads never call the LLM.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        min_new_reviews: int = settings.REVIEW_SUMMARY_MIN_NEW_REVIEWS,
+        max_staleness: float = settings.REVIEW_SUMMARY_MAX_STALENESS_SECONDS,
+        debounce: float = settings.REVIEW_SUMMARY_DEBOUNCE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.min_new_reviews = min_new_reviews
+        self.max_staleness = max_staleness
+        self.debounce = debounce
+        # book_id -> (scheduled fire time, timer handle)
+        self._timers: Dict[int, Any] = {}
+        self._running: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def note_stale(self, row: ReviewSummary) -> None:
+        """Schedule regeneration for a book whose summary just went stale."""
+        if row.pending_reviews <= 0:
+            return
+        if row.summary is None or row.pending_reviews >= self.min_new_reviews:
+            delay = self.debounce
+        else:
+            age = 0.0
+            if row.stale_since is not None:
+                stale_since = row.stale_since
+                if stale_since.tzinfo is None: # SQLite drops the timezone
+                    stale_since = stale_since.replace(tzinfo=timezone.utc)
+                age = (datetime.now(timezone.utc) - stale_since).total_seconds()
+            delay = max(self.max_staleness - age, self.debounce)
+        self._schedule(row.book_id, delay)
+
+    def _schedule(self, book_id: int, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        fire_at = loop.time() + delay
+        existing = self._timers.get(book_id)
+        if existing is not None:
+            if existing[0] <= fire_at:
+                return # An earlier (or equal) regeneration is already planned
+            existing[1].cancel()
+        handle = loop.call_at(fire_at, self._fire, book_id)
+        self._timers[book_id] = (fire_at, handle)
+
+    def _fire(self, book_id: int) -> None:
+        self._timers.pop(book_id, None)
+        if book_id in self._running:
+            # Reviews arrived during a regeneration; look again after it finishes
+            self._schedule(book_id, self.debounce)
+            return
+        task = asyncio.create_task(self.refresh(book_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def refresh(self, book_id: int) -> Optional[ReviewSummary]:
+        """Regenerate and store the summary for one book."""
+        self._running.add(book_id)
+        try:
+            async with self.session_factory() as db:
+                watermark, review_texts = await load_recent_reviews(db, book_id)
+                if watermark is None:
+                    return None
+
+                summary = "No review text provided."
+                if review_texts:
+                    try:
+                        summary = await llm_client.generate_review_summary(review_texts)
+                    except LLMError as e:
+                        # Keep serving the previous summary; the next review or read retries
+                        print(f"Review summary refresh failed for book {book_id}: {e}")
+                        return None
+
+                row = await store_review_summary(db, book_id, watermark, summary)
+        except Exception as e:
+            print(f"Review summary refresh crashed for book {book_id}: {e}")
+            return None
+        finally:
+            self._running.discard(book_id)
+
+        if row.pending_reviews:
+            self.note_stale(row)
+        return row
+
+    async def store(self, book_id: int, watermark: int, summary: str) -> Optional[ReviewSummary]:
+        """Persist a summary generated elsewhere (e.g. streamed to a client) in a fresh session."""
+        try:
+            async with self.session_factory() as db:
+                row = await store_review_summary(db, book_id, watermark, summary)
+        except Exception as e:
+            print(f"Storing review summary failed for book {book_id}: {e}")
+            return None
+        if row.pending_reviews:
+            self.note_stale(row)
+        return row
+
+    def ensure_scheduled(self, row: Optional[ReviewSummary]) -> None:
+        """Called on reads so stale summaries are picked up again after a restart."""
+        if row is not None and row.pending_reviews > 0 and row.book_id not in self._timers:
+            self.note_stale(row)
+
+    async def stop(self) -> None:
+        for _, handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Instantiate the refresher once
+review_summary_refresher = ReviewSummaryRefresher()
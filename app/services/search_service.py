@@ -0,0 +1,69 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.book import Book
+
+# Both queries expose a `score` where higher is better, so keyset pagination
+# on (score DESC, id ASC) works the same on either backend.
+# ts_rank_cd returns float4; the casts keep cursor comparisons exact and give
+# asyncpg concrete parameter types.
+
+_PG_SEARCH_SQL = """
+SELECT id, score FROM (
+    SELECT id, ts_rank_cd(search_vector, websearch_to_tsquery('english', :q)) AS score
+    FROM book
+    WHERE search_vector @@ websearch_to_tsquery('english', :q)
+) ranked
+WHERE CAST(:after_id AS INTEGER) IS NULL
+   OR score < CAST(:after_score AS REAL)
+   OR (score = CAST(:after_score AS REAL) AND id > CAST(:after_id AS INTEGER))
+ORDER BY score DESC, id ASC
+LIMIT :limit
+"""
+
+_SQLITE_SEARCH_SQL = """
+SELECT id, score FROM (
+    SELECT rowid AS id, -bm25(book_fts, 4.0, 4.0, 2.0, 1.0) AS score
+    FROM book_fts
+    WHERE book_fts MATCH :q
+) ranked
+WHERE :after_id IS NULL OR score < :after_score OR (score = :after_score AND id > :after_id)
+ORDER BY score DESC, id ASC
+LIMIT :limit
+"""
+
+def _fts5_query(q: str) -> str:
+    """Quote every term so user input is never parsed as FTS5 syntax (terms are ANDed)."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+async def search_books(
+    db: AsyncSession,
+    q: str,
+    limit: int = 50,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[Tuple[Book, float]]:
+    """
+    Ranked full-text search over title, author, genre and summary.
+    `after` is the (score, id) of the last hit on the previous page.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        sql, query = _PG_SEARCH_SQL, q
+    else:
+        sql, query = _SQLITE_SEARCH_SQL, _fts5_query(q)
+
+    after_score, after_id = after if after is not None else (None, None)
+    result = await db.execute(
+        text(sql),
+        {"q": query, "limit": limit, "after_score": after_score, "after_id": after_id},
+    )
+    hits = result.all()
+    if not hits:
+        return []
+
+    # Hydrate the matching books in one query and restore the ranked order
+    books = await db.execute(select(Book).where(Book.id.in_([hit.id for hit in hits])))
+    by_id = {book.id: book for book in books.scalars().all()}
+    return [(by_id[hit.id], float(hit.score)) for hit in hits if hit.id in by_id]
@@ -0,0 +1,210 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Set
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai_models.llm_client import LLMError
+from app.ai_models.summarizer import summarize_book
+from app.services.embedding_service import embedding_service
+from app.core.config import settings
+from app.core.response_cache import response_cache, book_tag, TAG_BOOK_LISTS
+from app.db.session import AsyncSessionLocal
+from app.models.book import Book, SUMMARY_READY, SUMMARY_FAILED
+from app.models.summary_job import SummaryJob, JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED
+
+
+async def enqueue_summary_job(db: AsyncSession, book_id: int, content: str) -> SummaryJob:
+    """
+    Add a summary job to the caller's session. It becomes durable when the
+    caller commits, i.e. in the same transaction as the book itself.
+    """
+    job = SummaryJob(book_id=book_id, content=content, status=JOB_PENDING)
+    db.add(job)
+    return job
+
+
+class SummaryWorker:
+    """
+    Pool of asyncio tasks that fill in book summaries from the `summaryjob` table.
+
+    The in-memory queue only carries job ids; the table is the source of truth.
+    Jobs created in this process are handed over with `notify()`; the table is
+    also polled for pending jobs stored elsewhere (the import script, retries
+    after a backoff) and for running ones whose claim has outlived the lease
+    (their worker died). A job is claimed with a conditional UPDATE, so it runs
+    once even when several processes share the table.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        concurrency: int = settings.SUMMARY_WORKER_CONCURRENCY,
+        max_attempts: int = settings.SUMMARY_JOB_MAX_ATTEMPTS,
+        retry_backoff: float = settings.SUMMARY_JOB_RETRY_BACKOFF_SECONDS,
+        lease_seconds: float = settings.SUMMARY_JOB_LEASE_SECONDS,
+        poll_seconds: float = settings.SUMMARY_JOB_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[int] = set()
+        self._in_flight: Set[int] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def notify(self, job_id: int) -> None:
+        """Hand a committed job to the pool."""
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def start(self) -> None:
+        """Recover unfinished jobs from the database and start the workers and the poller."""
+        if self.running:
+            return
+        await self.poll()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._poll_forever()))
+        print(f"Summary worker started with {self.concurrency} workers.")
+
+    async def poll(self) -> None:
+        """Queue the pending jobs that are due, after taking back expired claims."""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            # A claim older than the lease was left by a worker that died; a fresh one may
+            # belong to another process that is still generating
+            expired = now - timedelta(seconds=self.lease_seconds)
+            await db.execute(
+                update(SummaryJob)
+                .where(
+                    SummaryJob.status == JOB_RUNNING,
+                    or_(SummaryJob.claimed_at.is_(None), SummaryJob.claimed_at < expired),
+                )
+                .values(status=JOB_PENDING, claimed_at=None)
+            )
+            await db.commit()
+            result = await db.execute(
+                select(SummaryJob.id)
+                .where(
+                    SummaryJob.status == JOB_PENDING,
+                    or_(SummaryJob.retry_at.is_(None), SummaryJob.retry_at <= now),
+                )
+                .order_by(SummaryJob.id)
+            )
+            for job_id in result.scalars().all():
+                self.notify(job_id)
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Summary job poll failed: {e}")
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs stay in the table for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                # An id can be queued again while it runs (retry timer, poll); process each job once at a time
+                if job_id in self._in_flight:
+                    continue
+                self._in_flight.add(job_id)
+                try:
+                    await self._process(job_id)
+                finally:
+                    self._in_flight.discard(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Summary job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: int) -> None:
+        async with self.session_factory() as db:
+            # Only the worker whose UPDATE matches the pending row gets the job
+            claimed = await db.execute(
+                update(SummaryJob)
+                .where(SummaryJob.id == job_id, SummaryJob.status == JOB_PENDING)
+                .values(status=JOB_RUNNING, attempts=SummaryJob.attempts + 1, claimed_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if claimed.rowcount == 0:
+                return
+
+            job = await db.get(SummaryJob, job_id)
+            if job is None:
+                return # Deleted along with its book since the claim
+            book = await db.get(Book, job.book_id)
+            if book is None:
+                job.status = JOB_FAILED
+                job.last_error = "Book no longer exists."
+                await db.commit()
+                return
+
+            # Long manuscripts are summarized map-reduce style in chunks
+            try:
+                summary, _ = await summarize_book(job.content, book.title)
+                error = None
+            except LLMError as e:
+                # The reason goes to the job row only; the book never shows error text
+                summary, error = None, str(e)
+
+            if summary:
+                book.summary = summary
+                book.summary_status = SUMMARY_READY
+                book.version = Book.version + 1
+                job.status = JOB_DONE
+                job.last_error = None
+                await db.commit()
+                response_cache.invalidate(book_tag(book.id), TAG_BOOK_LISTS)
+                # Keep the semantic index in step with the new summary; a failure here is not a job failure
+                await embedding_service.index_book(book)
+                return
+
+            job.last_error = error
+            if job.attempts >= self.max_attempts:
+                job.status = JOB_FAILED
+                book.summary_status = SUMMARY_FAILED
+                book.summary = "Summary generation failed or is pending."
+                book.version = Book.version + 1
+                await db.commit()
+                response_cache.invalidate(book_tag(book.id), TAG_BOOK_LISTS)
+                return
+
+            # Exponential backoff before the job is picked up again (by any process's poll)
+            delay = self.retry_backoff * (2 ** (job.attempts - 1))
+            job.status = JOB_PENDING
+            job.claimed_at = None
+            job.retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await db.commit()
+
+        asyncio.get_running_loop().call_later(delay, self.notify, job_id)
+
+    async def drain(self) -> None:
+        """Wait until every queued job has been processed (useful in tests and scripts)."""
+        await self._queue.join()
+
+
+# Instantiate the worker pool once
+summary_worker = SummaryWorker()
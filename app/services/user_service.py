@@ -3,8 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.schemas.user import UserCreate, UserAccessUpdate
+from app.core.security import password_hasher
+from app.core.principal_cache import principal_cache
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Retrieve a user by their email address."""
@@ -13,7 +14,8 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     """Create a new user with a hashed password."""
-    hashed_password = get_password_hash(user_in.password)
+    # bcrypt runs in the hashing pool, not on the event loop
+    hashed_password = await password_hasher.hash(user_in.password)
     
     # Create the User model instance
     db_user = User(
@@ -26,4 +28,26 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, db_user: User, hashed_password: str) -> User:
+    """Replace a user's stored hash (used to upgrade the work factor on login)."""
+    db_user.hashed_password = hashed_password
+    await db.commit()
+    return db_user
+
+async def update_user_access(db: AsyncSession, user_id: int, access_in: UserAccessUpdate) -> Optional[User]:
+    """Change a user's role and/or active flag and drop their cached principal."""
+    db_user = await db.get(User, user_id)
+    if db_user:
+        update_data = access_in.model_dump(exclude_unset=True)
+        if "is_active" in update_data:
+            update_data["is_active"] = int(update_data["is_active"])
+        for key, value in update_data.items():
+            setattr(db_user, key, value)
+
+        await db.commit()
+        await db.refresh(db_user)
+        # Takes effect immediately in this process; other workers see it once their TTL expires
+        principal_cache.invalidate(user_id)
     return db_user
\ No newline at end of file
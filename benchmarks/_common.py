@@ -0,0 +1,64 @@
+"""
+Setup shared by the database benchmarks: engines, schema, bulk seeding and timing.
+
+Importing this module imports the app (and its settings); scripts that
+configure the app through the environment first import it lazily.
+"""
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base_class import Base
+from app.db.session import enable_sqlite_foreign_keys
+from app.models import book, review, user, summary_job, review_summary # Register all tables
+
+SEED_BATCH_SIZE = 10_000
+
+
+def make_engine(db_url: str) -> AsyncEngine:
+    """Engine for a benchmark database; SQLite gets foreign keys (and cascades) like the app."""
+    engine = create_async_engine(db_url, echo=False)
+    if db_url.startswith("sqlite"):
+        enable_sqlite_foreign_keys(engine)
+    return engine
+
+def make_sessions(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def reset_schema(conn: AsyncConnection, count_column=None, rows: Optional[int] = None) -> bool:
+    """
+    Recreate every table empty and return True, unless `count_column` already
+    has exactly `rows` rows: then the seeded data is reused and False returned.
+    """
+    await conn.run_sync(Base.metadata.create_all)
+    if count_column is not None and await conn.scalar(select(func.count(count_column))) == rows:
+        return False
+    await conn.run_sync(Base.metadata.drop_all)
+    await conn.run_sync(Base.metadata.create_all)
+    return True
+
+async def insert_batches(conn: AsyncConnection, model, rows: Iterable[Dict[str, Any]], size: int = SEED_BATCH_SIZE) -> None:
+    """Insert rows with one executemany per `size` rows, without building the whole list."""
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            await conn.execute(insert(model), batch)
+            batch = []
+    if batch:
+        await conn.execute(insert(model), batch)
+
+def median_ms(samples: List[float], digits: int = 3) -> float:
+    return round(statistics.median(samples), digits)
+
+async def timed(coro_factory: Callable[[], Awaitable[Any]], repeat: int, digits: int = 3) -> float:
+    """Median wall time of `repeat` awaited calls, in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    return median_ms(samples, digits)
@@ -0,0 +1,85 @@
+"""
+Batch summary/stats lookup vs. one GET /books/{id}/summary per book.
+
+Usage:
+    python -m benchmarks.bench_batch_summary [--books 100000] [--batch 50] [--db-url sqlite+aiosqlite:///bench_batch.db]
+
+Seeds a synthetic catalog with rating aggregates and stored review summaries,
+then prints one JSON object with the median latency (ms) of fetching stats for
+`--batch` random books: sequentially through the per-book service call, with
+the per-book calls issued concurrently, and with the single batch query.
+Neither path calls the LLM.
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, reset_schema, timed
+from app.models.book import Book, SUMMARY_READY
+from app.models.review_summary import ReviewSummary
+from app.services import book_service
+
+async def seed(engine, books: int) -> None:
+    async with engine.begin() as conn:
+        if not await reset_schema(conn, Book.id, books):
+            return
+        rng = random.Random(0)
+
+        def book_row(i: int) -> dict:
+            counts = [rng.randint(0, 20) for _ in range(5)]
+            return {
+                "title": f"Book {i}", "author": f"Author {i % 997}", "genre": f"Genre {i % 13}",
+                "summary": "x" * 600, "summary_status": SUMMARY_READY,
+                "review_count": sum(counts), "rated_count": sum(counts), "rating_sum": sum((star + 1) * n for star, n in enumerate(counts)),
+                **{f"rating_count_{star + 1}": n for star, n in enumerate(counts)},
+            }
+
+        await insert_batches(conn, Book, (book_row(i) for i in range(books)))
+        await insert_batches(conn, ReviewSummary, (
+            {"book_id": i + 1, "summary": "y" * 400, "last_review_id": 0, "pending_reviews": 0} for i in range(books)
+        ))
+
+async def main(books: int, batch: int, db_url: str, repeat: int) -> None:
+    engine = make_engine(db_url)
+    await seed(engine, books)
+    Session = make_sessions(engine)
+    rng = random.Random(1)
+
+    async def per_book_sequential():
+        ids = rng.sample(range(1, books + 1), batch)
+        async with Session() as db:
+            for book_id in ids:
+                await book_service.get_summary_and_rating(db, book_id)
+
+    async def per_book_concurrent():
+        # One session per request, as the API would use
+        ids = rng.sample(range(1, books + 1), batch)
+
+        async def one(book_id):
+            async with Session() as db:
+                await book_service.get_summary_and_rating(db, book_id)
+
+        await asyncio.gather(*[one(book_id) for book_id in ids])
+
+    async def batched():
+        ids = rng.sample(range(1, books + 1), batch)
+        async with Session() as db:
+            await book_service.get_summaries_and_ratings(db, ids)
+
+    results = {
+        "per_book_sequential_ms": await timed(per_book_sequential, repeat),
+        "per_book_concurrent_ms": await timed(per_book_concurrent, repeat),
+        "batch_ms": await timed(batched, repeat),
+    }
+    await engine.dispose()
+    print(json.dumps({"books": books, "batch": batch, **results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_batch.db")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.batch, args.db_url, args.repeat))
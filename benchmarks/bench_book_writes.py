@@ -0,0 +1,114 @@
+"""
+Round trips and latency of book updates and deletes: the old multi-statement paths vs. single-statement and bulk ones.
+
+Usage:
+    python -m benchmarks.bench_book_writes [--books 2000] [--batch 200] [--db-url sqlite+aiosqlite:///bench_book_writes.db]
+
+Seeds `--books` books with a few reviews each, then prints one JSON object
+with, per operation, the database round trips (statements plus commits) and
+the median latency (ms):
+  * update_legacy: get, ORM attribute update, commit, refresh (the old path);
+  * update: one UPDATE ... RETURNING (`book_service.update_book`);
+  * delete_legacy: one DELETE per dependent table, then the book (the old path);
+  * delete: one DELETE with ON DELETE CASCADE (`book_service.delete_book`);
+  * delete_each / delete_bulk: `--batch` books deleted one call at a time vs.
+    one `book_service.bulk_delete_books` call (round trips for the whole batch).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, median_ms, reset_schema
+from app.models.book import Book
+from app.models.review import Review
+from app.models.review_summary import ReviewSummary
+from app.models.summary_job import SummaryJob
+from app.schemas.book import BookUpdate
+from app.services import book_service
+
+REVIEWS_PER_BOOK = 5
+
+
+class RoundTrips:
+    """Counts statements and commits sent on an engine."""
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._bump)
+        event.listen(engine.sync_engine, "commit", self._bump)
+
+    def _bump(self, *args) -> None:
+        self.count += 1
+
+
+async def seed(engine, books: int) -> None:
+    async with engine.begin() as conn:
+        await reset_schema(conn)
+        await insert_batches(conn, Book, ({"title": f"Book {i}", "author": f"Author {i % 97}"} for i in range(books)))
+        await insert_batches(conn, Review, (
+            {"book_id": book_id, "user_id": n + 1, "rating": n + 1}
+            for book_id in range(1, books + 1) for n in range(REVIEWS_PER_BOOK)
+        ))
+
+async def update_legacy(db: AsyncSession, book_id: int, book_in: BookUpdate) -> None:
+    db_book = await book_service.get_book(db, book_id)
+    for key, value in book_in.model_dump(exclude_unset=True).items():
+        setattr(db_book, key, value)
+    db_book.version = Book.version + 1
+    await db.commit()
+    await db.refresh(db_book)
+
+async def delete_legacy(db: AsyncSession, book_id: int) -> None:
+    await db.execute(delete(Review).where(Review.book_id == book_id))
+    await db.execute(delete(SummaryJob).where(SummaryJob.book_id == book_id))
+    await db.execute(delete(ReviewSummary).where(ReviewSummary.book_id == book_id))
+    await db.execute(delete(Book).where(Book.id == book_id))
+    await db.commit()
+
+async def measure(sessions, trips: RoundTrips, operation, book_ids) -> dict:
+    """Run `operation(db, book_id)` once per id; round trips are per call, latency the median call."""
+    samples, before = [], trips.count
+    for book_id in book_ids:
+        async with sessions() as db:
+            started = time.perf_counter()
+            await operation(db, book_id)
+            samples.append((time.perf_counter() - started) * 1000)
+    return {"round_trips": (trips.count - before) / len(book_ids), "ms": median_ms(samples)}
+
+async def main(books: int, batch: int, db_url: str) -> None:
+    engine = make_engine(db_url)
+    trips = RoundTrips(engine)
+    await seed(engine, books)
+    sessions = make_sessions(engine)
+    changes = BookUpdate(genre="Benchmark")
+    ids = iter(range(1, books + 1))
+
+    def take(n: int) -> list:
+        return [next(ids) for _ in range(n)]
+
+    results = {
+        "update_legacy": await measure(sessions, trips, lambda db, i: update_legacy(db, i, changes), take(batch)),
+        "update": await measure(sessions, trips, lambda db, i: book_service.update_book(db, i, changes), take(batch)),
+        "delete_legacy": await measure(sessions, trips, delete_legacy, take(batch)),
+        "delete": await measure(sessions, trips, book_service.delete_book, take(batch)),
+    }
+    each = await measure(sessions, trips, book_service.delete_book, take(batch))
+    results["delete_each"] = {"round_trips": each["round_trips"] * batch, "ms": round(each["ms"] * batch, 2)}
+    results["delete_bulk"] = await measure(
+        sessions, trips, lambda db, first: book_service.bulk_delete_books(db, range(first, first + batch)), [next(ids)]
+    )
+    await engine.dispose()
+    print(json.dumps({"books": books, "batch": batch, **results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_book_writes.db")
+    args = parser.parse_args()
+    if args.books < 6 * args.batch:
+        parser.error("--books must be at least 6 x --batch")
+    asyncio.run(main(args.books, args.batch, args.db_url))
@@ -0,0 +1,77 @@
+"""
+Streaming export throughput and memory: rows/s and peak RSS growth while exporting reviews.
+
+Usage:
+    python -m benchmarks.bench_export [--reviews 1000000] [--format ndjson|csv] [--gzip]
+                                      [--db-url sqlite+aiosqlite:///bench_export.db]
+
+Seeds a synthetic review corpus, then drains the reviews export (joined to
+books) through the same generator the endpoint uses, discarding the bytes.
+Prints one JSON object with rows/s, output size and how much the process's
+peak RSS grew during the export; with server-side cursors that growth should
+not depend on `--reviews`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, reset_schema
+from app.models.book import Book
+from app.models.review import Review
+from app.services import export_service
+
+BOOKS = 10_000
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+
+async def seed(engine, reviews: int) -> None:
+    async with engine.begin() as conn:
+        if not await reset_schema(conn, Review.id, reviews):
+            return
+        await insert_batches(conn, Book, (
+            {"title": f"Book {i}", "author": f"Author {i % 997}", "genre": f"Genre {i % 13}"} for i in range(BOOKS)
+        ))
+        rng = random.Random(0)
+        await insert_batches(conn, Review, (
+            {"book_id": rng.randrange(BOOKS) + 1, "user_id": rng.randrange(50_000) + 1,
+             "rating": rng.randint(1, 5), "review_text": "Solid read. " * rng.randint(1, 20)}
+            for _ in range(reviews)
+        ), size=20_000)
+
+async def main(reviews: int, fmt: str, compress: bool, db_url: str) -> None:
+    engine = make_engine(db_url)
+    await seed(engine, reviews)
+    sessions = make_sessions(engine)
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    size = chunks = 0
+    async for chunk in export_service.export_rows(sessions, "reviews", fmt, compress=compress):
+        size += len(chunk)
+        chunks += 1
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    print(json.dumps({
+        "reviews": reviews,
+        "format": fmt,
+        "gzip": compress,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(reviews / elapsed),
+        "output_mb": round(size / 2**20, 1),
+        "chunks": chunks,
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=export_service.EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_export.db")
+    args = parser.parse_args()
+    asyncio.run(main(args.reviews, args.format, args.gzip, args.db_url))
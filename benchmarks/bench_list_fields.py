@@ -0,0 +1,84 @@
+"""
+Full ORM + Pydantic list serialization vs. column-only selects encoded with orjson.
+
+Usage:
+    python -m benchmarks.bench_list_fields [--rows 10000] [--summary-chars 1500] [--db-url sqlite+aiosqlite:///bench_fields.db]
+
+Seeds `--rows` books with summaries of `--summary-chars` characters, then
+builds one page holding every row three ways and prints one JSON object with
+the median latency (ms, query + serialization) and payload size (bytes) of each:
+  * orm_pydantic: select(Book) -> Page[Book] -> model_dump_json (the old path);
+  * columns_all: every field, column-only select -> dicts -> orjson;
+  * columns_list: fields=id,title,author,genre, as a listing page would request.
+"""
+import argparse
+import asyncio
+import json
+
+import orjson
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, reset_schema, timed
+from app.models.book import Book, SUMMARY_READY
+from app.schemas.book import Book as BookSchema
+from app.schemas.pagination import Page
+from app.services import book_service
+
+LIST_FIELDS = "id,title,author,genre"
+
+async def seed(engine, rows: int, summary_chars: int) -> None:
+    async with engine.begin() as conn:
+        if not await reset_schema(conn, Book.id, rows):
+            return
+        await insert_batches(conn, Book, (
+            {
+                "title": f"Book {i}", "author": f"Author {i % 997}", "genre": f"Genre {i % 13}",
+                "year_published": 1900 + i % 120, "summary": "x" * summary_chars, "summary_status": SUMMARY_READY,
+                "review_count": i % 50, "rated_count": i % 50, "rating_sum": (i % 50) * 4,
+            }
+            for i in range(rows)
+        ))
+
+async def measure(build, repeat: int) -> dict:
+    sizes = []
+
+    async def sized():
+        sizes.append(len(await build()))
+
+    return {"ms": await timed(sized, repeat, digits=2), "bytes": sizes[-1]}
+
+async def main(rows: int, summary_chars: int, db_url: str, repeat: int) -> None:
+    engine = make_engine(db_url)
+    await seed(engine, rows, summary_chars)
+    Session = make_sessions(engine)
+
+    async def orm_pydantic():
+        async with Session() as db:
+            books = await book_service.get_all_books(db, limit=rows)
+            page = Page[BookSchema].model_validate({"items": books, "next_cursor": None}, from_attributes=True)
+            return page.model_dump_json().encode()
+
+    def columns(fields):
+        selected = book_service.parse_book_fields(fields)
+
+        async def build():
+            async with Session() as db:
+                result = await book_service.get_book_rows(db, selected, limit=rows)
+                return orjson.dumps({"items": book_service.book_rows_to_dicts(result, selected), "next_cursor": None})
+        return build
+
+    results = {
+        "orm_pydantic": await measure(orm_pydantic, repeat),
+        "columns_all": await measure(columns(None), repeat),
+        "columns_list": await measure(columns(LIST_FIELDS), repeat),
+    }
+    await engine.dispose()
+    print(json.dumps({"rows": rows, "summary_chars": summary_chars, **results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--summary-chars", type=int, default=1500)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_fields.db")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.summary_chars, args.db_url, args.repeat))
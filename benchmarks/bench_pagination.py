@@ -0,0 +1,64 @@
+"""
+OFFSET vs keyset pagination latency at increasing page depths.
+
+Usage:
+    python -m benchmarks.bench_pagination [--rows 200000] [--db-url sqlite+aiosqlite:///bench.db]
+
+Prints one JSON object with the median latency (ms) of fetching a 50-row page
+at each depth. Keyset latency should stay flat; OFFSET grows with depth.
+"""
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, reset_schema, timed
+from app.models.book import Book
+from app.services import book_service
+
+PAGE_SIZE = 50
+
+async def seed(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await reset_schema(conn)
+        await insert_batches(conn, Book, (
+            {"title": f"Book {i}", "author": f"Author {i % 997}", "genre": f"Genre {i % 13}", "summary": "x" * 200}
+            for i in range(rows)
+        ))
+
+async def main(rows: int, db_url: str, repeat: int) -> None:
+    engine = make_engine(db_url)
+    await seed(engine, rows)
+    Session = make_sessions(engine)
+
+    depths = [d for d in (0, 1_000, 10_000, 100_000, 1_000_000) if d < rows]
+    results = []
+    async with Session() as db:
+        for depth in depths:
+            async def offset_page():
+                await db.execute(select(Book).order_by(Book.id).offset(depth).limit(PAGE_SIZE))
+                db.expunge_all()
+
+            # Keyset: the cursor for this depth is simply the id of the row before it
+            after_id = depth or None
+            async def keyset_page():
+                await book_service.get_all_books(db, after_id=after_id, limit=PAGE_SIZE)
+                db.expunge_all()
+
+            results.append({
+                "depth": depth,
+                "offset_ms": await timed(offset_page, repeat),
+                "keyset_ms": await timed(keyset_page, repeat),
+            })
+
+    await engine.dispose()
+    print(json.dumps({"rows": rows, "page_size": PAGE_SIZE, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_pagination.db")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.db_url, args.repeat))
@@ -0,0 +1,78 @@
+"""
+Index-backed full-text search vs. a naive ILIKE scan.
+
+Usage:
+    python -m benchmarks.bench_search [--rows 1000000] [--db-url sqlite+aiosqlite:///bench_search.db]
+
+Seeds a synthetic catalog (skipped when the table already holds --rows books),
+then prints one JSON object with the median latency (ms) of each query type
+for a few search terms. Use a postgresql+asyncpg URL to measure the GIN index.
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from sqlalchemy import or_, select
+
+from benchmarks._common import insert_batches, make_engine, make_sessions, reset_schema, timed
+from app.models.book import Book
+from app.services import search_service
+
+WORDS = ("dragon kingdom river empire shadow garden machine ocean winter signal "
+         "harbor forest letter engine silver mountain archive voyage").split()
+TERMS = ["dragon", "silver archive", "voyage winter ocean", "zeppelin"] # The last one matches nothing
+PAGE_SIZE = 50
+
+def random_text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+async def seed(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        if not await reset_schema(conn, Book.id, rows):
+            return
+        rng = random.Random(42)
+        await insert_batches(conn, Book, (
+            {
+                "title": random_text(rng, 3), "author": f"Author {i % 5000}", "genre": rng.choice(WORDS),
+                "summary": random_text(rng, 40), "summary_status": "ready",
+            }
+            for i in range(rows)
+        ))
+
+async def main(rows: int, db_url: str, repeat: int) -> None:
+    engine = make_engine(db_url)
+    await seed(engine, rows)
+    Session = make_sessions(engine)
+
+    results = []
+    async with Session() as db:
+        for term in TERMS:
+            async def indexed():
+                await search_service.search_books(db, term, limit=PAGE_SIZE)
+                db.expunge_all()
+
+            async def ilike_scan():
+                conditions = [
+                    or_(Book.title.ilike(f"%{word}%"), Book.author.ilike(f"%{word}%"), Book.summary.ilike(f"%{word}%"))
+                    for word in term.split()
+                ]
+                await db.execute(select(Book).where(*conditions).limit(PAGE_SIZE))
+                db.expunge_all()
+
+            results.append({
+                "term": term,
+                "fts_ms": await timed(indexed, repeat),
+                "ilike_ms": await timed(ilike_scan, repeat),
+            })
+
+    await engine.dispose()
+    print(json.dumps({"rows": rows, "dialect": engine.dialect.name, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_search.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.db_url, args.repeat))
@@ -0,0 +1,107 @@
+"""
+Cold-start cost of one API replica: import time, time to first response, first-request latency.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--port 8010] [--db-url sqlite+aiosqlite:///bench_startup.db]
+                                       [--importtime 15]
+
+Migrates a scratch database to head once, then for each run:
+  * imports `app.main` in a fresh interpreter (wall time of the import alone);
+  * starts `uvicorn app.main:app` in a fresh process and measures the time
+    until the first request succeeds, then the latency of the first and of a
+    warm GET on the book list.
+
+Prints one JSON object with the median of each measurement (ms) and, with
+`--importtime N`, the N slowest modules from `python -X importtime`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print((time.perf_counter() - t) * 1000)"
+
+def migrate(db_url: str) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", db_url)
+    command.upgrade(config, "head")
+
+def import_ms(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def slowest_imports(env: dict, top: int) -> list:
+    """Slowest modules by cumulative import time, as reported by -X importtime."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, check=True, capture_output=True, text=True
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append({"module": module.strip(), "cumulative_ms": round(int(cumulative) / 1000, 1)})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+async def serve_once(env: dict, port: int) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            while True:
+                try:
+                    # Cheapest route: no database, no auth
+                    if (await client.get("/metrics")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if process.poll() is not None:
+                    raise SystemExit("uvicorn exited during startup")
+                await asyncio.sleep(0.01)
+            ready = time.perf_counter()
+
+            timings = []
+            for _ in range(2):
+                t = time.perf_counter()
+                response = await client.get("/api/v1/books/", params={"limit": 20})
+                response.raise_for_status()
+                timings.append((time.perf_counter() - t) * 1000)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"ready_ms": (ready - started) * 1000, "first_request_ms": timings[0], "warm_request_ms": timings[1]}
+
+async def main(args) -> None:
+    env = {**os.environ, "DATABASE_URL": args.db_url, "DATABASE_REPLICA_URLS": ""}
+    migrate(args.db_url)
+
+    imports = [import_ms(env) for _ in range(args.runs)]
+    runs = [await serve_once(env, args.port) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "import_ms": round(statistics.median(imports), 1),
+        **{key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]},
+    }
+    if args.importtime:
+        report["slowest_imports"] = slowest_imports(env, args.importtime)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_startup.db")
+    parser.add_argument("--importtime", type=int, default=0, help="also list the N slowest imports")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+"""
+Exact vs. approximate (IVF) vector search: latency and recall@k.
+
+Usage:
+    python -m benchmarks.bench_vectors [--rows 200000] [--dim 768] [--queries 100]
+
+Generates clustered synthetic embeddings, so the numbers are indicative of
+the index itself rather than of any embedding model. Prints one JSON object.
+"""
+import argparse
+import json
+import math
+import statistics
+import time
+
+import numpy as np
+
+from app.ai_models.vector_index import VectorIndex
+
+K = 10
+
+def main(rows: int, dim: int, queries: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=rows)
+
+    index = VectorIndex(dim, initial_capacity=rows)
+    for start in range(0, rows, 10_000):
+        end = min(start + 10_000, rows)
+        block = centers[labels[start:end]] + 0.5 * rng.standard_normal((end - start, dim)).astype(np.float32)
+        for offset, vector in enumerate(block):
+            index.upsert(start + offset, vector)
+
+    nlist = max(1, int(4 * math.sqrt(rows)))
+    started = time.perf_counter()
+    index.train_ivf(nlist)
+    train_ms = (time.perf_counter() - started) * 1000
+
+    query_vectors = centers[rng.integers(0, len(centers), size=queries)] + 0.5 * rng.standard_normal((queries, dim)).astype(np.float32)
+
+    exact_results, exact_ms = [], []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        exact_results.append({book_id for book_id, _ in index.search(vector, K)})
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+    approx = []
+    for nprobe in (1, 4, 8, 16, 32):
+        latencies, recalls = [], []
+        for vector, truth in zip(query_vectors, exact_results):
+            started = time.perf_counter()
+            found = {book_id for book_id, _ in index.search(vector, K, approximate=True, nprobe=nprobe)}
+            latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(len(found & truth) / K)
+        approx.append({
+            "nprobe": nprobe,
+            "p50_ms": round(statistics.median(latencies), 3),
+            "recall_at_k": round(statistics.mean(recalls), 4),
+        })
+
+    print(json.dumps({
+        "rows": rows, "dim": dim, "k": K, "nlist": nlist,
+        "train_ms": round(train_ms, 1),
+        "exact_p50_ms": round(statistics.median(exact_ms), 3),
+        "approx": approx,
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.queries, args.seed)
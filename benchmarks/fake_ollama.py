@@ -0,0 +1,76 @@
+"""
+Stand-in for the Ollama API with tunable latency and token rate.
+
+Usage:
+    python -m benchmarks.fake_ollama [--port 11435] [--latency-ms 200] [--tokens-per-second 50] [--tokens 150]
+
+Implements the endpoints LLMClient uses: POST /api/generate (streaming and
+non-streaming) and POST /api/embeddings. Completions are synthetic; only the
+timing matters. Also used in-process by benchmarks.load.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from fastapi import Body, FastAPI
+from fastapi.responses import StreamingResponse
+
+WORDS = "the a story of an reader who finds quiet courage across long winter roads".split()
+
+
+def create_app(latency_ms: float = 200.0, tokens_per_second: float = 50.0, tokens: int = 150, embedding_dim: int = 768) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    app.state.calls = {"generate": 0, "stream": 0, "embeddings": 0}
+
+    def token_delay() -> float:
+        return 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    @app.post("/api/generate")
+    async def generate(payload: dict = Body(...)):
+        rng = random.Random(payload.get("prompt", ""))
+        words = [rng.choice(WORDS) for _ in range(tokens)]
+        if not payload.get("stream", True):
+            app.state.calls["generate"] += 1
+            # Same total time as a stream of the same length
+            await asyncio.sleep(latency_ms / 1000 + tokens * token_delay())
+            return {"model": payload.get("model"), "response": " ".join(words), "done": True}
+
+        app.state.calls["stream"] += 1
+
+        async def lines():
+            await asyncio.sleep(latency_ms / 1000)
+            for word in words:
+                yield json.dumps({"response": word + " ", "done": False}) + "\n"
+                await asyncio.sleep(token_delay())
+            yield json.dumps({"response": "", "done": True}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/api/embeddings")
+    async def embeddings(payload: dict = Body(...)):
+        app.state.calls["embeddings"] += 1
+        await asyncio.sleep(latency_ms / 1000 / 4)
+        # Deterministic per prompt, so similar-book results are stable across runs
+        seed = int.from_bytes(hashlib.sha256(payload.get("prompt", "").encode()).digest()[:8], "big")
+        rng = random.Random(seed)
+        return {"embedding": [rng.uniform(-1, 1) for _ in range(embedding_dim)]}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=150)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.tokens_per_second, args.tokens, args.embedding_dim),
+        host="127.0.0.1", port=args.port, log_level="warning",
+    )
@@ -0,0 +1,334 @@
+"""
+End-to-end load test of the API against a fake Ollama server.
+
+Usage:
+    python -m benchmarks.load [--mode inprocess|uvicorn] [--db-url sqlite+aiosqlite:///bench_load.db]
+                              [--books 10000] [--reviews 50000] [--users 200]
+                              [--concurrency 32] [--duration 30] [--mix list=4,read=6,...]
+                              [--llm-latency-ms 200] [--llm-tokens-per-second 50]
+                              [--output run.json] [--baseline previous.json] [--max-regression 1.25]
+
+Seeds a synthetic catalog, starts the fake Ollama server (benchmarks.fake_ollama)
+on a local port and points LLM_BASE_URL at it. The app runs either in-process
+(ASGI transport, same event loop as the load generator) or as a separate uvicorn
+process. `--concurrency` virtual users log in, then loop over the weighted
+workload mix until `--duration` elapses.
+
+Prints one JSON object with throughput and p50/p95/p99 latency (ms) per
+endpoint. With `--baseline`, endpoints whose p95 grew by more than
+`--max-regression` are listed under "regressions" and the exit code is 1.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "benchpassword"
+DEFAULT_MIX = "login=1,list=4,read=6,review=2,summary=3,summary_stream=1"
+GENRES = ["Fantasy", "Mystery", "Science", "History", "Romance", "Poetry", "Travel", "Horror"]
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_samples)), 1)
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(sorted(unknown))}. Choose from {', '.join(WORKLOADS)}.")
+    return weights
+
+
+# --- Seeding ---
+
+async def seed(db_url: str, books: int, reviews: int, users: int, seed_value: int) -> None:
+    """Fresh schema plus a synthetic catalog; rating aggregates are computed up front."""
+    from benchmarks._common import insert_batches, make_engine, reset_schema
+    from app.core.security import get_password_hash
+    from app.models.book import Book, SUMMARY_READY
+    from app.models.review import Review
+    from app.models.review_summary import ReviewSummary
+    from app.models.user import User
+
+    rng = random.Random(seed_value)
+    engine = make_engine(db_url)
+    async with engine.begin() as conn:
+        await reset_schema(conn)
+
+        # One bcrypt hash shared by every user keeps seeding fast
+        hashed = get_password_hash(PASSWORD)
+        await insert_batches(conn, User, (
+            {"email": f"bench{i}@bench.test", "hashed_password": hashed, "role": "user", "is_active": 1}
+            for i in range(users)
+        ))
+
+        ratings = [(rng.randrange(books) + 1, rng.randrange(users) + 1, rng.randint(1, 5)) for _ in range(reviews)]
+        def empty_stats():
+            return {"rating_sum": 0, "review_count": 0, "rated_count": 0, **{f"rating_count_{s}": 0 for s in range(1, 6)}}
+
+        stats = defaultdict(empty_stats)
+        for book_id, _, rating in ratings:
+            entry = stats[book_id]
+            entry["rating_sum"] += rating
+            entry["review_count"] += 1
+            entry["rated_count"] += 1
+            entry[f"rating_count_{rating}"] += 1
+
+        await insert_batches(conn, Book, (
+            # A fresh table numbers these 1..books, which the workloads rely on
+            {
+                "title": f"Benchmark Book {i}",
+                "author": f"Author {i % 997}",
+                "genre": rng.choice(GENRES),
+                "year_published": 1900 + i % 125,
+                "summary": "A synthetic summary used for load testing. " * 4,
+                "summary_status": SUMMARY_READY,
+                **(stats.get(i + 1) or empty_stats()), # executemany needs identical keys
+            }
+            for i in range(books)
+        ), size=5_000)
+        await insert_batches(conn, Review, (
+            {"book_id": book_id, "user_id": user_id, "rating": rating, "review_text": f"Seeded review rated {rating}."}
+            for book_id, user_id, rating in ratings
+        ))
+        # Reviewed books start with a pending review summary, so reads exercise the refresher
+        await insert_batches(conn, ReviewSummary, (
+            {"book_id": b, "last_review_id": 0, "pending_reviews": s["review_count"]} for b, s in stats.items()
+        ))
+    await engine.dispose()
+
+
+# --- Workloads ---
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def timed(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Dict[str, str]:
+    response = await recorder.timed("login", client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD}))
+    if response is None or response.status_code != 200:
+        return {}
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def read_stream(client: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> httpx.Response:
+    async with client.stream("GET", url, headers=headers) as response:
+        async for _ in response.aiter_bytes():
+            pass
+    return response
+
+WORKLOADS = ("login", "list", "read", "review", "summary", "summary_stream")
+
+async def virtual_user(
+    client: httpx.AsyncClient, recorder: Recorder, index: int, users: int, books: int,
+    mix: Dict[str, float], deadline: float, rng: random.Random,
+) -> None:
+    email = f"bench{index % users}@bench.test"
+    headers = await login(client, recorder, email)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        book_id = rng.randrange(books) + 1
+        if name == "login":
+            headers = await login(client, recorder, email) or headers
+        elif name == "list":
+            params = {"limit": 50}
+            if rng.random() < 0.5:
+                params["genre"] = rng.choice(GENRES)
+            await recorder.timed(name, client.get(f"{API}/books/", params=params, headers=headers))
+        elif name == "read":
+            await recorder.timed(name, client.get(f"{API}/books/{book_id}", headers=headers))
+        elif name == "review":
+            body = {"review_text": "Load test review.", "rating": rng.randint(1, 5)}
+            await recorder.timed(name, client.post(f"{API}/books/{book_id}/reviews", json=body, headers=headers))
+        elif name == "summary":
+            await recorder.timed(name, client.get(f"{API}/books/{book_id}/summary", headers=headers))
+        elif name == "summary_stream":
+            await recorder.timed(name, read_stream(client, f"{API}/books/{book_id}/summary/stream", headers))
+
+
+# --- Servers ---
+
+async def start_fake_ollama(port: int, latency_ms: float, tokens_per_second: float, tokens: int):
+    import uvicorn
+    from benchmarks.fake_ollama import create_app
+
+    fake_app = create_app(latency_ms, tokens_per_second, tokens)
+    server = uvicorn.Server(uvicorn.Config(fake_app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return fake_app, server, task
+
+async def wait_until_up(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/docs")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"API at {base_url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+# --- Report ---
+
+def build_report(recorder: Recorder, elapsed: float, config: Dict[str, Any], llm_calls: Dict[str, int]) -> Dict[str, Any]:
+    endpoints = {}
+    for name in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples = sorted(recorder.samples[name])
+        endpoints[name] = {
+            "count": len(samples),
+            "errors": recorder.errors[name],
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "max_ms": round(samples[-1], 2) if samples else 0.0,
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+        "llm_calls": llm_calls,
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[Dict[str, Any]]:
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        ratio = current["p95_ms"] / previous["p95_ms"]
+        if ratio > max_regression:
+            regressions.append({"endpoint": name, "p95_ms": current["p95_ms"], "baseline_p95_ms": previous["p95_ms"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    mix = parse_mix(args.mix)
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["DATABASE_URL"] = args.db_url
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    os.environ.setdefault("EMBEDDING_INDEX_PATH", "")
+
+    await seed(args.db_url, args.books, args.reviews, args.users, args.seed)
+    fake_app, fake_server, fake_task = await start_fake_ollama(
+        args.llm_port, args.llm_latency_ms, args.llm_tokens_per_second, args.llm_tokens
+    )
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    process = None
+    try:
+        if args.mode == "uvicorn":
+            base_url = f"http://127.0.0.1:{args.port}"
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                env=os.environ.copy(),
+            )
+            await wait_until_up(base_url)
+            client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0)
+            lifespan = None
+        else:
+            from app.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120.0)
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        async with client:
+            await asyncio.gather(*[
+                virtual_user(client, recorder, i, args.users, args.books, mix, deadline, random.Random(rng.random()))
+                for i in range(args.concurrency)
+            ])
+        elapsed = time.perf_counter() - started
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        fake_server.should_exit = True
+        await fake_task
+
+    config = {
+        key: getattr(args, key)
+        for key in ("mode", "workers", "books", "reviews", "users", "concurrency", "duration", "mix",
+                    "llm_latency_ms", "llm_tokens_per_second", "llm_tokens", "seed")
+    }
+    config["db"] = args.db_url.split(":", 1)[0]
+    report = build_report(recorder, elapsed, config, dict(fake_app.state.calls))
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.max_regression)
+        status = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--port", type=int, default=8765, help="API port in uvicorn mode.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench_load.db")
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--reviews", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after login.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Workload weights, e.g. '{DEFAULT_MIX}'.")
+    parser.add_argument("--llm-port", type=int, default=11435)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--llm-tokens", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    parser.add_argument("--baseline", help="Previous report to compare p95 latencies against.")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="Allowed p95 ratio vs. the baseline.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -18,9 +18,10 @@ echo "Ollama service is available. Starting FastAPI..."
 # Since we can't reliably pull from inside the API container, we rely on the user
 # to ensure the model is pulled or wait for the API to retry.
 
-# Run database migrations (optional, but good practice)
-# echo "Running Alembic migrations..."
-# alembic upgrade head
+# Bring the schema up to date before serving (the app no longer creates tables).
+# Databases created by older versions' create_all: run `alembic stamp 0001` once first.
+echo "Running Alembic migrations..."
+alembic upgrade head || exit 1
 
 # Start the application
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
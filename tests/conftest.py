@@ -1,25 +1,35 @@
+import os
+import tempfile
+
 import pytest
-import pytest_asyncio
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from typing import AsyncGenerator
 
 # Import Base and the main FastAPI app
 from app.db.base_class import Base
-from app.db.session import get_db
+from app.db.session import enable_sqlite_foreign_keys, instrument_engine, get_db, get_read_db, get_read_sessionmaker
 from app.main import app
+from app.services.review_service import review_write_buffer
 from app.models.user import User
 from app.core import security
 from app.core.config import settings
 
-ASYNC_DB_URL = "sqlite+aiosqlite:///:memory:"
+# A file rather than :memory:, so every (unpooled) connection sees the same database
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="book-api-tests-"), "test.db")
+ASYNC_DB_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
 
 test_engine = create_async_engine(
     ASYNC_DB_URL, 
     echo=False, 
     poolclass=NullPool
 )
+# Book deletes rely on ON DELETE CASCADE
+enable_sqlite_foreign_keys(test_engine)
+# Query metrics, as the app's own engines have
+instrument_engine(test_engine, "writer")
 
 TestAsyncSessionLocal = async_sessionmaker(
     bind=test_engine, 
@@ -29,40 +39,50 @@ TestAsyncSessionLocal = async_sessionmaker(
 )
 
 
-@pytest_asyncio.fixture
 async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency that yields a session for the test database."""
     async with TestAsyncSessionLocal() as session:
         yield session
 
 app.dependency_overrides[get_db] = override_get_db
+# A single test database plays both primary and replica
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_read_sessionmaker] = lambda: TestAsyncSessionLocal
+# Coalesced review writes open their own sessions
+review_write_buffer.sessions = TestAsyncSessionLocal
 
 
-@pytest_asyncio.fixture(scope="session")
+@pytest.fixture(scope="session")
 def anyio_backend():
     return 'asyncio'
 
-@pytest_asyncio.fixture(scope="session")
+@pytest.fixture(scope="session")
 async def client() -> AsyncGenerator[AsyncClient, None]:
     """Asynchronous test client for API requests."""
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as client:
         yield client
 
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    await test_engine.dispose()
+    os.remove(TEST_DB_PATH)
 
 
-@pytest_asyncio.fixture
+@pytest.fixture
 async def db_session() -> AsyncSession:
     """Provides a fresh database session for setup/teardown within a test."""
     async with TestAsyncSessionLocal() as session:
         yield session
 
 async def create_test_user(session: AsyncSession, email: str, role: str) -> User:
-    """Helper to create a user for testing authentication."""
+    """Helper to create a user for testing authentication (reused if it already exists)."""
+    user = await session.scalar(select(User).where(User.email == email))
+    if user is not None:
+        return user
     user = User(
         email=email,
         hashed_password=security.get_password_hash("testpassword"),
@@ -73,17 +93,17 @@ async def create_test_user(session: AsyncSession, email: str, role: str) -> User
     await session.refresh(user)
     return user
 
-@pytest_asyncio.fixture
+@pytest.fixture
 async def normal_user(db_session: AsyncSession) -> User:
     """Fixture for a standard 'user'."""
     return await create_test_user(db_session, "user@test.com", "user")
 
-@pytest_asyncio.fixture
+@pytest.fixture
 async def admin_user(db_session: AsyncSession) -> User:
     """Fixture for an 'admin' user."""
     return await create_test_user(db_session, "admin@test.com", "admin")
 
-@pytest_asyncio.fixture
+@pytest.fixture
 async def user_token(client: AsyncClient, normal_user: User) -> str:
     """Login and return the JWT token for a normal user."""
     response = await client.post(
@@ -92,7 +112,7 @@ async def user_token(client: AsyncClient, normal_user: User) -> str:
     )
     return response.json()["access_token"]
 
-@pytest_asyncio.fixture
+@pytest.fixture
 async def admin_token(client: AsyncClient, admin_user: User) -> str:
     """Login and return the JWT token for an admin user."""
     response = await client.post(
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+import pytest
+from httpx import AsyncClient
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+from tests.conftest import create_test_user
+
+LOGIN_URL = f"{settings.API_V1_STR}/auth/login"
+USERS_URL = f"{settings.API_V1_STR}/auth/users"
+ADMIN_ONLY_URL = f"{settings.API_V1_STR}/admin/diagnostics/password-hashing"
+
+
+@pytest.mark.anyio
+async def test_access_update_rejects_null_role(client: AsyncClient, admin_token: str, db_session: AsyncSession):
+    """Omitting a field leaves it unchanged; an explicit null is a validation error, not a 500."""
+    user = await create_test_user(db_session, "null-role@test.com", "user")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await client.patch(f"{USERS_URL}/{user.id}", json={"role": None}, headers=headers)
+    assert response.status_code == 422
+    response = await client.patch(f"{USERS_URL}/{user.id}", json={"is_active": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "user"
+
+@pytest.mark.anyio
+async def test_admin_token_is_refused_after_demotion(client: AsyncClient, admin_token: str, db_session: AsyncSession):
+    """The stored role decides: an admin token issued before a demotion is refused."""
+    user = await create_test_user(db_session, "demoted@test.com", "admin")
+    token = security.create_access_token(subject=user.id, role="admin")
+    assert (await client.get(ADMIN_ONLY_URL, headers={"Authorization": f"Bearer {token}"})).status_code == 200
+
+    response = await client.patch(
+        f"{USERS_URL}/{user.id}", json={"role": "user"}, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert (await client.get(ADMIN_ONLY_URL, headers={"Authorization": f"Bearer {token}"})).status_code == 403
+
+@pytest.mark.anyio
+async def test_password_hasher_rejects_beyond_workers_and_queue():
+    """Work beyond the worker and queue slots is refused at once instead of piling up."""
+    hasher = security.PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    blocked = [asyncio.create_task(hasher._run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert hasher.stats()["queue_depth"] == 1
+
+    with pytest.raises(security.PasswordHashingOverloaded):
+        await hasher.hash("testpassword")
+    release.set()
+    await asyncio.gather(*blocked)
+    stats = hasher.stats()
+    assert (stats["pending"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+    hasher.shutdown()
+
+@pytest.mark.anyio
+async def test_login_answers_503_when_hashing_is_saturated(client: AsyncClient, normal_user: User, monkeypatch):
+    hasher = security.password_hasher
+    monkeypatch.setattr(hasher, "pending", hasher.workers + hasher.max_queue)
+    response = await client.post(LOGIN_URL, data={"username": "user@test.com", "password": "testpassword"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+@pytest.mark.anyio
+async def test_login_rehashes_after_work_factor_change(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    """A hash made with an older BCRYPT_ROUNDS is replaced on the next successful login."""
+    user = User(
+        email="rehash@test.com", role="user",
+        hashed_password=CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("testpassword"),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    credentials = {"username": "rehash@test.com", "password": "testpassword"}
+
+    assert (await client.post(LOGIN_URL, data=credentials)).status_code == 200
+    stored = (await db_session.get(User, user.id, populate_existing=True)).hashed_password
+    assert stored.startswith("$2b$05$")
+    assert security.pwd_context.verify("testpassword", stored)
+
+    # Already current: logging in again keeps the stored hash
+    assert (await client.post(LOGIN_URL, data=credentials)).status_code == 200
+    assert (await db_session.get(User, user.id, populate_existing=True)).hashed_password == stored
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from starlette.requests import Request
+
+from app.db.session import DatabaseRouter, STICKY_COOKIE, CONSISTENCY_HEADER
+
+
+def make_request(headers: dict) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+@pytest.fixture
+async def db_router(tmp_path):
+    """Two SQLite files stand in for the primary and its replica."""
+    router = DatabaseRouter(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        [f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"],
+        sticky_seconds=5.0,
+    )
+    for engine, name in ((router.writer, "primary"), (router.readers[0], "replica")):
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE marker (name TEXT)"))
+            await conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    yield router
+    await router.dispose()
+
+async def which_db(session) -> str:
+    async with session:
+        return await session.scalar(text("SELECT name FROM marker"))
+
+@pytest.mark.anyio
+async def test_reads_go_to_replica(db_router):
+    assert await which_db(db_router.reader_session()) == "replica"
+    assert await which_db(db_router.writer_sessions()) == "primary"
+
+@pytest.mark.anyio
+async def test_recent_write_pins_reads_to_primary(db_router):
+    """Read-your-writes: an unexpired sticky cookie or an explicit header selects the primary."""
+    assert not db_router.wants_primary(make_request({}))
+    assert db_router.wants_primary(make_request({"Cookie": f"{STICKY_COOKIE}={time.time() + 5:.3f}"}))
+    assert not db_router.wants_primary(make_request({"Cookie": f"{STICKY_COOKIE}={time.time() - 1:.3f}"}))
+    assert db_router.wants_primary(make_request({CONSISTENCY_HEADER: "primary"}))
+
+@pytest.mark.anyio
+async def test_pool_stats_count_checkouts(db_router):
+    await which_db(db_router.reader_session())
+    stats = {entry["role"]: entry for entry in db_router.pool_stats()}
+    assert stats["reader-0"]["checkouts"] >= 1
+    assert stats["reader-0"]["checked_out"] == 0
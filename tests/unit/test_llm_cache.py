@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.ai_models.llm_cache import LLMCache, make_cache_key
+
+
+def test_cache_key_depends_on_model_and_prompt():
+    """Same prompt on a different model must not share an entry."""
+    assert make_cache_key("llama3", "hello") == make_cache_key("llama3", "hello")
+    assert make_cache_key("llama3", "hello") != make_cache_key("mistral", "hello")
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+
+@pytest.mark.anyio
+async def test_lru_eviction_and_counters():
+    """The least recently used entry is evicted once the memory tier is full."""
+    cache = LLMCache(max_entries=2)
+    await cache.set("a", "A")
+    await cache.set("b", "B")
+    assert await cache.get("a") == "A" # 'a' is now most recently used
+    await cache.set("c", "C")
+
+    assert await cache.get("b") is None
+    assert await cache.get("c") == "C"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.anyio
+async def test_ttl_expiry(monkeypatch):
+    """Entries older than the TTL are treated as misses."""
+    clock = [1000.0]
+    monkeypatch.setattr("app.ai_models.llm_cache.time.time", lambda: clock[0])
+    cache = LLMCache(ttl_seconds=10)
+    await cache.set("k", "v")
+    clock[0] += 11
+    assert await cache.get("k") is None
+
+@pytest.mark.anyio
+async def test_persistent_tier_survives_restart(tmp_path):
+    """A new cache instance on the same file serves earlier results."""
+    db_path = str(tmp_path / "llm_cache.sqlite3")
+    first = LLMCache(db_path=db_path)
+    await first.set("k", "persisted")
+    first.close()
+
+    second = LLMCache(db_path=db_path)
+    assert await second.get("k") == "persisted"
+    assert second.stats()["disk_hits"] == 1
+    second.close()
+
+@pytest.mark.anyio
+async def test_persistent_tier_is_trimmed_with_headroom(tmp_path):
+    """Overwrites do not grow the disk tier; overflowing it drops the oldest rows in one batch."""
+    cache = LLMCache(db_path=str(tmp_path / "llm_cache.sqlite3"), max_disk_entries=10)
+    for i in range(10):
+        await cache.set(f"k{i}", "v")
+    await cache.set("k0", "updated")
+    assert cache.stats()["disk_entries"] == 10
+
+    await cache.set("k10", "v")
+    assert cache.stats()["disk_entries"] == 9
+    (count,) = cache._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+    assert count == 9
+    assert cache._disk_get("k10") is not None
+    assert cache._disk_get("k1") is None # Among the oldest
+    cache.close()
+
+@pytest.mark.anyio
+async def test_concurrent_disk_writes_keep_the_count(tmp_path):
+    """Writes from many worker threads at once leave the row counter matching the table."""
+    cache = LLMCache(max_entries=1, db_path=str(tmp_path / "llm_cache.sqlite3"), max_disk_entries=50)
+    await asyncio.gather(*(cache.set(f"k{i}", "v") for i in range(200)))
+    (count,) = cache._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+    assert cache.stats()["disk_entries"] == count <= 50
+
+    await cache.clear()
+    assert cache.stats()["disk_entries"] == 0
+    assert await cache.get("k199") is None
+    cache.close()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.ai_models.scheduler import (
+    CircuitBreaker, LLMScheduler, LLMUnavailable, LLMTimeout,
+    PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, request_context,
+)
+
+
+def make_scheduler(**kwargs) -> LLMScheduler:
+    options = {"max_concurrency": 1, "max_queue": 10, "max_attempts": 3, "retry_base": 0.001}
+    options.update(kwargs)
+    return LLMScheduler(breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60), **options)
+
+@pytest.mark.anyio
+async def test_interactive_calls_jump_the_queue_and_users_take_turns():
+    scheduler = make_scheduler()
+    order = []
+    gate = asyncio.Event()
+
+    async def call(name, context):
+        async def work(timeout):
+            if name == "first":
+                await gate.wait()
+            order.append(name)
+            return name
+        return await scheduler.run(work, context)
+
+    first = asyncio.create_task(call("first", request_context(PRIORITY_BACKGROUND, "worker", timeout=5))) # Holds the only slot
+    await asyncio.sleep(0)
+
+    tasks = []
+    for name, priority, user in [
+        ("bg", PRIORITY_BACKGROUND, "worker"),
+        ("alice-1", PRIORITY_INTERACTIVE, "alice"),
+        ("alice-2", PRIORITY_INTERACTIVE, "alice"),
+        ("bob-1", PRIORITY_INTERACTIVE, "bob"),
+    ]:
+        tasks.append(asyncio.create_task(call(name, request_context(priority, user, timeout=5))))
+        await asyncio.sleep(0)
+
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    assert order == ["first", "alice-1", "bob-1", "alice-2", "bg"]
+
+@pytest.mark.anyio
+async def test_retryable_failures_are_retried():
+    scheduler = make_scheduler()
+    attempts = []
+
+    async def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise LLMUnavailable("connection refused")
+        return "ok"
+
+    assert await scheduler.run(flaky, request_context(PRIORITY_INTERACTIVE, timeout=5)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.retries == 2
+    assert scheduler.breaker.state == "closed"
+
+@pytest.mark.anyio
+async def test_breaker_opens_and_fails_fast():
+    """While open, calls are rejected without reaching the server."""
+    scheduler = make_scheduler(max_attempts=1)
+    calls = []
+
+    async def down(timeout):
+        calls.append(1)
+        raise LLMUnavailable("connection refused")
+
+    for _ in range(3):
+        with pytest.raises(LLMUnavailable):
+            await scheduler.run(down, request_context(PRIORITY_BACKGROUND, timeout=5))
+    assert scheduler.breaker.state == "open"
+
+    with pytest.raises(LLMUnavailable):
+        await scheduler.run(down, request_context(PRIORITY_BACKGROUND, timeout=5))
+    assert len(calls) == 3
+
+@pytest.mark.anyio
+async def test_deadline_covers_queueing():
+    scheduler = make_scheduler()
+
+    async def slow(timeout):
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    holder = asyncio.create_task(scheduler.run(slow, request_context(PRIORITY_BACKGROUND, timeout=5)))
+    await asyncio.sleep(0)
+    with pytest.raises(LLMTimeout):
+        await scheduler.run(slow, request_context(PRIORITY_INTERACTIVE, timeout=0.05))
+    assert await holder == "slow"
+    assert scheduler.stats()["queued"] == 0
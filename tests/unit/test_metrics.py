@@ -0,0 +1,27 @@
+import pytest
+from httpx import AsyncClient
+from app.core.config import settings
+
+
+@pytest.mark.anyio
+async def test_metrics_reports_route_latency_and_queries(client: AsyncClient, user_token: str):
+    """Requests are labelled by route template, and their SQL shows up per operation."""
+    await client.get(f"{settings.API_V1_STR}/books/999999", headers={"Authorization": f"Bearer {user_token}"})
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'route="/api/v1/books/{book_id}"' in body
+    assert "db_query_duration_seconds_count" in body
+
+@pytest.mark.anyio
+async def test_diagnostics_are_admin_only(client: AsyncClient, admin_token: str, user_token: str):
+    """One admin router lists every component's counters; each is also available on its own."""
+    url = f"{settings.API_V1_STR}/admin/diagnostics"
+    assert (await client.get(url, headers={"Authorization": f"Bearer {user_token}"})).status_code == 403
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    everything = (await client.get(url, headers=headers)).json()
+    assert {"llm-cache", "llm-scheduler", "response-cache", "db-pools", "password-hashing"} <= everything.keys()
+    assert (await client.get(f"{url}/response-cache", headers=headers)).json().keys() == everything["response-cache"].keys()
+    assert (await client.get(f"{url}/unknown", headers=headers)).status_code == 404
@@ -0,0 +1,26 @@
+import pytest
+
+from app.core.pagination import InvalidCursor, cursor_after_id, encode_cursor, next_cursor
+
+
+class Row:
+    def __init__(self, id):
+        self.id = id
+
+def test_next_cursor_trims_extra_row():
+    """Fetching limit + 1 rows yields a full page and a cursor for the last row."""
+    rows = [Row(i) for i in range(1, 5)]
+    cursor = next_cursor(rows, 3, genre=None)
+    assert [r.id for r in rows] == [1, 2, 3]
+    assert cursor_after_id(cursor, genre=None) == 3
+
+def test_last_page_has_no_cursor():
+    rows = [Row(1), Row(2)]
+    assert next_cursor(rows, 3) is None
+    assert len(rows) == 2
+
+def test_cursor_rejects_garbage_and_mismatched_filters():
+    with pytest.raises(InvalidCursor):
+        cursor_after_id("not-a-cursor!!")
+    with pytest.raises(InvalidCursor):
+        cursor_after_id(encode_cursor({"id": 10, "genre": "Fantasy"}), genre="Horror")
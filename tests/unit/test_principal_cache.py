@@ -0,0 +1,29 @@
+from app.core.principal_cache import Principal, PrincipalCache
+
+
+def make_principal(user_id: int = 1, is_active: bool = True) -> Principal:
+    return Principal(id=user_id, email=f"user{user_id}@test.com", role="user", is_active=is_active)
+
+def test_hit_until_ttl_expires(monkeypatch):
+    """Entries are served until their TTL elapses, bounding staleness."""
+    clock = [100.0]
+    monkeypatch.setattr("app.core.principal_cache.time.monotonic", lambda: clock[0])
+    cache = PrincipalCache(ttl_seconds=30)
+    cache.set(make_principal())
+
+    assert cache.get(1) == make_principal()
+    clock[0] += 31
+    assert cache.get(1) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_invalidate_drops_entry():
+    """Role/active changes made in this process apply on the next request."""
+    cache = PrincipalCache(ttl_seconds=30)
+    cache.set(make_principal())
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+def test_zero_ttl_disables_caching():
+    cache = PrincipalCache(ttl_seconds=0)
+    cache.set(make_principal())
+    assert cache.get(1) is None
@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.services.recommendation_engine import ItemItemRecommender, RatingMatrix
+
+
+def build(triplets):
+    users, books, ratings = zip(*triplets)
+    return RatingMatrix(np.array(users), np.array(books), np.array(ratings, dtype=np.float32))
+
+def test_co_rated_books_are_neighbors():
+    """Books rated by the same users are each other's nearest neighbors."""
+    matrix = build([(1, 10, 5), (1, 20, 5), (2, 10, 4), (2, 20, 4), (3, 30, 5)])
+    neighbors = matrix.top_k_neighbors(np.arange(len(matrix.items)), k=5)
+    assert neighbors[10][0].tolist() == [20]
+    assert 30 not in neighbors # No co-ratings, no neighbors
+
+def test_score_excludes_rated_and_falls_back_to_popular():
+    recommender = ItemItemRecommender(k=5)
+    recommender.matrix = build([(1, 10, 5), (1, 20, 5), (2, 10, 4), (2, 20, 4)])
+    recommender.neighbors = recommender.matrix.top_k_neighbors(np.arange(2), k=5)
+    recommender.popular = [30, 10, 40]
+
+    # A user who rated book 10 is recommended its neighbor first, then popular books
+    assert recommender.score([(10, 5)], limit=3) == [20, 30, 40]
+    # Cold start: no reviews at all
+    assert recommender.score([], limit=2) == [30, 10]
+
+def test_incremental_extend_adds_new_books():
+    matrix = build([(1, 10, 5)]).extend([(1, 20, 4)])
+    assert matrix.item_index(20) is not None
@@ -0,0 +1,32 @@
+from app.core.response_cache import CachedResponse, ResponseCache
+
+
+def make_entry(body: bytes = b"{}") -> CachedResponse:
+    return CachedResponse(body=body, etag='W/"x"')
+
+def test_invalidate_by_tag_drops_only_tagged_entries():
+    cache = ResponseCache(ttl_seconds=30)
+    cache.set("book:1", make_entry(), tags=["book:1"])
+    cache.set("books:page", make_entry(), tags=["books"])
+    cache.set("book:2", make_entry(), tags=["book:2"])
+
+    cache.invalidate("book:1", "books")
+    assert cache.get("book:1") is None
+    assert cache.get("books:page") is None
+    assert cache.get("book:2") is not None
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """The TTL bounds how long other workers' writes can go unseen."""
+    clock = [100.0]
+    monkeypatch.setattr("app.core.response_cache.time.monotonic", lambda: clock[0])
+    cache = ResponseCache(ttl_seconds=30)
+    cache.set("book:1", make_entry(), tags=["book:1"])
+    clock[0] += 31
+    assert cache.get("book:1") is None
+
+def test_lru_eviction_keeps_size_bounded():
+    cache = ResponseCache(max_entries=2, ttl_seconds=30)
+    for key in ("a", "b", "c"):
+        cache.set(key, make_entry(), tags=["books"])
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.book import Book
+from app.models.review import Review
+from app.models.review_summary import ReviewSummary
+from app.services.review_summary_service import ReviewSummaryRefresher, describe, store_review_summary
+
+
+@pytest.mark.parametrize("row, status", [
+    (None, "none"),
+    (ReviewSummary(book_id=1, summary=None, pending_reviews=0), "none"),
+    (ReviewSummary(book_id=1, summary=None, pending_reviews=2), "pending"),
+    (ReviewSummary(book_id=1, summary="Liked.", pending_reviews=1), "stale"),
+    (ReviewSummary(book_id=1, summary="Liked.", pending_reviews=0), "fresh"),
+])
+def test_describe_reports_freshness(row, status):
+    assert describe(row)["review_summary_status"] == status
+
+@pytest.fixture
+async def refresher():
+    refresher = ReviewSummaryRefresher(min_new_reviews=3, max_staleness=60.0, debounce=0.5)
+    yield refresher
+    await refresher.stop()
+
+def delay_of(refresher: ReviewSummaryRefresher, book_id: int) -> float:
+    return refresher._timers[book_id][0] - asyncio.get_running_loop().time()
+
+@pytest.mark.anyio
+async def test_refresh_is_scheduled_by_threshold_and_staleness(refresher):
+    now = datetime.now(timezone.utc)
+    refresher.note_stale(ReviewSummary(book_id=1, summary=None, pending_reviews=1, stale_since=now))
+    refresher.note_stale(ReviewSummary(book_id=2, summary="Old.", pending_reviews=3, stale_since=now))
+    refresher.note_stale(ReviewSummary(book_id=3, summary="Old.", pending_reviews=1, stale_since=now))
+    refresher.note_stale(ReviewSummary(book_id=4, summary="Old.", pending_reviews=1, stale_since=now - timedelta(minutes=5)))
+    refresher.note_stale(ReviewSummary(book_id=5, summary="Old.", pending_reviews=0))
+
+    # First summary and enough new reviews: after the debounce
+    assert delay_of(refresher, 1) == pytest.approx(0.5, abs=0.1)
+    assert delay_of(refresher, 2) == pytest.approx(0.5, abs=0.1)
+    # Below the threshold: once the summary is max_staleness old, but never sooner than the debounce
+    assert delay_of(refresher, 3) == pytest.approx(60.0, abs=1.0)
+    assert delay_of(refresher, 4) == pytest.approx(0.5, abs=0.1)
+    assert 5 not in refresher._timers
+
+@pytest.mark.anyio
+async def test_burst_of_reviews_shares_one_refresh(refresher, monkeypatch):
+    """Later reviews never postpone a planned refresh, and the burst triggers it once."""
+    refreshed = []
+
+    async def fake_refresh(book_id):
+        refreshed.append(book_id)
+
+    monkeypatch.setattr(refresher, "refresh", fake_refresh)
+    refresher.debounce = 0.01
+    row = ReviewSummary(book_id=7, summary="Old.", pending_reviews=1, stale_since=datetime.now(timezone.utc))
+    refresher.note_stale(row)
+    planned = refresher._timers[7][0]
+    for pending in (2, 3, 4):
+        row.pending_reviews = pending
+        refresher.note_stale(row)
+    # Reaching the threshold brings the refresh forward; nothing moves it back
+    assert refresher._timers[7][0] < planned
+    await asyncio.sleep(0.05)
+    assert refreshed == [7]
+
+@pytest.mark.anyio
+async def test_store_never_replaces_newer_summary(client: AsyncClient, db_session: AsyncSession):
+    """A summary that finishes last but covers fewer reviews is dropped."""
+    book = Book(title="Watermarks", author="Tester")
+    db_session.add(book)
+    await db_session.flush()
+    older, newer = Review(book_id=book.id, user_id=1, review_text="Fine"), Review(book_id=book.id, user_id=2, review_text="Great")
+    db_session.add_all([older, newer])
+    await db_session.flush()
+    db_session.add(ReviewSummary(book_id=book.id, last_review_id=0, pending_reviews=2))
+    await db_session.commit()
+
+    row = await store_review_summary(db_session, book.id, newer.id, "Covers both.")
+    assert (row.summary, row.last_review_id, row.pending_reviews) == ("Covers both.", newer.id, 0)
+    row = await store_review_summary(db_session, book.id, older.id, "Covers one.")
+    assert (row.summary, row.last_review_id, row.pending_reviews) == ("Covers both.", newer.id, 0)
+    assert describe(row)["review_summary_status"] == "fresh"
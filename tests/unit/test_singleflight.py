@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight, StreamFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+    assert results == ["result"] * 5
+    assert len(runs) == 1
+    assert (flight.calls, flight.coalesced) == (1, 4)
+
+@pytest.mark.anyio
+async def test_cancelled_follower_does_not_cancel_others():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 42
+
+    leader = asyncio.create_task(flight.do("key", work))
+    follower = asyncio.create_task(flight.do("key", work))
+    other = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower.cancel()
+
+    assert await leader == 42
+    assert await other == 42
+    assert follower.cancelled()
+
+@pytest.mark.anyio
+async def test_cancelled_leader_hands_off_to_a_follower():
+    """Followers retry instead of inheriting the leader's cancellation."""
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.gather(*followers) == ["done"] * 3
+    assert len(runs) == 2 # The cancelled leader's run plus one retry
+    assert flight.handoffs == 3
+
+@pytest.mark.anyio
+async def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+async def numbers(count: int, started: list, closed: list):
+    started.append(1)
+    try:
+        for i in range(count):
+            await asyncio.sleep(0.005)
+            yield i
+    finally:
+        closed.append(1)
+
+@pytest.mark.anyio
+async def test_streams_share_one_upstream_and_replay_to_late_subscribers():
+    flight = StreamFlight("test")
+    started, closed = [], []
+
+    async def collect(delay: float) -> list:
+        await asyncio.sleep(delay)
+        return [item async for item in flight.subscribe("key", lambda: numbers(5, started, closed))]
+
+    results = await asyncio.gather(collect(0), collect(0.012))
+    assert results == [[0, 1, 2, 3, 4]] * 2
+    assert (len(started), len(closed)) == (1, 1)
+    assert flight.stats() == {"calls": 1, "coalesced": 1, "in_flight": 0}
+
+@pytest.mark.anyio
+async def test_stream_upstream_stops_when_last_subscriber_leaves():
+    flight = StreamFlight("test")
+    started, closed = [], []
+    first = flight.subscribe("key", lambda: numbers(1000, started, closed))
+    second = flight.subscribe("key", lambda: numbers(1000, started, closed))
+    assert await first.__anext__() == 0
+    assert await second.__anext__() == 0
+
+    await first.aclose()
+    assert await second.__anext__() == 1 # The other subscriber keeps the stream alive
+    await second.aclose()
+    await asyncio.sleep(0.01)
+    assert closed == [1]
+    assert flight.stats()["in_flight"] == 0
+
+@pytest.mark.anyio
+async def test_stream_errors_reach_every_subscriber():
+    flight = StreamFlight("test")
+
+    async def failing():
+        yield "partial"
+        await asyncio.sleep(0.005)
+        raise ValueError("boom")
+
+    async def collect() -> list:
+        return [item async for item in flight.subscribe("key", failing)]
+
+    results = await asyncio.gather(collect(), collect(), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
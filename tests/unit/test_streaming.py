@@ -0,0 +1,138 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai_models.llm_client import llm_client
+from app.api.streaming import stream_llm_tokens
+from app.core.config import settings
+from app.models.review_summary import ReviewSummary
+from app.services.review_summary_service import review_summary_refresher
+from tests.conftest import TestAsyncSessionLocal
+
+STREAM_URL = f"{settings.API_V1_STR}/generate-summary/stream"
+
+
+class NDJSONStream(httpx.AsyncByteStream):
+    """Ollama-style NDJSON body; with `hang` it stays open after the lines, like a model still generating."""
+    def __init__(self, lines: list, hang: bool):
+        self.lines = lines
+        self.hang = hang
+        self.closed = False
+
+    async def __aiter__(self):
+        for line in self.lines:
+            yield (json.dumps(line) + "\n").encode()
+            await asyncio.sleep(0)
+        if self.hang:
+            await asyncio.Event().wait()
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+class DisconnectingRequest:
+    """Stands in for the Starlette request: the client goes away after `connected_checks` checks."""
+    def __init__(self, connected_checks: int):
+        self.connected_checks = connected_checks
+
+    async def is_disconnected(self) -> bool:
+        self.connected_checks -= 1
+        return self.connected_checks < 0
+
+@pytest.fixture
+async def upstream(monkeypatch):
+    """A fake Ollama behind the LLM client: set `lines` (and `hang`), inspect `streams`."""
+    fake = SimpleNamespace(lines=[], hang=False, streams=[])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream = NDJSONStream(fake.lines, fake.hang)
+        fake.streams.append(stream)
+        return httpx.Response(200, stream=stream)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_http_client", http_client)
+    monkeypatch.setattr(llm_client, "cache", None)
+    yield fake
+    await http_client.aclose()
+
+def tokens(*texts: str) -> list:
+    return [{"response": text, "done": False} for text in texts] + [{"response": "", "done": True}]
+
+def parse_events(body: str) -> list:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+@pytest.mark.anyio
+async def test_stream_relays_tokens_then_timings(client: AsyncClient, user_token: str, upstream):
+    upstream.lines = tokens("A tale", " of two", " cities.")
+    response = await client.post(
+        STREAM_URL, headers={"Authorization": f"Bearer {user_token}"},
+        json={"title": "Streamed", "content": "It was the best of times."},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    assert events[:-1] == [("token", {"text": text}) for text in ("A tale", " of two", " cities.")]
+    name, timings = events[-1]
+    assert name == "done"
+    assert set(timings) == {"ttft_ms", "total_ms", "cached"}
+    assert 0 < timings["ttft_ms"] <= timings["total_ms"]
+    assert timings["cached"] is False
+
+@pytest.mark.anyio
+async def test_stream_reports_upstream_error_as_event(client: AsyncClient, user_token: str, upstream):
+    upstream.lines = [{"response": "Partial", "done": False}, {"error": "model not loaded"}]
+    response = await client.post(
+        STREAM_URL, headers={"Authorization": f"Bearer {user_token}"},
+        json={"title": "Broken", "content": "Never finished."},
+    )
+    assert response.status_code == 200
+    assert parse_events(response.text) == [("token", {"text": "Partial"}), ("error", {"detail": "model not loaded"})]
+
+@pytest.mark.anyio
+async def test_client_disconnect_closes_upstream(upstream):
+    """Once the client has gone, the relay stops and the upstream response is closed."""
+    upstream.lines, upstream.hang = [{"response": f"t{i}", "done": False} for i in range(3)], True
+    timings = {}
+    relay = stream_llm_tokens(DisconnectingRequest(1), llm_client.stream_text("disconnect me", timings), timings)
+
+    frames = [frame async for frame in relay]
+    assert frames == ['event: token\ndata: {"text": "t0"}\n\n']
+    for _ in range(100):
+        if upstream.streams[0].closed:
+            break
+        await asyncio.sleep(0.01)
+    assert upstream.streams[0].closed
+
+@pytest.mark.anyio
+async def test_book_summary_stream_generates_and_stores_review_summary(
+    client: AsyncClient, user_token: str, admin_token: str, db_session: AsyncSession, upstream, monkeypatch
+):
+    monkeypatch.setattr(review_summary_refresher, "session_factory", TestAsyncSessionLocal)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    created = await client.post(
+        f"{settings.API_V1_STR}/books/", headers={"Authorization": f"Bearer {admin_token}"},
+        json={"title": "Streamed Reviews", "author": "S. Tream"}, params={"content": "Text."},
+    )
+    book_id = created.json()["id"]
+    await client.post(f"{settings.API_V1_STR}/books/{book_id}/reviews", headers=headers, json={"review_text": "Loved it", "rating": 5})
+    upstream.lines = tokens("Readers", " loved it.")
+
+    response = await client.get(f"{settings.API_V1_STR}/books/{book_id}/summary/stream", headers=headers)
+    events = parse_events(response.text)
+    assert events[0][0] == "stats"
+    assert events[0][1]["review_summary_status"] == "pending"
+    assert events[1:-1] == [("token", {"text": "Readers"}), ("token", {"text": " loved it."})]
+    assert events[-1][0] == "done"
+
+    stored = await db_session.get(ReviewSummary, book_id, populate_existing=True)
+    assert stored.summary == "Readers loved it."
+    assert stored.pending_reviews == 0
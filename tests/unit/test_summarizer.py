@@ -0,0 +1,47 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.ai_models.summarizer import chunk_text, ChunkedSummarizer
+
+
+def test_chunk_text_respects_size_and_overlap():
+    """Chunks never exceed the size limit and consecutive chunks overlap."""
+    content = " ".join(f"word{i}" for i in range(2000))
+    chunks = chunk_text(content, chunk_size=500, overlap=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    # The tail of one chunk reappears at the start of the next
+    assert chunks[1].split()[0] in chunks[0]
+
+def test_short_content_is_a_single_chunk():
+    assert chunk_text("A short book.", chunk_size=500, overlap=50) == ["A short book."]
+
+def test_reduce_groups_always_shrink():
+    """Every reduce level merges at least two partial summaries per group."""
+    summarizer = ChunkedSummarizer(chunk_size=100)
+    groups = summarizer._group(["x" * 90] * 5)
+    assert len(groups) < 5
+    assert all(len(group) >= 2 for group in groups)
+
+def stage_count(stage: str) -> float:
+    return REGISTRY.get_sample_value("summary_stage_duration_seconds_count", {"stage": stage}) or 0.0
+
+@pytest.mark.anyio
+async def test_stage_timings_are_recorded_as_metrics(monkeypatch):
+    """Each map stage, reduce level and run is observed once."""
+    async def fake_chunk_summary(chunk, title, part, total):
+        return f"part {part}"
+
+    async def fake_combined_summary(partials, title, final):
+        return "combined"
+
+    monkeypatch.setattr("app.ai_models.summarizer.llm_client.generate_chunk_summary", fake_chunk_summary)
+    monkeypatch.setattr("app.ai_models.summarizer.llm_client.generate_combined_summary", fake_combined_summary)
+    before = {stage: stage_count(stage) for stage in ("map", "reduce", "total")}
+
+    summary, timings = await ChunkedSummarizer(chunk_size=100, overlap=10).summarize("word " * 100, "Metrics")
+    assert summary == "combined"
+    assert timings["chunks"] > 1
+    assert {stage: stage_count(stage) - before[stage] for stage in before} == {
+        "map": 1, "reduce": len(timings["reduce_levels"]), "total": 1,
+    }
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.book import Book, SUMMARY_READY
+from app.models.summary_job import SummaryJob, JOB_PENDING, JOB_RUNNING, JOB_DONE
+from app.services.summary_worker import SummaryWorker
+
+
+@pytest.fixture
+def sessions(db_session: AsyncSession) -> async_sessionmaker:
+    """Independent sessions on the test database, one per worker."""
+    return async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+async def add_job(db: AsyncSession, **job_fields) -> SummaryJob:
+    book = Book(title="Worker Test", author="Tester")
+    db.add(book)
+    await db.flush()
+    job = SummaryJob(book_id=book.id, content="Some content.", **{"status": JOB_PENDING, **job_fields})
+    db.add(job)
+    await db.commit()
+    return job
+
+@pytest.mark.anyio
+async def test_job_is_claimed_by_one_worker(client: AsyncClient, db_session: AsyncSession, sessions, monkeypatch):
+    """Two workers handed the same job generate its summary once."""
+    calls = []
+
+    async def fake_summarize(content, title):
+        calls.append(title)
+        await asyncio.sleep(0)
+        return "A summary.", 1
+
+    async def no_index(book):
+        return None
+
+    monkeypatch.setattr("app.services.summary_worker.summarize_book", fake_summarize)
+    monkeypatch.setattr("app.services.summary_worker.embedding_service.index_book", no_index)
+    job = await add_job(db_session)
+
+    workers = [SummaryWorker(session_factory=sessions) for _ in range(2)]
+    await asyncio.gather(*(worker._process(job.id) for worker in workers))
+
+    assert len(calls) == 1
+    await db_session.refresh(job)
+    book = await db_session.get(Book, job.book_id, populate_existing=True)
+    assert (job.status, job.attempts, book.summary_status) == (JOB_DONE, 1, SUMMARY_READY)
+
+@pytest.mark.anyio
+async def test_start_requeues_only_expired_claims(client: AsyncClient, db_session: AsyncSession, sessions):
+    """A running job is taken back only once its claim is older than the lease."""
+    now = datetime.now(timezone.utc)
+    live = await add_job(db_session, status=JOB_RUNNING, attempts=1, claimed_at=now)
+    expired = await add_job(db_session, status=JOB_RUNNING, attempts=1, claimed_at=now - timedelta(hours=2))
+
+    worker = SummaryWorker(session_factory=sessions, lease_seconds=60)
+    await worker.start()
+    await worker.stop()
+
+    await db_session.refresh(live)
+    await db_session.refresh(expired)
+    assert live.status == JOB_RUNNING
+    assert (expired.status, expired.claimed_at) == (JOB_PENDING, None)
+
+@pytest.mark.anyio
+async def test_poll_queues_due_jobs_only(client: AsyncClient, db_session: AsyncSession, sessions):
+    """Jobs stored by another process are picked up by the poll, except while backing off."""
+    due = await add_job(db_session)
+    backing_off = await add_job(db_session, attempts=1, retry_at=datetime.now(timezone.utc) + timedelta(hours=1))
+
+    worker = SummaryWorker(session_factory=sessions)
+    await worker.poll()
+    await worker.poll()
+
+    assert due.id in worker._queued
+    assert backing_off.id not in worker._queued
+    assert worker._queue.qsize() == len(worker._queued)
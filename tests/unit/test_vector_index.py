@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.ai_models.vector_index import VectorIndex
+
+
+def random_index(rows: int = 200, dim: int = 16, path=None) -> VectorIndex:
+    rng = np.random.default_rng(0)
+    index = VectorIndex(dim, path=path, initial_capacity=8) # Small capacity exercises growth
+    for book_id in range(rows):
+        index.upsert(book_id, rng.standard_normal(dim))
+    return index
+
+def test_exact_search_finds_the_vector_itself():
+    index = random_index()
+    vector = index.get(42)
+    assert index.search(vector, k=1)[0][0] == 42
+    # Excluding the book itself returns its nearest other book
+    assert index.search(vector, k=1, exclude=42)[0][0] != 42
+
+def test_removed_books_are_never_returned():
+    index = random_index()
+    vector = index.get(7)
+    index.remove(7)
+    assert 7 not in [book_id for book_id, _ in index.search(vector, k=10)]
+
+def test_ivf_with_all_probes_matches_exact():
+    """Probing every bucket makes the approximate search exact."""
+    index = random_index()
+    index.train_ivf(nlist=8)
+    query = index.get(3)
+    assert index.search(query, k=5, approximate=True, nprobe=8) == index.search(query, k=5)
+
+def test_vectors_persist_across_instances(tmp_path):
+    index = random_index(rows=20, path=str(tmp_path))
+    index.flush()
+    reopened = VectorIndex(16, path=str(tmp_path))
+    assert len(reopened) == 20
+    assert np.allclose(reopened.get(5), index.get(5))